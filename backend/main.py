@@ -1,8 +1,45 @@
-from fastapi import FastAPI
+import os
+
+from dotenv import load_dotenv
+
+# Before anything reads its settings
+load_dotenv()
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routes import tasks, focus, alerts, auth, integrations
+from backend.storage import close_storage, focus_store, integration_store, task_store, tenant_evictor
+from backend.utils.event_bus import event_bus
+from backend.utils.health_checks import health_monitor
+from backend.utils.http_client import close_http_client
+from backend.utils.jira_sync import jira_sync
+from backend.utils.json_response import FastJSONResponse
+from backend.utils.lazy_routers import LazyRouterMiddleware, LazyRouters
+from backend.utils.metrics import MetricsMiddleware, loop_lag_monitor, registry
+from backend.utils.reports import report_scheduler
+from backend.utils.slack_notify import slack_dispatcher
+
+app = FastAPI(title="DailyOps+ API", version="1.0.0", default_response_class=FastJSONResponse)
+
+# Routers in backend.routes, with their prefix and tag
+ROUTERS = {
+    "tasks": ("/api/tasks", "Tasks"),
+    "focus": ("/api/focus", "Focus"),
+    "analytics": ("/api/analytics", "Analytics"),
+    "alerts": ("/api/alerts", "Alerts"),
+    "auth": ("/api/auth", "Auth"),
+    "integrations": ("/api/integrations", "Integrations"),
+    "stream": ("/api/stream", "Stream"),
+}
 
-app = FastAPI(title="DailyOps+ API", version="1.0.0")
+# Serverless instances import each router on its first request rather than
+# all of them before the first response
+LAZY_ROUTERS = os.getenv("LAZY_ROUTERS", "true").lower() == "true"
+
+routers = LazyRouters(app, ROUTERS)
+if LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware, routers=routers)
+else:
+    routers.load_all()
 
 # CORS middleware
 app.add_middleware(
@@ -12,13 +49,33 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is outermost and times everything, CORS included
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+async def startup():
+    if jira_sync.configured:
+        jira_sync.start()
+    health_monitor.start()
+    loop_lag_monitor.start()
+    tenant_evictor.start()
+    report_scheduler.start()
 
-# Include routers
-app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
-app.include_router(focus.router, prefix="/api/focus", tags=["Focus"])
-app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])
-app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
-app.include_router(integrations.router, prefix="/api/integrations", tags=["Integrations"])
+@app.on_event("shutdown")
+async def shutdown():
+    await jira_sync.stop()
+    alerts, integrations = routers.imported("alerts"), routers.imported("integrations")
+    if alerts:
+        await alerts.alert_watcher.stop()
+    if integrations:
+        await integrations.webhook_queue.stop()
+    await health_monitor.stop()
+    await loop_lag_monitor.stop()
+    await tenant_evictor.stop()
+    await report_scheduler.stop()
+    await slack_dispatcher.stop()
+    await close_storage()
+    await close_http_client()
 
 @app.get("/")
 async def root():
@@ -27,3 +84,27 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@registry.collector
+def _collect_queues():
+    integrations, tasks = routers.imported("integrations"), routers.imported("tasks")
+    yield "stream_subscribers", "gauge", "Open /api/stream connections", [({}, event_bus.subscriber_count)]
+    yield "queue_depth", "gauge", "Items waiting in background queues", [
+        ({"queue": "webhooks"}, integrations.webhook_queue.pending() if integrations else 0),
+        ({"queue": "slack"}, slack_dispatcher.pending()),
+    ]
+    stores = {"tasks": task_store, "focus_sessions": focus_store, "integrations": integration_store}
+    yield "tenant_partitions", "gauge", "Users with an open storage partition", [
+        ({"store": name}, store.stats()["tenants"]) for name, store in stores.items()
+    ]
+    yield "tenant_partitions_evicted_total", "counter", "Idle user partitions closed", [
+        ({"store": name}, store.evicted) for name, store in stores.items()
+    ]
+    search = tasks.search_indexes.stats() if tasks else {"tasks": 0, "memory_bytes": 0}
+    yield "search_index_tasks", "gauge", "Tasks held in users' search indexes", [({}, search["tasks"])]
+    yield "search_index_bytes", "gauge", "Estimated memory held by users' search indexes", [({}, search["memory_bytes"])]
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, outbound call, cache and loop metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
 # Models module
 from .task_model import Task, TaskCreate
-from .focus_model import FocusSession, FocusSessionCreate, FocusStats
+from .focus_model import FocusSession, FocusSessionCreate, FocusStats, HourlyFocus
 from .integration_model import Integration, IntegrationCreate, IntegrationUpdate
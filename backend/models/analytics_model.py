@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class DailyTrend(BaseModel):
+    date: str
+    focus_minutes: int
+    sessions: int
+    completed_sessions: int
+    tasks_done: int
+
+class FocusTrend(BaseModel):
+    total_minutes: int
+    sessions: int
+    completed_sessions: int
+    completion_rate: float  # completed / all sessions in the window
+    avg_daily_minutes: float
+
+class ThroughputGroup(BaseModel):
+    key: Optional[str] = None  # category or priority; None for uncategorized
+    done: int
+
+class TaskTrend(BaseModel):
+    created: int
+    done: int  # tasks marked done during the window
+    completion_rate: float  # share of the tasks created in the window that are done
+    by_category: List[ThroughputGroup]
+    by_priority: List[ThroughputGroup]
+
+class Streaks(BaseModel):
+    current: int  # consecutive days with focus time ending today (or yesterday)
+    longest: int
+
+class Analytics(BaseModel):
+    start: str
+    end: str
+    days: int
+    daily: List[DailyTrend]
+    focus: FocusTrend
+    tasks: TaskTrend
+    streaks: Streaks
@@ -7,6 +7,7 @@ class FocusSession(BaseModel):
     task_id: Optional[int] = None
     completed: bool = False
     notes: Optional[str] = None
+    user_id: Optional[str] = None  # owning user; None for the anonymous tenant
     created_at: str
 
 class FocusSessionCreate(BaseModel):
@@ -20,3 +21,8 @@ class FocusStats(BaseModel):
     total_minutes: int
     completed_sessions: int
     avg_session_minutes: float
+
+class HourlyFocus(BaseModel):
+    hour: int  # 0-23, local server time
+    sessions: int
+    minutes: int
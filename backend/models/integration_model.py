@@ -11,6 +11,7 @@ class Integration(BaseModel):
     user_id: Optional[str] = None
     created_at: str
     updated_at: str
+    version: int = 0  # assigned by the store on every write
 
 class IntegrationCreate(BaseModel):
     name: str
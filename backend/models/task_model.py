@@ -9,8 +9,10 @@ class Task(BaseModel):
     priority: str  # low, medium, high
     category: Optional[str] = None  # work, personal, focus
     tags: List[str] = []
+    user_id: Optional[str] = None  # owning user; None for the anonymous tenant
     created_at: str
     updated_at: str
+    version: int = 0  # assigned by the store on every write
 
 class TaskCreate(BaseModel):
     title: str
@@ -19,3 +21,40 @@ class TaskCreate(BaseModel):
     priority: Optional[str] = "medium"
     category: Optional[str] = None  # work, personal, focus
     tags: Optional[List[str]] = []
+
+class TaskOperation(BaseModel):
+    op: str  # create, update, delete, set_status
+    id: Optional[int] = None  # required for everything but create
+    task: Optional[TaskCreate] = None  # for create and update
+    status: Optional[str] = None  # for set_status
+
+class BulkTaskRequest(BaseModel):
+    operations: List[TaskOperation]
+
+class BulkTaskResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str  # ok, error
+    detail: Optional[str] = None
+    task: Optional[Task] = None
+
+class TaskChanges(BaseModel):
+    version: int  # pass as ``since`` on the next call
+    upserts: List[Task]
+    deleted: List[int]
+
+class TaskSearchHit(BaseModel):
+    task: Task
+    score: float
+
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+class TaskSearchResult(BaseModel):
+    query: str
+    total: int  # matches found; a lower bound when not exhaustive
+    exhaustive: bool  # false when a very common word cut the search short
+    hits: List[TaskSearchHit]
+    facets: List[TagFacet]
@@ -1,23 +1,174 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
-from typing import List
-import sys
+from typing import List, Optional
+from datetime import date
+import asyncio
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from backend.storage import alert_store, integration_store
 from backend.utils.grafana_api import GrafanaClient
-from backend.utils.slack_notify import SlackNotifier
+from backend.utils.reports import build_report, report_scheduler
+from backend.utils.slack_notify import QueueFullError, slack_dispatcher
+from backend.utils.token_verifier import get_tenant_id
+
+from backend.utils.cache import AsyncTTLCache
+from backend.utils.event_bus import event_bus
+from backend.utils.json_response import FastJSONResponse
+from backend.utils.metrics import register_cache
+from backend.utils.resilience import upstream_failed
 
 router = APIRouter()
 
+# Shared by every dashboard viewer so each refresh interval costs at most one
+# upstream call
+grafana = GrafanaClient()
+alerts_cache = AsyncTTLCache(
+    ttl=float(os.getenv("GRAFANA_CACHE_TTL", "15")),
+    stale_ttl=float(os.getenv("GRAFANA_CACHE_STALE_TTL", "60")),
+)
+register_cache("grafana_alerts", alerts_cache)
+
+# Transitions included in one alert.changed stream event
+EVENT_TRANSITIONS = 100
+
+class AlertWatcher:
+    """Feeds polled alerts into the alert store and publishes what changed.
+
+    Each load applies the Grafana snapshot to ``alert_store`` and, if any
+    alert started firing or resolved, publishes an alert.changed stream
+    event with the new counts. While anyone is subscribed to the stream the
+    cache is refreshed every ``interval`` seconds, so subscribers get new
+    alerts without polling.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self) -> dict:
+        alerts = await grafana.get_alerts()
+        publish_transitions(alert_store.apply_snapshot(alerts["alerts"]))
+        return alerts
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if event_bus.subscriber_count:
+                try:
+                    await alerts_cache.get_or_load("grafana:alerts", self.load)
+                except Exception as e:
+                    print(f"Warning: Alert refresh failed: {e}")
+
+def publish_transitions(transitions: List[dict]):
+    """Tell stream subscribers that alerts changed state"""
+    if transitions:
+        event_bus.publish("alert.changed", {
+            "counts": alert_store.counts(),
+            "transitions": transitions[-EVENT_TRANSITIONS:],
+            "total_transitions": len(transitions),
+        })
+
+alert_watcher = AlertWatcher(interval=float(os.getenv("GRAFANA_CACHE_TTL", "15")))
+
+async def refresh_alerts():
+    try:
+        await alerts_cache.get_or_load("grafana:alerts", alert_watcher.load)
+    except Exception as e:
+        # Only reached before any alerts were fetched; after that Grafana outages serve the last ones
+        if not upstream_failed(e):
+            raise
+        retry_after = max(1, round(getattr(e, "retry_after", 0)))
+        raise HTTPException(status_code=503, detail=f"Grafana unavailable: {e}", headers={"Retry-After": str(retry_after)})
+
 @router.get("/grafana")
-async def get_grafana_alerts():
-    """Get Grafana/Alertmanager alerts"""
-    grafana = GrafanaClient()
-    return grafana.get_alerts()
-
-@router.post("/slack/end-of-day")
-async def send_end_of_day_report(report: dict):
-    """Send end of day report to Slack"""
-    slack = SlackNotifier()
-    return slack.send_end_of_day_report(report)
+async def get_grafana_alerts(
+    status: Optional[str] = Query(None, pattern="^(firing|suppressed|resolved)$"),
+    severity: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """Get deduplicated Grafana/Alertmanager alerts, most severe first.
+
+    Active (firing and suppressed) alerts unless ``status`` is given.
+    ``total`` is the number of matching alerts before ``limit``.
+    """
+    await refresh_alerts()
+    # Alerts are plain JSON-ready dicts; returning a response skips jsonable_encoder
+    return FastJSONResponse({
+        "alerts": alert_store.alerts(status=status, severity=severity, limit=limit),
+        "total": alert_store.total(status, severity),
+        "counts": alert_store.counts(),
+    })
+
+@router.get("/grafana/counts")
+async def get_grafana_alert_counts():
+    """Get alert counts by status and severity"""
+    await refresh_alerts()
+    return alert_store.counts()
+
+@router.get("/grafana/groups")
+async def get_grafana_alert_groups(by: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)):
+    """Get firing alerts grouped by labels (comma separated), most severe groups first"""
+    await refresh_alerts()
+    labels = [label.strip() for label in by.split(",") if label.strip()] if by else None
+    groups = alert_store.groups(by=labels, limit=limit)
+    return {"by": labels or list(alert_store.group_by), "groups": groups}
+
+@router.get("/grafana/transitions")
+async def get_grafana_alert_transitions(limit: int = Query(100, ge=1, le=1000)):
+    """Get recent firing/resolved state changes, newest first"""
+    await refresh_alerts()
+    return alert_store.transitions(limit=limit)
+
+@router.get("/grafana/cache")
+async def get_grafana_cache_stats():
+    """Get hit/miss counters for the Grafana alerts cache"""
+    return alerts_cache.stats()
+
+@router.post("/slack/end-of-day", status_code=202)
+async def send_end_of_day_report(response: Response, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Build today's report from the caller's tasks and focus sessions and queue it for Slack.
+
+    It goes to the caller's enabled Slack integration, or to
+    SLACK_WEBHOOK_URL when they have none.
+    """
+    notifier = slack_dispatcher.notifier
+    integrations = await integration_store.tenant(user_id).all()
+    webhook_url = next(
+        (i.config["webhook_url"] for i in integrations if i.type == "slack" and i.enabled and i.config.get("webhook_url")),
+        None,
+    )
+    if not (webhook_url or notifier.webhook_url):
+        response.status_code = 200
+        return {"message": "Slack webhook not configured"}
+    report = await build_report(user_id, date.today())
+    try:
+        delivery_id = slack_dispatcher.submit(notifier.build_end_of_day_payload(report), webhook_url)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"status": "queued", "delivery_id": delivery_id, "report": report}
+
+@router.get("/slack/reports")
+async def get_report_schedule():
+    """Counters for scheduled end of day reports"""
+    return report_scheduler.stats()
+
+@router.get("/slack/deliveries/{delivery_id}")
+async def get_slack_delivery(delivery_id: str):
+    """Get the delivery state of a queued Slack message"""
+    delivery = slack_dispatcher.get(delivery_id)
+    if delivery is None:
+        raise HTTPException(status_code=404, detail="Delivery not found")
+    return delivery
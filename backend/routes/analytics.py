@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from backend.models.analytics_model import Analytics
+from backend.utils.analytics import analytics_engine
+from backend.utils.metrics import register_cache
+from backend.utils.token_verifier import get_tenant_id
+
+router = APIRouter()
+
+register_cache("analytics_windows", analytics_engine)
+
+# Longest window GET /api/analytics computes, in days
+MAX_WINDOW_DAYS = 3660
+
+@router.get("", response_model=Analytics)
+async def get_analytics(days: int = Query(30, ge=1, le=MAX_WINDOW_DAYS), user_id: Optional[str] = Depends(get_tenant_id)):
+    """Focus and task trends over the last ``days`` days, today included.
+
+    Daily focus minutes, sessions and tasks done, session and task
+    completion rates, tasks done by category and priority, and focus
+    streaks. Each window is computed once and reused until a write
+    touches one of its days.
+    """
+    return await analytics_engine.report(user_id, days)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from backend.utils.supabase_client import supabase_client
+from backend.utils.token_verifier import get_current_user
 import os
 import urllib.parse
 
@@ -37,22 +38,10 @@ async def login(credentials: UserLogin):
         if not user or not session:
             raise HTTPException(status_code=401, detail="Authentication failed")
         
-        # Get user profile or use mock data
-        client = supabase_client.get_client()
-        if client:
-            try:
-                profile = client.table("profiles").select("*").eq("id", user.id).execute()
-                name = profile.data[0]["name"] if profile.data else user.email
-            except:
-                name = user.email
-        else:
-            # Mock user without Supabase
-            name = credentials.email.split("@")[0]
-        
         return {
-            "user_id": user.get("id", user.id),
-            "email": user.get("email", credentials.email),
-            "name": name,
+            "user_id": user["id"],
+            "email": user.get("email") or credentials.email,
+            "name": result.get("name") or user.get("email") or credentials.email,
             "access_token": session.get("access_token", "mock-token"),
             "token_type": "bearer"
         }
@@ -76,16 +65,11 @@ async def register(user: UserRegister):
         if not auth_data or not session:
             raise HTTPException(status_code=400, detail="Registration failed")
         
-        # Handle both dict and object responses
-        user_id = auth_data.get("id") if isinstance(auth_data, dict) else auth_data.id
-        email = auth_data.get("email") if isinstance(auth_data, dict) else auth_data.email
-        access_token = session.get("access_token") if isinstance(session, dict) else session.access_token
-        
         return {
-            "user_id": user_id,
-            "email": email,
+            "user_id": auth_data["id"],
+            "email": auth_data["email"],
             "name": user.name,
-            "access_token": access_token,
+            "access_token": session["access_token"],
             "token_type": "bearer",
             "message": "User registered successfully"
         }
@@ -96,29 +80,17 @@ async def register(user: UserRegister):
 
 @router.post("/logout")
 async def logout(access_token: str):
-    """Logout user"""
+    """Logout user, revoking the session of the given access token"""
     try:
-        client = supabase_client.get_client()
-        if client:
-            client.auth.sign_out()
+        await supabase_client.logout(access_token)
         return {"message": "Logged out successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/me")
-async def get_current_user(access_token: str):
+async def get_me(user: dict = Depends(get_current_user)):
     """Get current user info"""
-    try:
-        result = await supabase_client.get_user(access_token)
-        
-        if "error" in result:
-            raise HTTPException(status_code=401, detail=result["error"])
-        
-        return result.get("user")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return user
 
 @router.get("/oauth_url")
 async def get_oauth_url(provider: str, redirect_url: str):
@@ -1,55 +1,109 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from backend.models.focus_model import FocusSession, FocusSessionCreate, FocusStats
+from backend.models.focus_model import FocusSession, FocusSessionCreate, FocusStats, HourlyFocus
+from backend.storage import QuotaExceededError, focus_store
+from backend.utils.analytics import analytics_engine
+from backend.utils.cache import ResponseCache
+from backend.utils.etag import collection_etag, etag_headers, etag_matches
+from backend.utils.event_bus import event_bus
+from backend.utils.json_response import RawJSONResponse, model_list_bytes
+from backend.utils.metrics import register_cache
+from backend.utils.token_verifier import get_tenant_id
 
 router = APIRouter()
 
-# Mock database - replace with Supabase
-focus_sessions = []
+# Each user's serialized session list, reused until their next focus write
+session_list_cache = ResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "32")))
+register_cache("focus_session_lists", session_list_cache)
+
+# Number of calendar days covered by each stats window
+STATS_WINDOWS = {"today": 1, "7d": 7}
 
 @router.post("/sessions", response_model=FocusSession)
-async def create_focus_session(session: FocusSessionCreate):
+async def create_focus_session(session: FocusSessionCreate, user_id: Optional[str] = Depends(get_tenant_id)):
     """Create a focus session"""
-    new_session = FocusSession(
-        id=len(focus_sessions) + 1,
-        duration=session.duration,
-        task_id=session.task_id,
-        completed=session.completed or False,
-        notes=session.notes,
-        created_at=datetime.now().isoformat()
-    )
-    focus_sessions.append(new_session)
-    return new_session
+    store = focus_store.tenant(user_id)
+    try:
+        await focus_store.check_quota(store)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=403, detail=f"Focus session quota exceeded: {e}")
+    created = await store.create({
+        "duration": session.duration,
+        "task_id": session.task_id,
+        "completed": session.completed or False,
+        "notes": session.notes,
+        "created_at": datetime.now().isoformat()
+    })
+    analytics_engine.focus_written(user_id, created)
+    event_bus.publish("focus.created", created.model_dump(), tenant=user_id)
+    return created
 
 @router.get("/sessions", response_model=List[FocusSession])
-async def get_focus_sessions():
-    """Get all focus sessions"""
-    return focus_sessions
-
-@router.get("/stats")
-async def get_focus_stats():
-    """Get focus statistics"""
-    total_sessions = len(focus_sessions)
-    total_minutes = sum(s.duration for s in focus_sessions)
-    completed_sessions = len([s for s in focus_sessions if s.completed])
-    
-    return FocusStats(
-        total_sessions=total_sessions,
-        total_minutes=total_minutes,
-        completed_sessions=completed_sessions,
-        avg_session_minutes=total_minutes / total_sessions if total_sessions > 0 else 0
-    )
+async def get_focus_sessions(if_none_match: Optional[str] = Header(None), user_id: Optional[str] = Depends(get_tenant_id)):
+    """Get the caller's focus sessions; 304 when If-None-Match has the current ETag"""
+    store = focus_store.tenant(user_id)
+    version = await store.version()
+    etag = collection_etag(version, user_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    cached = session_list_cache.get(user_id, version)
+    if cached is not None:
+        body = cached[0]
+    else:
+        body = model_list_bytes(FocusSession, await store.all())
+        session_list_cache.put(user_id, version, body)
+    return RawJSONResponse(body, headers=etag_headers(etag))
+
+@router.get("/stats", response_model=FocusStats)
+async def get_focus_stats(
+    window: Optional[str] = Query(None, pattern="^(today|7d)$"),
+    task_id: Optional[int] = None,
+    user_id: Optional[str] = Depends(get_tenant_id),
+):
+    """Get focus statistics, overall, for a recent window or for one task"""
+    store = focus_store.tenant(user_id)
+    if task_id is not None:
+        return await store.stats(task_id=task_id)
+    if window is not None:
+        return await store.stats(days=STATS_WINDOWS[window])
+    return await store.stats()
+
+@router.get("/stats/hourly", response_model=List[HourlyFocus])
+async def get_hourly_focus_stats(user_id: Optional[str] = Depends(get_tenant_id)):
+    """Get focus sessions and minutes by hour of day"""
+    return await focus_store.tenant(user_id).hourly()
 
 @router.get("/sessions/{session_id}", response_model=FocusSession)
-async def get_focus_session(session_id: int):
+async def get_focus_session(session_id: int, user_id: Optional[str] = Depends(get_tenant_id)):
     """Get a specific focus session"""
-    for session in focus_sessions:
-        if session.id == session_id:
-            return session
-    raise HTTPException(status_code=404, detail="Focus session not found")
+    session = await focus_store.tenant(user_id).get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Focus session not found")
+    return session
+
+@router.put("/sessions/{session_id}", response_model=FocusSession)
+async def update_focus_session(session_id: int, session: FocusSessionCreate, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Update a focus session"""
+    store = focus_store.tenant(user_id)
+    existing = await store.get(session_id)
+    if existing is None:
+        raise HTTPException(status_code=404, detail="Focus session not found")
+    updated_session = FocusSession(
+        id=session_id,
+        duration=session.duration,
+        task_id=session.task_id,
+        completed=session.completed or False,
+        notes=session.notes,
+        created_at=existing.created_at
+    )
+    try:
+        updated = await store.replace(updated_session)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Focus session not found")
+    analytics_engine.focus_written(user_id, updated)
+    event_bus.publish("focus.updated", updated.model_dump(), tenant=user_id)
+    return updated
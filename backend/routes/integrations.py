@@ -1,121 +1,278 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 from datetime import datetime
 from backend.models.integration_model import Integration, IntegrationCreate, IntegrationUpdate
+from backend.routes.alerts import publish_transitions
+from backend.storage import QuotaExceededError, alert_store, integration_store
+from backend.storage.ticket_store import ticket_store
+from backend.utils.cache import AsyncTTLCache, ResponseCache
+from backend.utils.etag import collection_etag, etag_headers, etag_matches
+from backend.utils.event_bus import event_bus
+from backend.utils.grafana_api import normalize_alert
+from backend.utils.health_checks import health_monitor
+from backend.utils.http_client import TargetRefusedError, check_target
+from backend.utils.jira_sync import issue_to_ticket
+from backend.utils.json_response import RawJSONResponse, model_list_bytes
+from backend.utils.metrics import register_cache
+from backend.utils.resilience import upstream_status
+from backend.utils.reports import report_scheduler
+from backend.utils.slack_notify import QueueFullError
+from backend.utils.token_verifier import get_tenant_id
+from backend.utils.webhooks import SIGNATURE_HEADERS, WebhookQueue, verify_signature
 import os
+import time
 
 router = APIRouter()
 
-# Mock database - will be replaced with Supabase in production
-integrations_db = [
-    {
-        "id": 1,
-        "name": "Grafana",
-        "type": "grafana",
-        "enabled": False,
-        "config": {},
-        "user_id": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    },
-    {
-        "id": 2,
-        "name": "Jira",
-        "type": "jira",
-        "enabled": False,
-        "config": {},
-        "user_id": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    },
-    {
-        "id": 3,
-        "name": "Slack",
-        "type": "slack",
-        "enabled": False,
-        "config": {},
-        "user_id": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    },
-    {
-        "id": 4,
-        "name": "Webhook",
-        "type": "webhook",
-        "enabled": False,
-        "config": {},
-        "user_id": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
-]
+# Payload format each integration type receives; None accepts either
+WEBHOOK_SOURCES = {"grafana": "alertmanager", "jira": "jira", "webhook": None}
+# Webhooks feed the alert and ticket stores every user sees, so only these
+# users' integrations receive them; "anonymous" is the shared workspace,
+# which anyone can configure while ALLOW_ANONYMOUS is on
+WEBHOOK_ADMIN_USERS = {u.strip() for u in os.getenv("WEBHOOK_ADMIN_USERS", "").split(",") if u.strip()}
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(1024 * 1024)))
+
+def _prepare_alertmanager(payload: dict) -> List[dict]:
+    alerts = payload.get("alerts", [])
+    for alert in alerts:
+        labels = alert.get("labels", {})
+        # Labels and the fingerprint become store keys
+        if not isinstance(labels, dict) or not all(isinstance(v, str) for v in labels.values()):
+            raise ValueError("Alert labels must map names to strings")
+        if not isinstance(alert.get("fingerprint", ""), str):
+            raise ValueError("Alert fingerprint must be a string")
+    return [normalize_alert(alert) for alert in alerts]
+
+def _apply_alertmanager(prepared: List[List[dict]]):
+    publish_transitions(alert_store.ingest(alert for alerts in prepared for alert in alerts))
+
+def _prepare_jira(payload: dict) -> Optional[Tuple[str, Any]]:
+    issue = payload.get("issue")
+    if not issue:
+        return None
+    if not isinstance(issue.get("key"), str):
+        raise ValueError("Jira issue has no key")
+    if payload.get("webhookEvent") == "jira:issue_deleted":
+        return "deleted", issue["key"]
+    ticket = issue_to_ticket(issue)
+    if not isinstance(ticket["status"], str):
+        raise ValueError("Jira issue status must be a string")
+    return "updated", ticket
+
+def _apply_jira(prepared: List[Optional[Tuple[str, Any]]]):
+    updated, deleted = [], []
+    for change in prepared:
+        if change is None:
+            continue
+        kind, value = change
+        if kind == "deleted":
+            if ticket_store.remove(value) is not None:
+                deleted.append(value)
+        else:
+            ticket_store.upsert(value)
+            updated.append(value["id"])
+    if updated or deleted:
+        event_bus.publish("ticket.changed", {"updated": updated, "deleted": deleted})
+
+webhook_queue = WebhookQueue(
+    {"alertmanager": (_prepare_alertmanager, _apply_alertmanager), "jira": (_prepare_jira, _apply_jira)},
+    max_queue=int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000")),
+    max_bytes=int(os.getenv("WEBHOOK_QUEUE_BYTES", str(16 * 1024 * 1024))),
+)
+# Receivers look the integration up on every request; keep it briefly.
+# Unknown ids are not cached, so made-up URLs cannot grow it.
+webhook_integrations = AsyncTTLCache(
+    ttl=float(os.getenv("WEBHOOK_CONFIG_TTL", "5")),
+    max_entries=int(os.getenv("WEBHOOK_CONFIG_ENTRIES", "10000")),
+)
+register_cache("webhook_integrations", webhook_integrations)
+# Each user's serialized integration list, reused until their next integration write
+integration_list_cache = ResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "32")))
+register_cache("integration_lists", integration_list_cache)
 
 @router.get("/", response_model=List[Integration])
-async def get_integrations():
-    """Get all integrations"""
-    return integrations_db
+async def get_integrations(if_none_match: Optional[str] = Header(None), user_id: Optional[str] = Depends(get_tenant_id)):
+    """Get the caller's integrations; 304 when If-None-Match has the current ETag.
+
+    A user's first request gives them the default integrations.
+    """
+    store = integration_store.tenant(user_id)
+    await store.seed_defaults()
+    version = await store.version()
+    etag = collection_etag(version, user_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    cached = integration_list_cache.get(user_id, version)
+    if cached is not None:
+        body = cached[0]
+    else:
+        body = model_list_bytes(Integration, await store.all())
+        integration_list_cache.put(user_id, version, body)
+    return RawJSONResponse(body, headers=etag_headers(etag))
+
+@router.get("/webhooks/stats")
+async def get_webhook_stats():
+    """Counters for webhook receivers and the queue behind them"""
+    return webhook_queue.stats()
+
+@router.get("/health")
+async def get_integrations_health(user_id: Optional[str] = Depends(get_tenant_id)):
+    """Latest background health check results for the caller's integrations; never calls out.
+
+    ``upstreams`` has the circuit breaker, adaptive timeout and bulkhead
+    state of each external service the server itself calls.
+    """
+    integrations = await integration_store.tenant(user_id).all()
+    return {**health_monitor.status(i.id for i in integrations), "upstreams": upstream_status()}
+
+@router.post("/test-all")
+async def test_all_integrations(user_id: Optional[str] = Depends(get_tenant_id)):
+    """Probe the caller's enabled integrations concurrently and report each one's latency"""
+    start = time.perf_counter()
+    results = await health_monitor.check_all(await integration_store.tenant(user_id).all())
+    return {"results": results, "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
 
 @router.get("/{integration_id}", response_model=Integration)
-async def get_integration(integration_id: int):
+async def get_integration(integration_id: int, user_id: Optional[str] = Depends(get_tenant_id)):
     """Get a specific integration"""
-    for integration in integrations_db:
-        if integration["id"] == integration_id:
-            return integration
-    raise HTTPException(status_code=404, detail="Integration not found")
+    integration = await integration_store.tenant(user_id).get(integration_id)
+    if integration is None:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    return integration
+
+async def _check_webhook_url(integration_type: str, config: Any):
+    """Refuse a Slack webhook the server must not post to, before it is saved"""
+    url = config.get("webhook_url") if integration_type == "slack" and isinstance(config, dict) else None
+    if not url:
+        return
+    if not isinstance(url, str):
+        raise HTTPException(status_code=400, detail="webhook_url must be a URL")
+    try:
+        await check_target(url)
+    except TargetRefusedError as e:
+        raise HTTPException(status_code=400, detail=f"webhook_url: {e}")
 
 @router.post("/", response_model=Integration)
-async def create_integration(integration: IntegrationCreate):
+async def create_integration(integration: IntegrationCreate, user_id: Optional[str] = Depends(get_tenant_id)):
     """Create a new integration"""
-    new_id = len(integrations_db) + 1
-    new_integration = Integration(
-        id=new_id,
-        name=integration.name,
-        type=integration.type,
-        enabled=integration.enabled or True,
-        config=integration.config,
-        user_id=None,
-        created_at=datetime.now().isoformat(),
-        updated_at=datetime.now().isoformat()
-    )
-    integrations_db.append(new_integration.dict())
-    return new_integration
+    await _check_webhook_url(integration.type, integration.config)
+    store = integration_store.tenant(user_id)
+    try:
+        await integration_store.check_quota(store)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=403, detail=f"Integration quota exceeded: {e}")
+    created = await store.create({
+        "name": integration.name,
+        "type": integration.type,
+        "enabled": integration.enabled or True,
+        "config": integration.config,
+        "created_at": datetime.now().isoformat(),
+        "updated_at": datetime.now().isoformat()
+    })
+    report_scheduler.schedule(created)
+    event_bus.publish("integration.created", created.model_dump(), tenant=user_id)
+    return created
 
 @router.put("/{integration_id}", response_model=Integration)
-async def update_integration(integration_id: int, integration_update: IntegrationUpdate):
+async def update_integration(
+    integration_id: int, integration_update: IntegrationUpdate, user_id: Optional[str] = Depends(get_tenant_id)
+):
     """Update an integration"""
-    for i, integration in enumerate(integrations_db):
-        if integration["id"] == integration_id:
-            updated_data = integration_update.dict(exclude_unset=True)
-            updated_integration = {**integration, **updated_data, "updated_at": datetime.now().isoformat()}
-            integrations_db[i] = updated_integration
-            return Integration(**updated_integration)
-    raise HTTPException(status_code=404, detail="Integration not found")
+    store = integration_store.tenant(user_id)
+    integration = await store.get(integration_id)
+    if integration is None:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    updated_data = integration_update.dict(exclude_unset=True)
+    updated_integration = integration.model_copy(update={**updated_data, "updated_at": datetime.now().isoformat()})
+    await _check_webhook_url(updated_integration.type, updated_integration.config)
+    try:
+        updated = await store.replace(updated_integration)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    webhook_integrations.invalidate(str(integration_id))
+    health_monitor.forget(integration_id)
+    report_scheduler.schedule(updated)
+    event_bus.publish("integration.updated", updated.model_dump(), tenant=user_id)
+    return updated
 
 @router.delete("/{integration_id}")
-async def delete_integration(integration_id: int):
+async def delete_integration(integration_id: int, user_id: Optional[str] = Depends(get_tenant_id)):
     """Delete an integration"""
-    for i, integration in enumerate(integrations_db):
-        if integration["id"] == integration_id:
-            integrations_db.pop(i)
-            return {"message": "Integration deleted"}
-    raise HTTPException(status_code=404, detail="Integration not found")
+    if await integration_store.tenant(user_id).delete(integration_id) is None:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    webhook_integrations.invalidate(str(integration_id))
+    health_monitor.forget(integration_id)
+    report_scheduler.forget(integration_id)
+    event_bus.publish("integration.deleted", {"id": integration_id}, tenant=user_id)
+    return {"message": "Integration deleted"}
 
 @router.post("/{integration_id}/test")
-async def test_integration(integration_id: int):
-    """Test an integration connection"""
-    integration = None
-    for i in integrations_db:
-        if i["id"] == integration_id:
-            integration = i
-            break
+async def test_integration(integration_id: int, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Test an integration connection now; the result's status is ok, error or unconfigured"""
+    integration = await integration_store.tenant(user_id).get(integration_id)
     
     if not integration:
         raise HTTPException(status_code=404, detail="Integration not found")
     
-    if not integration["enabled"]:
+    if not integration.enabled:
         raise HTTPException(status_code=400, detail="Integration is not enabled")
     
-    # TODO: Implement actual connection testing based on integration type
-    return {"status": "success", "message": f"Connection to {integration['name']} successful"}
+    return await health_monitor.check(integration)
+
+@router.post("/{integration_id}/webhook", status_code=202)
+async def receive_webhook(integration_id: int, request: Request):
+    """Accept a signed Alertmanager or Jira notification.
+
+    Senders hold no user token, so the integration is looked up by id
+    across users and the signature is what authenticates the request.
+    Only integrations owned by WEBHOOK_ADMIN_USERS accept webhooks, since
+    what they carry is shown to every user.
+
+    The body must carry an HMAC-SHA256 signature made with the
+    integration's ``webhook_secret`` (``X-Hub-Signature-256: sha256=...``).
+    Verified bodies are queued and applied to the alert and ticket stores
+    in the background; while the queue is full requests get a 429.
+    """
+    if webhook_queue.full():
+        webhook_queue.reject()
+        raise HTTPException(status_code=429, detail="Webhook queue is full", headers={"Retry-After": "1"})
+
+    integration = await webhook_integrations.get_or_load(
+        str(integration_id), lambda: integration_store.find(integration_id)
+    )
+    if integration is None:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    if integration.type not in WEBHOOK_SOURCES:
+        raise HTTPException(status_code=400, detail="Integration does not accept webhooks")
+    if (integration.user_id or "anonymous") not in WEBHOOK_ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Integration owner may not receive webhooks")
+    if not integration.enabled:
+        raise HTTPException(status_code=400, detail="Integration is not enabled")
+    secret = integration.config.get("webhook_secret")
+    if not secret:
+        raise HTTPException(status_code=403, detail="Webhook secret not configured")
+
+    body = await _read_body(request, WEBHOOK_MAX_BODY_BYTES)
+    signature = next((request.headers[h] for h in SIGNATURE_HEADERS if h in request.headers), None)
+    if not verify_signature(secret, body, signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        webhook_queue.submit(WEBHOOK_SOURCES[integration.type], body)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return {"status": "accepted"}
 
+async def _read_body(request: Request, limit: int) -> bytes:
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared > limit:
+        raise HTTPException(status_code=413, detail="Webhook body too large")
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Webhook body too large")
+    return body
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import os
+
+from backend.routes.alerts import alert_watcher
+from backend.utils.event_bus import event_bus
+from backend.utils.token_verifier import InvalidTokenError, get_tenant_id, resolve_tenant
+
+router = APIRouter()
+
+# Idle SSE connections get a comment this often so proxies keep them open
+HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+def _topics(topics: Optional[List[str]]) -> Optional[List[str]]:
+    # "task" matches task.created, task.updated, ...
+    return [f"{t}." for t in topics] if topics else None
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    topics: Optional[List[str]] = Query(None),
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    user_id: Optional[str] = Depends(get_tenant_id),
+):
+    """Server-sent events for the caller's task, focus and integration changes and for alert changes.
+
+    Resume after a disconnect with the ``Last-Event-ID`` header (sent by
+    EventSource automatically) or the ``since`` query parameter.
+    EventSource cannot set headers, so pass the token as ``access_token``.
+    """
+    # Alerts are only polled while someone is listening
+    alert_watcher.start()
+    subscription = event_bus.subscribe(last_event_id or since, _topics(topics), user_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            # StreamingResponse cancels this generator when the client goes away
+            while True:
+                event = await subscription.next(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                seq, event_type, text, _ = event
+                yield f"id: {event_bus.event_id(seq)}\nevent: {event_type}\ndata: {text}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def stream_events_ws(
+    websocket: WebSocket,
+    topics: Optional[List[str]] = Query(None),
+    since: Optional[str] = None,
+    access_token: Optional[str] = None,
+):
+    """WebSocket variant of the event stream; each message is one JSON event"""
+    try:
+        user_id = await resolve_tenant(access_token)
+    except InvalidTokenError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    alert_watcher.start()
+    subscription = event_bus.subscribe(since, _topics(topics), user_id)
+    # Clients only listen, so watch for the close frame separately
+    closed = asyncio.ensure_future(_wait_closed(websocket))
+    try:
+        while True:
+            event = asyncio.ensure_future(subscription.next())
+            await asyncio.wait({event, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                event.cancel()
+                break
+            await websocket.send_text(event.result()[2])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        subscription.close()
+
+async def _wait_closed(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
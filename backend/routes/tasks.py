@@ -1,72 +1,384 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Optional
 from datetime import datetime
-import sys
+import base64
+import json
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from backend.utils.jira_api import JiraClient
-from backend.models.task_model import Task, TaskCreate
+from backend.utils.jira_sync import jira_sync, ticket_to_task
+from backend.models.task_model import BulkTaskRequest, BulkTaskResult, Task, TaskChanges, TaskCreate, TaskSearchHit, TaskSearchResult
+from backend.storage import QuotaExceededError, task_store
+from backend.storage.search_index import SearchIndexes
+from backend.utils.cache import ResponseCache
+from backend.utils.etag import collection_etag, etag_headers, etag_matches
+from backend.utils.event_bus import event_bus
+from backend.utils.json_response import FastJSONResponse, RawJSONResponse, model_list_bytes
+from backend.utils.metrics import register_cache
+from backend.utils.token_verifier import get_tenant_id
 
 router = APIRouter()
 
-# Mock database - replace with Supabase in production
-tasks_db = []
+# Serialized task lists per user and query, reused until that user's next task write
+task_list_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "32")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+register_cache("task_lists", task_list_cache)
+
+# Full-text indexes of the most recently searched users' tasks, kept current by every write
+search_indexes = SearchIndexes(
+    max_tenants=int(os.getenv("SEARCH_INDEX_TENANTS", "100")),
+    max_scan=int(os.getenv("SEARCH_MAX_SCAN", "1000")),
+)
+
+# Largest batch accepted by POST /bulk
+BULK_MAX_OPERATIONS = 1000
+# Tasks written per transaction by POST /import
+IMPORT_BATCH_SIZE = 500
+# Longest NDJSON line POST /import buffers before giving up on the upload
+IMPORT_MAX_LINE_BYTES = 64 * 1024
+
+# Stream event published for each kind of storage write
+WRITE_EVENTS = {"create": "task.created", "replace": "task.updated", "delete": "task.deleted"}
+
+def _publish(kind: str, task: Task):
+    index = search_indexes.peek(task.user_id)
+    if index is not None:
+        index.apply(kind, task)
+    if kind == "delete":
+        event_bus.publish(WRITE_EVENTS[kind], {"id": task.id}, tenant=task.user_id)
+    else:
+        event_bus.publish(WRITE_EVENTS[kind], task.model_dump(), tenant=task.user_id)
+
+async def _check_quota(store, adding: int = 1):
+    try:
+        await task_store.check_quota(store, adding)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=403, detail=f"Task quota exceeded: {e}")
+
+def encode_cursor(key: list) -> str:
+    """Turn a sort key into an opaque pagination cursor"""
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(key, list):
+        raise ValueError("Malformed cursor")
+    return key
 
 @router.get("/", response_model=List[Task])
-async def get_tasks():
-    """Get all tasks"""
-    return tasks_db
+async def get_tasks(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_match: str = Query("any", pattern="^(any|all)$"),
+    updated_since: Optional[datetime] = None,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None),
+    user_id: Optional[str] = Depends(get_tenant_id),
+):
+    """Get the caller's tasks, optionally filtered, sorted and paginated.
 
-@router.post("/", response_model=Task)
-async def create_task(task: TaskCreate):
-    """Create a new task"""
-    new_task = Task(
-        id=len(tasks_db) + 1,
+    ``sort`` is a comma separated list of fields, each optionally prefixed
+    with ``-`` for descending order. When more results remain the next
+    page's cursor is returned in the ``X-Next-Cursor`` header. Responses
+    carry an ETag for the whole task collection; send it back in
+    ``If-None-Match`` to get 304 when nothing changed.
+    """
+    store = task_store.tenant(user_id)
+    # Read the version before the tasks so the ETag is never newer than the body
+    version = await store.version()
+    etag = collection_etag(version, user_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+
+    key = (user_id, status, priority, category, tuple(tags or ()), tag_match, updated_since, sort, cursor, limit)
+    cached = task_list_cache.get(key, version)
+    if cached is not None:
+        body, headers = cached
+        return RawJSONResponse(body, headers={**headers, **etag_headers(etag)})
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    try:
+        page, next_key = await store.query(
+            status=status,
+            priority=priority,
+            category=category,
+            tags=tags,
+            match_all_tags=tag_match == "all",
+            updated_since=updated_since.isoformat() if updated_since else None,
+            sort=[s.strip() for s in sort.split(",") if s.strip()],
+            after=after,
+            limit=limit,
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The store hands back Task models, so skip response_model validation
+    body = model_list_bytes(Task, page)
+    headers = {"X-Next-Cursor": encode_cursor(next_key)} if next_key is not None else {}
+    task_list_cache.put(key, version, body, headers)
+    return RawJSONResponse(body, headers={**headers, **etag_headers(etag)})
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(since: int = Query(0, ge=0), user_id: Optional[str] = Depends(get_tenant_id)):
+    """Tasks written and ids deleted since a version.
+
+    Start with ``since=0`` after a full load and pass the returned
+    ``version`` next time. 410 means the change log no longer reaches
+    back that far and the client has to reload the full list.
+    """
+    changes = await task_store.tenant(user_id).changes(since)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="Change log does not reach back to this version; reload all tasks")
+    upserts, deleted, version = changes
+    return TaskChanges(version=version, upserts=upserts, deleted=deleted)
+
+@router.get("/search", response_model=TaskSearchResult)
+async def search_tasks(
+    q: str,
+    tags: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: Optional[str] = Depends(get_tenant_id),
+):
+    """Search the caller's task titles, descriptions and tags.
+
+    Every word in ``q`` must match, the last one as a prefix unless ``q``
+    ends with a space, so the endpoint can back a type-ahead box. Hits are
+    ranked by BM25 and ``facets`` counts the tags of every match. Only
+    tasks carrying all of ``tags`` match when given. For very common words
+    the newest matches are ranked and ``exhaustive`` is false.
+    """
+    store = task_store.tenant(user_id)
+    index = search_indexes.get(user_id)
+    await index.sync(store)
+    result = index.search(q, limit=limit, tags=tags)
+    tasks = await store.get_many(task_id for task_id, _ in result["hits"])
+    hits = [TaskSearchHit(task=tasks[task_id], score=score) for task_id, score in result["hits"] if tasks.get(task_id)]
+    return TaskSearchResult(
+        query=q, total=result["total"], exhaustive=result["exhaustive"], hits=hits, facets=result["facets"],
+    )
+
+@router.get("/search/stats")
+async def search_index_stats(user_id: Optional[str] = Depends(get_tenant_id)):
+    """Size and memory use of the caller's search index, and of all indexes held"""
+    index = search_indexes.peek(user_id)
+    return {"index": index.stats() if index is not None else None, "all": search_indexes.stats()}
+
+def _new_task_data(task: TaskCreate) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "title": task.title,
+        "description": task.description,
+        "status": task.status or "todo",
+        "priority": task.priority or "medium",
+        "category": task.category,
+        "tags": task.tags or [],
+        "created_at": now,
+        "updated_at": now
+    }
+
+def _merge_update(t: Task, task: TaskCreate) -> Task:
+    return Task(
+        id=t.id,
         title=task.title,
         description=task.description,
-        status=task.status or "todo",
-        priority=task.priority or "medium",
-        category=task.category,
-        tags=task.tags or [],
-        created_at=datetime.now().isoformat(),
+        status=task.status or t.status,
+        priority=task.priority or t.priority,
+        category=task.category if task.category else t.category,
+        tags=task.tags or t.tags,
+        created_at=t.created_at,
         updated_at=datetime.now().isoformat()
     )
-    tasks_db.append(new_task)
-    return new_task
+
+@router.post("/", response_model=Task)
+async def create_task(task: TaskCreate, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Create a new task"""
+    store = task_store.tenant(user_id)
+    await _check_quota(store)
+    created = await store.create(_new_task_data(task))
+    _publish("create", created)
+    return created
+
+@router.post("/bulk", response_model=List[BulkTaskResult])
+async def bulk_tasks(request: BulkTaskRequest, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Apply a batch of create/update/delete/set_status operations atomically.
+
+    Every operation is validated before anything is written; if any is
+    invalid the response is 422 with a result per operation and nothing
+    is applied.
+    """
+    ops = request.operations
+    if len(ops) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_OPERATIONS} operations per request")
+
+    store = task_store.tenant(user_id)
+    # Current state of every task the batch touches; None once deleted
+    current: Dict[int, Optional[Task]] = await store.get_many(o.id for o in ops if o.id is not None)
+    writes = []
+    results = []
+    failed = False
+    for index, o in enumerate(ops):
+        result = BulkTaskResult(index=index, op=o.op, id=o.id, status="ok")
+        results.append(result)
+        error = None
+        if o.op == "create":
+            if o.task is None:
+                error = "create needs a task"
+            else:
+                writes.append(("create", _new_task_data(o.task)))
+        elif o.op in ("update", "delete", "set_status"):
+            existing = current.get(o.id) if o.id is not None else None
+            if o.id is None:
+                error = f"{o.op} needs an id"
+            elif existing is None:
+                error = "Task not found"
+            elif o.op == "update" and o.task is None:
+                error = "update needs a task"
+            elif o.op == "set_status" and not o.status:
+                error = "set_status needs a status"
+            elif o.op == "delete":
+                current[o.id] = None
+                writes.append(("delete", o.id))
+            else:
+                if o.op == "update":
+                    updated = _merge_update(existing, o.task)
+                else:
+                    updated = existing.model_copy(update={"status": o.status, "updated_at": datetime.now().isoformat()})
+                current[o.id] = updated
+                writes.append(("replace", updated))
+        else:
+            error = f"Unknown operation {o.op!r}"
+        if error is not None:
+            result.status, result.detail = "error", error
+            failed = True
+
+    if failed:
+        raise HTTPException(status_code=422, detail=[r.model_dump(exclude_none=True) for r in results])
+
+    await _check_quota(store, sum(kind == "create" for kind, _ in writes) - sum(kind == "delete" for kind, _ in writes))
+    try:
+        tasks = await store.bulk_write(writes)
+    except KeyError:
+        # A task changed between validation and the write
+        raise HTTPException(status_code=409, detail="Tasks changed during the request; nothing was applied")
+    for result, (kind, _), task in zip(results, writes, tasks):
+        result.id = task.id
+        result.task = task
+        _publish(kind, task)
+    return results
+
+@router.post("/import")
+async def import_tasks(request: Request, user_id: Optional[str] = Depends(get_tenant_id)):
+    """Stream newline-delimited JSON tasks into the caller's store.
+
+    Each line is a TaskCreate object. Valid lines are written in
+    transactions of IMPORT_BATCH_SIZE tasks; invalid lines are skipped
+    and reported with their line number. The import stops with 403 at the
+    first batch that would exceed the task quota, and with 413 at the
+    first line longer than IMPORT_MAX_LINE_BYTES, after writing the lines
+    before it.
+    """
+    store = task_store.tenant(user_id)
+    imported = 0
+    errors = []
+    batch = []
+    line_no = 0
+    buffer = b""
+
+    async def flush():
+        nonlocal imported, batch
+        if batch:
+            try:
+                await task_store.check_quota(store, len(batch))
+            except QuotaExceededError as e:
+                raise HTTPException(status_code=403, detail=f"Task quota exceeded after importing {imported} tasks: {e}")
+            for task in await store.bulk_write(batch):
+                _publish("create", task)
+                imported += 1
+            batch = []
+
+    def parse(line: bytes):
+        if not line.strip():
+            return
+        try:
+            batch.append(("create", _new_task_data(TaskCreate.model_validate_json(line))))
+        except ValidationError as e:
+            errors.append({"line": line_no, "detail": e.errors(include_url=False)})
+
+    async def too_long():
+        await flush()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Line {line_no + 1} is longer than {IMPORT_MAX_LINE_BYTES} bytes; imported {imported} tasks before it",
+        )
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > IMPORT_MAX_LINE_BYTES:
+                await too_long()
+            line_no += 1
+            parse(line)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+        # Without a newline the rest of the chunk would keep growing
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            await too_long()
+    if buffer:
+        line_no += 1
+        parse(buffer)
+    await flush()
+    return {"imported": imported, "errors": errors}
 
 @router.put("/{task_id}", response_model=Task)
-async def update_task(task_id: int, task: TaskCreate):
+async def update_task(task_id: int, task: TaskCreate, user_id: Optional[str] = Depends(get_tenant_id)):
     """Update a task"""
-    for i, t in enumerate(tasks_db):
-        if t.id == task_id:
-            updated_task = Task(
-                id=task_id,
-                title=task.title,
-                description=task.description,
-                status=task.status or t.status,
-                priority=task.priority or t.priority,
-                category=task.category if task.category else t.category,
-                tags=task.tags or t.tags,
-                created_at=t.created_at,
-                updated_at=datetime.now().isoformat()
-            )
-            tasks_db[i] = updated_task
-            return updated_task
-    raise HTTPException(status_code=404, detail="Task not found")
+    store = task_store.tenant(user_id)
+    t = await store.get(task_id)
+    if t is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        updated = await store.replace(_merge_update(t, task))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Task not found")
+    _publish("replace", updated)
+    return updated
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int):
+async def delete_task(task_id: int, user_id: Optional[str] = Depends(get_tenant_id)):
     """Delete a task"""
-    for i, t in enumerate(tasks_db):
-        if t.id == task_id:
-            tasks_db.pop(i)
-            return {"message": "Task deleted"}
-    raise HTTPException(status_code=404, detail="Task not found")
+    task = await task_store.tenant(user_id).delete(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    _publish("delete", task)
+    return {"message": "Task deleted"}
 
 @router.get("/jira")
-async def get_jira_tickets():
-    """Get Jira tickets"""
-    jira = JiraClient()
-    return jira.get_tickets()
+async def get_jira_tickets(as_tasks: bool = False, status: Optional[str] = None):
+    """Get Jira tickets from the locally synced copy"""
+    if not jira_sync.configured:
+        return jira_sync.client.get_tickets()
+    tickets = jira_sync.store.all(status=status)
+    # Tickets are plain JSON-ready dicts; returning a response skips jsonable_encoder
+    if as_tasks:
+        return FastJSONResponse({"tasks": [ticket_to_task(t) for t in tickets], "sync": jira_sync.status()})
+    return FastJSONResponse({"tickets": tickets, "sync": jira_sync.status()})
+
+@router.post("/jira/sync")
+async def sync_jira_tickets():
+    """Run a Jira sync now instead of waiting for the next poll"""
+    if not jira_sync.configured:
+        raise HTTPException(status_code=400, detail="Jira not configured")
+    return await jira_sync.sync_once()
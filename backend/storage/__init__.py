@@ -0,0 +1,95 @@
+# Storage module
+import os
+from itertools import count
+
+from .task_store import TaskRepository, InMemoryTaskRepository
+from .focus_store import FocusRepository, FocusStatsAccumulator, InMemoryFocusRepository
+from .integration_store import IntegrationIndex, IntegrationRepository, InMemoryIntegrationIndex, InMemoryIntegrationRepository
+from .ticket_store import TicketStore, ticket_store
+from .alert_store import AlertStore, alert_store
+from .tenants import ANONYMOUS, QuotaExceededError, TenantEvictor, TenantPartitions
+
+# memory (default, single process), sqlite (one host, any number of
+# workers) or supabase (shared Postgres)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+
+# How far back GET /api/tasks/changes can answer: recently written tasks
+# for memory, versions for sqlite
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+
+# Rows each user may store, and how long a sqlite/supabase user's
+# partition stays open without requests
+TENANT_MAX_TASKS = int(os.getenv("TENANT_MAX_TASKS", "100000"))
+TENANT_MAX_FOCUS_SESSIONS = int(os.getenv("TENANT_MAX_FOCUS_SESSIONS", "100000"))
+TENANT_MAX_INTEGRATIONS = int(os.getenv("TENANT_MAX_INTEGRATIONS", "100"))
+TENANT_IDLE_SECONDS = float(os.getenv("TENANT_IDLE_SECONDS", "900"))
+
+
+def create_repositories(backend: str):
+    """Build the per-user task, focus and integration partitions for a backend"""
+    if backend == "memory":
+        integration_ids, integrations_by_id = count(1), {}
+        return (
+            TenantPartitions(lambda user_id: InMemoryTaskRepository(CHANGE_LOG_SIZE, user_id), TENANT_MAX_TASKS),
+            TenantPartitions(InMemoryFocusRepository, TENANT_MAX_FOCUS_SESSIONS),
+            TenantPartitions(
+                lambda user_id: InMemoryIntegrationRepository(user_id, integration_ids, integrations_by_id),
+                TENANT_MAX_INTEGRATIONS,
+                unscoped=InMemoryIntegrationIndex(integrations_by_id),
+            ),
+        )
+    if backend == "sqlite":
+        from .sqlite_store import (
+            SQLiteDatabase, SQLiteFocusRepository, SQLiteIntegrationIndex, SQLiteIntegrationRepository, SQLiteTaskRepository,
+        )
+        db = SQLiteDatabase(
+            os.getenv("SQLITE_PATH", "dailyops.db"),
+            commit_batch=int(os.getenv("SQLITE_COMMIT_BATCH", "256")),
+            change_log_size=CHANGE_LOG_SIZE,
+        )
+        return (
+            TenantPartitions(
+                lambda user_id: SQLiteTaskRepository(db, user_id), TENANT_MAX_TASKS, idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+            TenantPartitions(
+                lambda user_id: SQLiteFocusRepository(db, user_id), TENANT_MAX_FOCUS_SESSIONS, idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+            TenantPartitions(
+                lambda user_id: SQLiteIntegrationRepository(db, user_id), TENANT_MAX_INTEGRATIONS,
+                unscoped=SQLiteIntegrationIndex(db), idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+        )
+    if backend == "supabase":
+        from backend.utils.supabase_client import SupabaseClient
+        from .supabase_store import (
+            SupabaseFocusRepository, SupabaseIntegrationIndex, SupabaseIntegrationRepository, SupabaseTaskRepository,
+        )
+        # Server-side storage needs the service role key to write past RLS
+        supabase = SupabaseClient(os.getenv("SUPABASE_SERVICE_ROLE_KEY") or None)
+        if not supabase.enabled:
+            raise RuntimeError("STORAGE_BACKEND=supabase requires SUPABASE_URL and a Supabase key")
+        return (
+            TenantPartitions(
+                lambda user_id: SupabaseTaskRepository(supabase, user_id), TENANT_MAX_TASKS, idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+            TenantPartitions(
+                lambda user_id: SupabaseFocusRepository(supabase, user_id), TENANT_MAX_FOCUS_SESSIONS, idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+            TenantPartitions(
+                lambda user_id: SupabaseIntegrationRepository(supabase, user_id), TENANT_MAX_INTEGRATIONS,
+                unscoped=SupabaseIntegrationIndex(supabase), idle_seconds=TENANT_IDLE_SECONDS,
+            ),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+
+task_store, focus_store, integration_store = create_repositories(STORAGE_BACKEND)
+
+# Global instance
+tenant_evictor = TenantEvictor((task_store, focus_store, integration_store))
+
+
+async def close_storage():
+    """Flush pending writes; called on application shutdown"""
+    for store in (task_store, focus_store, integration_store):
+        await store.close()
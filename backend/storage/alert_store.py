@@ -0,0 +1,253 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Most urgent first; other severities sort after these
+SEVERITY_ORDER = ("critical", "high", "warning", "medium", "low", "info", "none")
+
+ACTIVE_STATUSES = ("firing", "suppressed")
+
+
+def fingerprint(labels: dict) -> str:
+    """Stable id for an alert's label set"""
+    raw = "\x00".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+class AlertStore:
+    """Deduplicated alerts keyed by label fingerprint, with rollups kept current.
+
+    ``apply_snapshot`` takes the full set of active alerts from a poll;
+    alerts missing from it are resolved. ``ingest`` takes individual
+    firing/resolved updates from a push. Either way each alert moves
+    between firing, suppressed and resolved, the transition is recorded,
+    and the (status, severity) index and the groups of firing alerts by
+    ``group_by`` labels are updated in place, so counts and grouped views
+    cost nothing to compute however many alerts are active. Resolved alerts
+    are forgotten ``resolved_retention`` seconds after resolving.
+    """
+
+    def __init__(self, group_by: Sequence[str] = ("alertname",), resolved_retention: float = 3600, history: int = 1000):
+        self.group_by = tuple(group_by)
+        self.resolved_retention = resolved_retention
+        self._alerts: Dict[str, dict] = {}
+        self._index: Dict[Tuple[str, str], Set[str]] = {}
+        # Firing alerts by group_by label values, then by severity
+        self._groups: Dict[Tuple[str, ...], Dict[str, Set[str]]] = {}
+        # Groupings by other labels, built on request and kept until the next change
+        self._adhoc_groups: Dict[Tuple[str, ...], Dict[Tuple[str, ...], Dict[str, Set[str]]]] = {}
+        # Resolved fingerprints in the order they resolved, with the time
+        self._resolved: "OrderedDict[str, float]" = OrderedDict()
+        self._transitions: Deque[dict] = deque(maxlen=history)
+        self._last_snapshot: Optional[Sequence[dict]] = None
+
+    def apply_snapshot(self, alerts: Sequence[dict]) -> List[dict]:
+        """Make the active set match a full poll; returns the transitions it caused"""
+        if alerts is self._last_snapshot:
+            # The client hands back the same list when upstream answered 304
+            return []
+        self._last_snapshot = alerts
+        now = datetime.now().isoformat()
+        seen: Dict[str, dict] = {}
+        for alert in alerts:
+            seen[_fingerprint_of(alert)] = alert
+
+        transitions = []
+        for fp, alert in seen.items():
+            self._update(fp, alert, _status_of(alert), now, transitions)
+        for status in ACTIVE_STATUSES:
+            gone = [fp for fp in self._active(status) if fp not in seen]
+            for fp in gone:
+                self._update(fp, self._alerts[fp], "resolved", now, transitions)
+        self._expire()
+        return transitions
+
+    def ingest(self, alerts: Iterable[dict]) -> List[dict]:
+        """Apply pushed alerts, each firing or resolved; returns the transitions"""
+        now = datetime.now().isoformat()
+        transitions = []
+        for alert in alerts:
+            fp = _fingerprint_of(alert)
+            status = _status_of(alert)
+            if status == "resolved" and fp not in self._alerts:
+                continue
+            self._update(fp, alert, status, now, transitions)
+        self._expire()
+        return transitions
+
+    def get(self, fp: str) -> Optional[dict]:
+        return self._alerts.get(fp)
+
+    def alerts(self, status: Optional[str] = None, severity: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Alerts, most severe first; active ones unless status is given"""
+        statuses = (status,) if status else ACTIVE_STATUSES
+        result = []
+        for s in statuses:
+            for sev in self._severities(s) if severity is None else (severity,):
+                for fp in self._index.get((s, sev), ()):
+                    if limit is not None and len(result) >= limit:
+                        return result
+                    result.append(self._alerts[fp])
+        return result
+
+    def total(self, status: Optional[str] = None, severity: Optional[str] = None) -> int:
+        statuses = (status,) if status else ACTIVE_STATUSES
+        return sum(
+            len(fps) for (s, sev), fps in self._index.items()
+            if s in statuses and (severity is None or sev == severity)
+        )
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of alerts per status and severity"""
+        counts: Dict[str, Dict[str, int]] = {}
+        for (status, severity), fps in self._index.items():
+            if fps:
+                counts.setdefault(status, {})[severity] = len(fps)
+        return counts
+
+    def groups(self, by: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> List[dict]:
+        """Firing alerts grouped by label values, largest group first"""
+        by = tuple(by) if by else self.group_by
+        if by == self.group_by:
+            groups = self._groups
+        elif by in self._adhoc_groups:
+            groups = self._adhoc_groups[by]
+        else:
+            if len(self._adhoc_groups) >= 16:
+                self._adhoc_groups.clear()
+            groups = self._adhoc_groups[by] = {}
+            for sev in self._severities("firing"):
+                for fp in self._index.get(("firing", sev), ()):
+                    key = _group_key(self._alerts[fp], by)
+                    groups.setdefault(key, {}).setdefault(sev, set()).add(fp)
+        result = []
+        for key, by_severity in groups.items():
+            count = sum(len(fps) for fps in by_severity.values())
+            if count == 0:
+                continue
+            worst = min(by_severity, key=_severity_rank)
+            result.append({
+                "labels": dict(zip(by, key)),
+                "count": count,
+                "severities": {sev: len(fps) for sev, fps in by_severity.items() if fps},
+                "sample": self._alerts[next(iter(by_severity[worst]))],
+            })
+        result.sort(key=lambda g: (_severity_rank(min(g["severities"], key=_severity_rank)), -g["count"]))
+        return result if limit is None else result[:limit]
+
+    def transitions(self, limit: Optional[int] = None) -> List[dict]:
+        """Recent state changes, newest first"""
+        recent = list(reversed(self._transitions))
+        return recent if limit is None else recent[:limit]
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def _active(self, status: str) -> List[str]:
+        return [fp for sev in self._severities(status) for fp in self._index.get((status, sev), ())]
+
+    def _severities(self, status: str) -> List[str]:
+        present = [sev for (s, sev), fps in self._index.items() if s == status and fps]
+        return sorted(present, key=_severity_rank)
+
+    def _update(self, fp: str, alert: dict, status: str, now: str, transitions: List[dict]):
+        old = self._alerts.get(fp)
+        if old is not None and old["status"] == status:
+            return
+        self._adhoc_groups.clear()
+        if old is not None:
+            self._unindex(fp, old)
+            stored = {**old, "status": status, "updated_at": now}
+            if status != "resolved":
+                stored["starts_at"] = alert.get("starts_at") or old.get("starts_at")
+        else:
+            stored = {**alert, "id": fp, "status": status, "updated_at": now}
+        stored["resolved_at"] = now if status == "resolved" else None
+        self._alerts[fp] = stored
+        self._index_alert(fp, stored)
+        transition = {
+            "id": fp,
+            "name": stored.get("name"),
+            "severity": stored.get("severity"),
+            "from": old["status"] if old is not None else None,
+            "to": status,
+            "at": now,
+        }
+        self._transitions.append(transition)
+        transitions.append(transition)
+
+    def _index_alert(self, fp: str, alert: dict):
+        severity = alert.get("severity", "none")
+        self._index.setdefault((alert["status"], severity), set()).add(fp)
+        if alert["status"] == "firing":
+            key = _group_key(alert, self.group_by)
+            self._groups.setdefault(key, {}).setdefault(severity, set()).add(fp)
+        elif alert["status"] == "resolved":
+            self._resolved[fp] = time.monotonic()
+
+    def _unindex(self, fp: str, alert: dict):
+        severity = alert.get("severity", "none")
+        _discard(self._index, (alert["status"], severity), fp)
+        if alert["status"] == "firing":
+            key = _group_key(alert, self.group_by)
+            by_severity = self._groups.get(key)
+            if by_severity is not None:
+                _discard(by_severity, severity, fp)
+                if not by_severity:
+                    del self._groups[key]
+        elif alert["status"] == "resolved":
+            self._resolved.pop(fp, None)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.resolved_retention
+        while self._resolved:
+            fp, resolved_at = next(iter(self._resolved.items()))
+            if resolved_at > cutoff:
+                break
+            self._unindex(fp, self._alerts.pop(fp))
+
+
+def _fingerprint_of(alert: dict) -> str:
+    # Alertmanager already fingerprints the label set; reuse it when present
+    if alert.get("fingerprint"):
+        return alert["fingerprint"]
+    labels = alert.get("labels")
+    if labels:
+        return fingerprint(labels)
+    return alert.get("id") or fingerprint({"alertname": alert.get("name", "")})
+
+
+def _status_of(alert: dict) -> str:
+    # Alertmanager's "unprocessed" and "active" both count as firing
+    status = alert.get("status")
+    return status if status in ("suppressed", "resolved") else "firing"
+
+
+def _group_key(alert: dict, by: Tuple[str, ...]) -> Tuple[str, ...]:
+    labels = alert.get("labels") or {}
+    return tuple(str(labels.get(label, alert.get(label, ""))) for label in by)
+
+
+def _severity_rank(severity: str) -> int:
+    try:
+        return SEVERITY_ORDER.index(severity)
+    except ValueError:
+        return len(SEVERITY_ORDER)
+
+
+def _discard(index: dict, key, fp: str):
+    fps = index.get(key)
+    if fps is not None:
+        fps.discard(fp)
+        if not fps:
+            del index[key]
+
+
+# Global instance
+alert_store = AlertStore(
+    group_by=[label.strip() for label in os.getenv("ALERT_GROUP_BY", "alertname").split(",") if label.strip()],
+    resolved_retention=float(os.getenv("ALERT_RESOLVED_RETENTION_SECONDS", "3600")),
+)
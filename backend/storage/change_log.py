@@ -0,0 +1,41 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+class ChangeLog:
+    """Version counter plus the latest change of each recently written record.
+
+    Every write gets the next version. The log remembers, per record id,
+    the version of its last write and whether that write was a delete,
+    ordered by version, for the ``size`` most recently written records.
+    Once a record falls off, ``since`` can no longer answer for versions
+    before it and returns None; the caller has to resync in full.
+    """
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self.version = 0
+        self.floor = 0
+        self._entries: "OrderedDict[int, Tuple[int, bool]]" = OrderedDict()
+
+    def record(self, record_id: int, deleted: bool = False) -> int:
+        """Log a write to record_id and return its version"""
+        self.version += 1
+        self._entries[record_id] = (self.version, deleted)
+        self._entries.move_to_end(record_id)
+        if len(self._entries) > self.size:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.floor = evicted
+        return self.version
+
+    def since(self, version: int) -> Optional[Tuple[List[int], List[int]]]:
+        """Ids written and ids deleted after version, oldest first"""
+        if version < self.floor or version > self.version:
+            return None
+        written, deleted = [], []
+        for record_id in reversed(self._entries):
+            record_version, gone = self._entries[record_id]
+            if record_version <= version:
+                break
+            (deleted if gone else written).append(record_id)
+        return written[::-1], deleted[::-1]
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V", bound=Hashable)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Sort position of timestamps that do not parse
+UNPARSED_TIME = -(2 ** 63)
+
+
+class Interner(Generic[V]):
+    """Maps each distinct value to a small integer code and back"""
+
+    def __init__(self):
+        self.values: List[V] = []
+        self._codes: Dict[V, int] = {}
+
+    def code(self, value: V) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value: V) -> Optional[int]:
+        """Code of a value already seen, or None"""
+        return self._codes.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def encode_time(value: str) -> Tuple[int, bool]:
+    """Microseconds since the epoch for an ISO timestamp, and whether they format back to the same string.
+
+    Any timezone is dropped, so values order the way the naive local
+    timestamps the API writes compare as strings.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return UNPARSED_TIME, False
+    micros = (parsed.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    return micros, parsed.tzinfo is None and parsed.isoformat() == value
+
+
+def decode_time(micros: int) -> str:
+    return (_EPOCH + timedelta(0, 0, micros)).isoformat()
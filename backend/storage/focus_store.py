@@ -0,0 +1,240 @@
+from abc import ABC, abstractmethod
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from backend.models.focus_model import FocusSession, FocusStats
+from backend.storage.compact import decode_time, encode_time
+
+# Task id column value of sessions not tied to a task
+NO_TASK = -(2 ** 63)
+
+
+class _Totals:
+    """Running session count, minutes and completions for one bucket"""
+
+    __slots__ = ("sessions", "minutes", "completed")
+
+    def __init__(self):
+        self.sessions = 0
+        self.minutes = 0
+        self.completed = 0
+
+    def apply(self, session: FocusSession, sign: int):
+        self.sessions += sign
+        self.minutes += sign * session.duration
+        self.completed += sign * int(session.completed)
+
+    def merge(self, other: "_Totals"):
+        self.sessions += other.sessions
+        self.minutes += other.minutes
+        self.completed += other.completed
+
+    def to_stats(self) -> FocusStats:
+        return FocusStats(
+            total_sessions=self.sessions,
+            total_minutes=self.minutes,
+            completed_sessions=self.completed,
+            avg_session_minutes=self.minutes / self.sessions if self.sessions > 0 else 0,
+        )
+
+
+class FocusStatsAccumulator:
+    """Incrementally maintained focus statistics.
+
+    Sessions are folded into an overall total, per-day and per-task buckets
+    and a 24-slot hour-of-day histogram as they are added or removed, so
+    every stats query is answered without touching the session history.
+    """
+
+    def __init__(self):
+        self.total = _Totals()
+        self.by_day: Dict[date, _Totals] = {}
+        self.by_task: Dict[int, _Totals] = {}
+        self.by_hour: List[_Totals] = [_Totals() for _ in range(24)]
+
+    def add(self, session: FocusSession):
+        self._apply(session, 1)
+
+    def remove(self, session: FocusSession):
+        self._apply(session, -1)
+
+    def overall(self) -> FocusStats:
+        return self.total.to_stats()
+
+    def last_days(self, days: int, today: Optional[date] = None) -> FocusStats:
+        """Stats for the last ``days`` calendar days, including today"""
+        today = today or date.today()
+        window = _Totals()
+        for offset in range(days):
+            bucket = self.by_day.get(today - timedelta(days=offset))
+            if bucket is not None:
+                window.merge(bucket)
+        return window.to_stats()
+
+    def for_task(self, task_id: int) -> FocusStats:
+        return self.by_task.get(task_id, _Totals()).to_stats()
+
+    def hourly(self) -> List[dict]:
+        return [
+            {"hour": hour, "sessions": t.sessions, "minutes": t.minutes}
+            for hour, t in enumerate(self.by_hour)
+        ]
+
+    def _apply(self, session: FocusSession, sign: int):
+        started = datetime.fromisoformat(session.created_at)
+        self.total.apply(session, sign)
+        self.by_day.setdefault(started.date(), _Totals()).apply(session, sign)
+        self.by_hour[started.hour].apply(session, sign)
+        if session.task_id is not None:
+            self.by_task.setdefault(session.task_id, _Totals()).apply(session, sign)
+
+
+class FocusRepository(ABC):
+    """Storage interface used by the focus router"""
+
+    @abstractmethod
+    async def create(self, data: dict) -> FocusSession:
+        """Insert a new session under a newly allocated id"""
+
+    @abstractmethod
+    async def get(self, session_id: int) -> Optional[FocusSession]:
+        """Return a session by id, or None"""
+
+    @abstractmethod
+    async def replace(self, session: FocusSession) -> FocusSession:
+        """Overwrite an existing session, updating the aggregates"""
+
+    @abstractmethod
+    async def all(self) -> List[FocusSession]:
+        """Return every session in id order"""
+
+    @abstractmethod
+    async def stats(self, days: Optional[int] = None, task_id: Optional[int] = None, today: Optional[date] = None) -> FocusStats:
+        """Aggregate stats, overall, for the ``days`` days up to ``today`` (default: the current date) or for one task"""
+
+    @abstractmethod
+    async def stats_between(self, start: str, end: str) -> FocusStats:
+        """Stats of the sessions started at or after ``start`` and before ``end`` (server time ISO timestamps)"""
+
+    @abstractmethod
+    async def hourly(self) -> List[dict]:
+        """Sessions and minutes per hour of day"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored sessions"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """Version of the latest write"""
+
+    async def close(self):
+        """Flush pending writes and release resources"""
+
+
+class InMemoryFocusRepository(FocusRepository):
+    """Column-oriented store of one user's focus sessions that keeps their stats up to date.
+
+    Session ``n`` is row ``n - 1`` of parallel arrays of durations, task
+    ids, completion flags and start times in epoch microseconds; the
+    rarely set notes live in a dict. Session models are only built for
+    the rows a call returns.
+    """
+
+    def __init__(self, user_id: Optional[str] = None):
+        self.user_id = user_id
+        self._duration = array("q")
+        self._task_id = array("q")
+        self._completed = array("b")
+        self._created = array("q")
+        self._notes: Dict[int, str] = {}
+        # created_at of sessions whose timestamp would not format back unchanged
+        self._raw_times: Dict[int, str] = {}
+        self._version = 0
+        self.accumulator = FocusStatsAccumulator()
+
+    async def create(self, data: dict) -> FocusSession:
+        session = FocusSession(id=len(self._created) + 1, **{**data, "user_id": self.user_id})
+        for column, value in zip(self._columns(), self._encode(session)):
+            column.append(value)
+        self.accumulator.add(session)
+        self._version += 1
+        return session
+
+    async def get(self, session_id: int) -> Optional[FocusSession]:
+        return self._session(session_id) if 0 < session_id <= len(self._created) else None
+
+    async def replace(self, session: FocusSession) -> FocusSession:
+        old = await self.get(session.id)
+        if old is None:
+            raise KeyError(f"Focus session {session.id} not found")
+        session = session.model_copy(update={"user_id": self.user_id})
+        self.accumulator.remove(old)
+        for column, value in zip(self._columns(), self._encode(session)):
+            column[session.id - 1] = value
+        self.accumulator.add(session)
+        self._version += 1
+        return session
+
+    async def all(self) -> List[FocusSession]:
+        return [self._session(i) for i in range(1, len(self._created) + 1)]
+
+    async def stats(self, days: Optional[int] = None, task_id: Optional[int] = None, today: Optional[date] = None) -> FocusStats:
+        if task_id is not None:
+            return self.accumulator.for_task(task_id)
+        if days is not None:
+            return self.accumulator.last_days(days, today)
+        return self.accumulator.overall()
+
+    async def stats_between(self, start: str, end: str) -> FocusStats:
+        # The window need not line up with the day buckets, so scan the start time column
+        low, high = encode_time(start)[0], encode_time(end)[0]
+        window = _Totals()
+        for row, created in enumerate(self._created):
+            if low <= created < high:
+                window.sessions += 1
+                window.minutes += self._duration[row]
+                window.completed += self._completed[row]
+        return window.to_stats()
+
+    async def hourly(self) -> List[dict]:
+        return self.accumulator.hourly()
+
+    async def count(self) -> int:
+        return len(self._created)
+
+    async def version(self) -> int:
+        return self._version
+
+    def _columns(self) -> tuple:
+        return self._duration, self._task_id, self._completed, self._created
+
+    def _encode(self, session: FocusSession) -> tuple:
+        """Array values of a session, in the order of ``_columns``; notes and odd timestamps go to their dicts"""
+        created, exact = encode_time(session.created_at)
+        if exact:
+            self._raw_times.pop(session.id, None)
+        else:
+            self._raw_times[session.id] = session.created_at
+        if session.notes is not None:
+            self._notes[session.id] = session.notes
+        else:
+            self._notes.pop(session.id, None)
+        task_id = NO_TASK if session.task_id is None else session.task_id
+        return session.duration, task_id, int(session.completed), created
+
+    def _session(self, session_id: int) -> FocusSession:
+        """Build the model for a stored session"""
+        row = session_id - 1
+        task_id = self._task_id[row]
+        created_at = self._raw_times.get(session_id)
+        return FocusSession(
+            id=session_id,
+            duration=self._duration[row],
+            task_id=None if task_id == NO_TASK else task_id,
+            completed=bool(self._completed[row]),
+            notes=self._notes.get(session_id),
+            user_id=self.user_id,
+            created_at=created_at if created_at is not None else decode_time(self._created[row]),
+        )
@@ -0,0 +1,179 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import count
+from typing import Dict, Iterator, List, Optional
+
+from backend.models.integration_model import Integration
+from backend.storage.change_log import ChangeLog
+
+# Integrations every installation starts with, disabled until configured
+DEFAULT_INTEGRATIONS = [
+    {"name": "Grafana", "type": "grafana"},
+    {"name": "Jira", "type": "jira"},
+    {"name": "Slack", "type": "slack"},
+    {"name": "Webhook", "type": "webhook"},
+]
+
+
+def default_integration_rows() -> List[dict]:
+    now = datetime.now().isoformat()
+    return [
+        {**default, "enabled": False, "config": {}, "user_id": None, "created_at": now, "updated_at": now}
+        for default in DEFAULT_INTEGRATIONS
+    ]
+
+
+class IntegrationIndex(ABC):
+    """Every tenant's integrations by id, read by the jobs that serve all users.
+
+    Integrations are only written through their tenant's repository.
+    """
+
+    @abstractmethod
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        """Return an integration by id whichever tenant owns it, or None"""
+
+    @abstractmethod
+    async def all(self) -> List[Integration]:
+        """Return every tenant's integrations in id order"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of integrations stored across tenants"""
+
+    @abstractmethod
+    async def claim_report(self, integration_id: int, day: str) -> bool:
+        """Record an integration's report for ``day`` (ISO date) as sent.
+
+        Returns False if it already was, by this or any other process, so
+        only one of the workers sharing the store sends it.
+        """
+
+    async def close(self):
+        """Release resources"""
+
+
+class IntegrationRepository(ABC):
+    """Storage interface used by the integrations router"""
+
+    @abstractmethod
+    async def create(self, data: dict) -> Integration:
+        """Insert a new integration under a newly allocated id"""
+
+    @abstractmethod
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        """Return an integration by id, or None"""
+
+    @abstractmethod
+    async def replace(self, integration: Integration) -> Integration:
+        """Overwrite an existing integration with the same id"""
+
+    @abstractmethod
+    async def delete(self, integration_id: int) -> Optional[Integration]:
+        """Remove an integration, returning it or None if it did not exist"""
+
+    @abstractmethod
+    async def all(self) -> List[Integration]:
+        """Return every integration in id order"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored integrations"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """Version of the latest write, deletes included"""
+
+    async def seed_defaults(self) -> bool:
+        """Give a tenant that has never stored an integration the default ones"""
+        if await self.version() != 0:
+            return False
+        for row in default_integration_rows():
+            await self.create(row)
+        return True
+
+    async def close(self):
+        """Flush pending writes and release resources"""
+
+
+class InMemoryIntegrationRepository(IntegrationRepository):
+    """Dict-backed store of one user's integrations.
+
+    Ids come from ``ids``, shared by every tenant's repository, so an id
+    names one integration across tenants as webhook URLs require. Each
+    integration is also kept in ``index``, shared the same way, which
+    ``InMemoryIntegrationIndex`` reads to find it without knowing the owner.
+    """
+
+    def __init__(
+        self,
+        user_id: Optional[str] = None,
+        ids: Optional[Iterator[int]] = None,
+        index: Optional[Dict[int, Integration]] = None,
+    ):
+        self.user_id = user_id
+        self._ids = ids if ids is not None else count(1)
+        self._index = index if index is not None else {}
+        self._integrations: Dict[int, Integration] = {}
+        self._changes = ChangeLog()
+
+    async def create(self, data: dict) -> Integration:
+        return self._insert(data)
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        return self._integrations.get(integration_id)
+
+    async def replace(self, integration: Integration) -> Integration:
+        if integration.id not in self._integrations:
+            raise KeyError(f"Integration {integration.id} not found")
+        integration = integration.model_copy(update={"user_id": self.user_id, "version": self._changes.record(integration.id)})
+        self._integrations[integration.id] = self._index[integration.id] = integration
+        return integration
+
+    async def delete(self, integration_id: int) -> Optional[Integration]:
+        integration = self._integrations.pop(integration_id, None)
+        if integration is not None:
+            self._index.pop(integration_id, None)
+            self._changes.record(integration_id, deleted=True)
+        return integration
+
+    async def all(self) -> List[Integration]:
+        return list(self._integrations.values())
+
+    async def count(self) -> int:
+        return len(self._integrations)
+
+    async def version(self) -> int:
+        return self._changes.version
+
+    def _insert(self, data: dict) -> Integration:
+        integration_id = next(self._ids)
+        integration = Integration(
+            id=integration_id, **{**data, "user_id": self.user_id, "version": self._changes.record(integration_id)}
+        )
+        self._integrations[integration.id] = self._index[integration.id] = integration
+        return integration
+
+
+class InMemoryIntegrationIndex(IntegrationIndex):
+    """View of every tenant's in-memory integrations, by id"""
+
+    def __init__(self, index: Dict[int, Integration]):
+        self._index = index
+        # integration id -> day of the last report sent
+        self._reported: Dict[int, str] = {}
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        return self._index.get(integration_id)
+
+    async def all(self) -> List[Integration]:
+        return [self._index[i] for i in sorted(self._index)]
+
+    async def count(self) -> int:
+        return len(self._index)
+
+    async def claim_report(self, integration_id: int, day: str) -> bool:
+        if self._reported.get(integration_id, "") >= day:
+            return False
+        self._reported[integration_id] = day
+        return True
@@ -0,0 +1,341 @@
+import asyncio
+import bisect
+import heapq
+import itertools
+import math
+import re
+import sys
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.models.task_model import Task
+
+TOKEN = re.compile(r"\w+")
+
+# BM25 term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Sizes of empty objects, for memory estimates
+_ARRAY_BYTES = sys.getsizeof(array("I"))
+_STR_BYTES = sys.getsizeof("")
+_TUPLE_BYTES = sys.getsizeof(())
+_INT_BYTES = sys.getsizeof(2 ** 40)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class TaskSearchIndex:
+    """Inverted index over one user's task titles, descriptions and tags.
+
+    Each indexed task takes a slot holding its terms and tags, and each
+    term's postings are an array of slots. An update gives the task a new
+    slot and a delete leaves its slot dead, so writes only append; a term's
+    postings are compacted once more than half of them are dead, and all
+    slots are renumbered once dead ones outnumber live ones. Prefixes are
+    looked up by bisecting a sorted vocabulary; new terms wait in a small
+    sorted side list that is merged in when it outgrows ``merge_threshold``.
+
+    A query matches tasks containing every term, the last one as a prefix,
+    ranked by BM25. Candidates come from the rarest term's postings, and
+    the other terms are checked against each candidate's own terms. When
+    that term has more than ``max_scan`` postings only the newest are
+    read, and when a prefix expands to more than ``max_expansions`` terms
+    only the first are used; either way the result is marked not
+    exhaustive.
+    """
+
+    def __init__(self, max_scan: int = 1000, max_expansions: int = 50, merge_threshold: int = 1024):
+        self.max_scan = max_scan
+        self.max_expansions = max_expansions
+        self.merge_threshold = merge_threshold
+        # Store version the index reflects
+        self.version = 0
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, array] = {}
+        self._df: Dict[str, int] = {}
+        self._vocab: List[str] = []
+        self._new_terms: List[str] = []
+        self._slot_task = array("q")
+        self._slot_terms: List[Optional[Tuple[str, ...]]] = []
+        self._slot_tags: List[Tuple[str, ...]] = []
+        self._slot_of: Dict[int, int] = {}
+        self._tagsets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._total_length = 0
+        self._posting_count = 0
+        self._term_chars = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def upsert(self, task: Task):
+        """Index a task, replacing what was indexed for it before"""
+        self.remove(task.id)
+        self._add(task.id, *self._entry(task))
+
+    def remove(self, task_id: int):
+        slot = self._slot_of.pop(task_id, None)
+        if slot is None:
+            return
+        terms = self._slot_terms[slot]
+        self._slot_task[slot] = -1
+        self._slot_terms[slot] = None
+        self._slot_tags[slot] = ()
+        self._total_length -= len(terms)
+        for term in set(terms):
+            df = self._df[term] - 1
+            postings = self._postings[term]
+            if df == 0:
+                del self._df[term], self._postings[term]
+                self._posting_count -= len(postings)
+                self._term_chars -= len(term)
+            else:
+                self._df[term] = df
+                if len(postings) > 2 * df + 8:
+                    self._postings[term] = array("I", (s for s in postings if self._slot_task[s] != -1))
+                    self._posting_count -= len(postings) - df
+        if len(self._slot_task) > 2 * len(self._slot_of) + 1024:
+            self._renumber()
+
+    def apply(self, kind: str, task: Task):
+        """Apply a write made through the API; the index version only moves if no write was missed"""
+        if kind == "delete":
+            self.remove(task.id)
+            return
+        self.upsert(task)
+        if task.version == self.version + 1:
+            self.version = task.version
+
+    def rebuild(self, tasks: Iterable[Task], version: int):
+        self._reset()
+        for task in tasks:
+            self.remove(task.id)
+            self._add(task.id, *self._entry(task), new_terms=False)
+        self._vocab = sorted(self._postings)
+        self._new_terms = []
+        self.version = version
+
+    async def sync(self, store):
+        """Catch up with writes to ``store`` from its change log, or rebuild when the log is too short"""
+        async with self._lock:
+            version = await store.version()
+            if version == self.version:
+                return
+            # A first load is cheaper as one rebuild than as a stream of upserts
+            changes = await store.changes(self.version) if self.version else None
+            if changes is None:
+                self.rebuild(await store.all(), version)
+                return
+            upserts, deleted, latest = changes
+            for task in upserts:
+                self.upsert(task)
+            for task_id in deleted:
+                self.remove(task_id)
+            self.version = latest
+
+    def search(self, query: str, limit: int = 20, tags: Optional[Sequence[str]] = None, facets: int = 10) -> dict:
+        """Ranked task ids and scores plus tag facet counts for a type-ahead query"""
+        tokens = tokenize(query)
+        empty = {"total": 0, "exhaustive": True, "hits": [], "facets": []}
+        if not tokens or not self._slot_of:
+            return empty
+        # Each query term stands for the index terms it matches
+        clauses: List[List[str]] = []
+        exhaustive = True
+        for n, token in enumerate(tokens):
+            if n == len(tokens) - 1 and not query[-1].isspace():
+                terms, complete = self._expand(token)
+                exhaustive = exhaustive and complete
+            else:
+                terms = [token] if token in self._postings else []
+            if not terms:
+                return empty
+            clauses.append(terms)
+
+        docs = len(self._slot_of)
+        avg_length = self._total_length / docs or 1.0
+        idf = {}
+        for terms in clauses:
+            for term in terms:
+                df = self._df[term]
+                idf[term] = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+        driver = min(clauses, key=lambda terms: sum(self._df[t] for t in terms))
+        required = set(tags) if tags else None
+
+        # Candidates are the newest postings of the driver's terms, shared out by document frequency
+        if len(driver) == 1:
+            postings = self._postings[driver[0]]
+            candidates = postings[-self.max_scan:]
+            exhaustive = exhaustive and len(postings) <= self.max_scan
+        else:
+            candidates = set()
+            budget = self.max_scan / sum(len(self._postings[t]) for t in driver)
+            for term in driver:
+                postings = self._postings[term]
+                keep = max(1, int(len(postings) * budget))
+                candidates.update(postings[-keep:])
+                exhaustive = exhaustive and keep >= len(postings)
+
+        scoring = [(terms[0], None) if len(terms) == 1 else (None, set(terms)) for terms in clauses]
+        top: List[Tuple[float, int]] = []
+        matched_tags = []
+        total = 0
+        for slot in candidates:
+            terms = self._slot_terms[slot]
+            if terms is None:
+                continue
+            if required is not None and not required.issubset(self._slot_tags[slot]):
+                continue
+            norm = K1 * (1 - B + B * len(terms) / avg_length)
+            score = 0.0
+            for term, expansions in scoring:
+                if term is not None:
+                    freq = terms.count(term)
+                    best = idf[term] * freq * (K1 + 1) / (freq + norm) if freq else 0.0
+                else:
+                    best = 0.0
+                    for t in expansions.intersection(terms):
+                        freq = terms.count(t)
+                        best = max(best, idf[t] * freq * (K1 + 1) / (freq + norm))
+                if not best:
+                    break
+                score += best
+            else:
+                total += 1
+                matched_tags.append(self._slot_tags[slot])
+                if len(top) < limit:
+                    heapq.heappush(top, (score, slot))
+                elif (score, slot) > top[0]:
+                    heapq.heapreplace(top, (score, slot))
+
+        counts = Counter(itertools.chain.from_iterable(matched_tags))
+        top.sort(reverse=True)
+        return {
+            "total": total,
+            "exhaustive": exhaustive,
+            "hits": [(self._slot_task[slot], score) for score, slot in top],
+            "facets": [{"tag": tag, "count": count} for tag, count in counts.most_common(facets)],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "tasks": len(self._slot_of),
+            "terms": len(self._postings),
+            "postings": self._posting_count,
+            "slots": len(self._slot_task),
+            "version": self.version,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+    def memory_bytes(self) -> int:
+        """Estimated bytes held by the index, from running counters (strings shared with tasks are counted)"""
+        live = len(self._slot_of)
+        return (
+            sys.getsizeof(self._postings) + sys.getsizeof(self._df)
+            + len(self._postings) * (_ARRAY_BYTES + _STR_BYTES + _INT_BYTES) + self._term_chars
+            + 4 * self._posting_count
+            + sys.getsizeof(self._vocab) + sys.getsizeof(self._new_terms)
+            + self._slot_task.buffer_info()[1] * self._slot_task.itemsize
+            + sys.getsizeof(self._slot_terms) + sys.getsizeof(self._slot_tags)
+            + live * _TUPLE_BYTES + 8 * self._total_length
+            + sys.getsizeof(self._slot_of) + live * _INT_BYTES
+            + sum(_TUPLE_BYTES + 8 * len(t) for t in self._tagsets)
+        )
+
+    def _entry(self, task: Task) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        terms = tokenize(task.title) + tokenize(task.description)
+        for tag in task.tags:
+            terms.extend(tokenize(tag))
+        tags = tuple(task.tags)
+        return tuple(sys.intern(t) for t in terms), self._tagsets.setdefault(tags, tags)
+
+    def _add(self, task_id: int, terms: Tuple[str, ...], tags: Tuple[str, ...], new_terms: bool = True):
+        """Give a task the next slot; with ``new_terms`` false the caller rebuilds the vocabulary itself"""
+        slot = len(self._slot_task)
+        self._slot_task.append(task_id)
+        self._slot_terms.append(terms)
+        self._slot_tags.append(tags)
+        self._slot_of[task_id] = slot
+        self._total_length += len(terms)
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+                self._df[term] = 0
+                self._term_chars += len(term)
+                if new_terms:
+                    self._new_term(term)
+            postings.append(slot)
+            self._df[term] += 1
+            self._posting_count += 1
+
+    def _new_term(self, term: str):
+        bisect.insort(self._new_terms, term)
+        if len(self._new_terms) > self.merge_threshold:
+            # Both lists are sorted runs, which sorted() merges in linear time
+            self._vocab = sorted(self._vocab + self._new_terms)
+            self._new_terms = []
+
+    def _expand(self, prefix: str) -> Tuple[List[str], bool]:
+        """Live terms starting with ``prefix``, and whether that is all of them"""
+        terms = set()
+        complete = True
+        for vocab in (self._vocab, self._new_terms):
+            i = bisect.bisect_left(vocab, prefix)
+            while i < len(vocab) and vocab[i].startswith(prefix):
+                if vocab[i] in self._postings:
+                    if len(terms) == self.max_expansions:
+                        complete = False
+                        break
+                    terms.add(vocab[i])
+                i += 1
+        return sorted(terms), complete
+
+    def _renumber(self):
+        """Drop dead slots, keeping live tasks in write order"""
+        live = sorted((slot, task_id) for task_id, slot in self._slot_of.items())
+        entries = [(task_id, self._slot_terms[slot], self._slot_tags[slot]) for slot, task_id in live]
+        vocab, new_terms = self._vocab, self._new_terms
+        self._reset()
+        self._vocab, self._new_terms = vocab, new_terms
+        for task_id, terms, tags in entries:
+            self._tagsets.setdefault(tags, tags)
+            self._add(task_id, terms, tags, new_terms=False)
+        self._vocab = [t for t in self._vocab if t in self._postings]
+
+
+class SearchIndexes:
+    """Each user's TaskSearchIndex, the ``max_tenants`` most recently searched kept"""
+
+    def __init__(self, max_tenants: int = 100, **options):
+        self.max_tenants = max_tenants
+        self.options = options
+        self._indexes: "OrderedDict[Optional[str], TaskSearchIndex]" = OrderedDict()
+        self.evicted = 0
+
+    def get(self, user_id: Optional[str]) -> TaskSearchIndex:
+        index = self._indexes.get(user_id)
+        if index is None:
+            index = self._indexes[user_id] = TaskSearchIndex(**self.options)
+            while len(self._indexes) > self.max_tenants:
+                self._indexes.popitem(last=False)
+                self.evicted += 1
+        self._indexes.move_to_end(user_id)
+        return index
+
+    def peek(self, user_id: Optional[str]) -> Optional[TaskSearchIndex]:
+        return self._indexes.get(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self._indexes),
+            "evicted": self.evicted,
+            "tasks": sum(len(i) for i in self._indexes.values()),
+            "memory_bytes": sum(i.memory_bytes() for i in self._indexes.values()),
+        }
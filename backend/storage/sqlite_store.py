@@ -0,0 +1,765 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from backend.models.focus_model import FocusSession, FocusStats
+from backend.models.integration_model import Integration
+from backend.models.task_model import Task
+from backend.storage.focus_store import FocusRepository
+from backend.storage.integration_store import IntegrationIndex, IntegrationRepository
+from backend.storage.task_store import PRIORITY_RANK, BulkOp, TaskRepository, parse_sort
+
+# Rows belong to the user in user_id; '' is the anonymous tenant
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    category TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    user_id TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS task_tags (
+    user_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, tag, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags (task_id);
+
+CREATE TABLE IF NOT EXISTS focus_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    duration INTEGER NOT NULL,
+    task_id INTEGER,
+    completed INTEGER NOT NULL,
+    notes TEXT,
+    created_at TEXT NOT NULL,
+    user_id TEXT NOT NULL DEFAULT ''
+);
+
+-- Running aggregates per user and bucket: kind is total, day, hour or task
+CREATE TABLE IF NOT EXISTS focus_rollups (
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    minutes INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    PRIMARY KEY (user_id, kind, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS integrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    config TEXT NOT NULL,
+    user_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Day of the last scheduled report sent per integration, claimed before
+-- sending so one worker sends it
+CREATE TABLE IF NOT EXISTS reports_sent (
+    integration_id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL
+);
+
+-- Latest write version per table and user (name is table or table:user);
+-- changes at or below floor have had their tombstones pruned
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    floor INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tombstones (
+    entity TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (entity, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tombstones_version ON tombstones (entity, version);
+"""
+
+# Columns added after the first release, created on databases that predate them
+MIGRATIONS = [
+    ("tasks", "version", "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+    ("integrations", "version", "ALTER TABLE integrations ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+    ("tasks", "user_id", "ALTER TABLE tasks ADD COLUMN user_id TEXT NOT NULL DEFAULT ''"),
+    ("focus_sessions", "user_id", "ALTER TABLE focus_sessions ADD COLUMN user_id TEXT NOT NULL DEFAULT ''"),
+]
+
+# Derived tables whose key gained user_id: dropped, recreated by SCHEMA and
+# refilled from the rows they summarize
+REBUILDS = [
+    ("task_tags", "INSERT OR IGNORE INTO task_tags (user_id, tag, task_id) "
+                  "SELECT tasks.user_id, tag.value, tasks.id FROM tasks, json_each(tasks.tags) AS tag"),
+    ("focus_rollups", """
+        INSERT INTO focus_rollups (user_id, kind, bucket, sessions, minutes, completed)
+        SELECT user_id, 'total', '', COUNT(*), SUM(duration), SUM(completed) FROM focus_sessions GROUP BY 1
+        UNION ALL
+        SELECT user_id, 'day', substr(created_at, 1, 10), COUNT(*), SUM(duration), SUM(completed) FROM focus_sessions GROUP BY 1, 3
+        UNION ALL
+        SELECT user_id, 'hour', CAST(CAST(substr(created_at, 12, 2) AS INTEGER) AS TEXT), COUNT(*), SUM(duration), SUM(completed)
+        FROM focus_sessions GROUP BY 1, 3
+        UNION ALL
+        SELECT user_id, 'task', CAST(task_id AS TEXT), COUNT(*), SUM(duration), SUM(completed)
+        FROM focus_sessions WHERE task_id IS NOT NULL GROUP BY 1, 3
+    """),
+]
+
+INDEXES = """
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_priority;
+DROP INDEX IF EXISTS idx_tasks_category;
+DROP INDEX IF EXISTS idx_tasks_updated_at;
+DROP INDEX IF EXISTS idx_tasks_version;
+CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_category ON tasks (user_id, category);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_updated_at ON tasks (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_version ON tasks (user_id, version);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user ON focus_sessions (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user_created_at ON focus_sessions (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_integrations_user ON integrations (user_id, id);
+"""
+
+# Sort fields that map to a different column
+SORT_COLUMNS = {"priority": "priority_rank"}
+
+T = TypeVar("T")
+
+
+class SQLiteDatabase:
+    """One SQLite connection per process, in WAL mode, with group commit.
+
+    Every statement runs on one dedicated thread, so the event loop never
+    waits on SQLite. A write is a function of the connection, and ``write``
+    returns its result only once it has been committed. Writes queued while
+    a commit is in progress go into the next transaction together, up to
+    ``commit_batch`` of them, so a burst of writes shares one fsync without
+    acknowledging anything a crash could lose. Each write runs in its own
+    savepoint so a failing one only undoes itself.
+
+    Reads run between transactions and see only committed writes, which
+    every worker process sees at the same time.
+    """
+
+    def __init__(self, path: str, commit_batch: int = 256, change_log_size: int = 10000):
+        self.path = path
+        self.change_log_size = change_log_size
+        self.commit_batch = commit_batch
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode a commit survives the process crashing; only losing
+        # power can undo the last few
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+        for table, column, ddl in MIGRATIONS:
+            if column not in self._columns(table):
+                self.conn.execute(ddl)
+        for table, fill in REBUILDS:
+            if "user_id" not in self._columns(table):
+                self.conn.executescript(f"BEGIN; DROP TABLE {table}; {SCHEMA} {fill}; COMMIT;")
+        # Integrations written before tenants belong to the anonymous one
+        self.conn.execute("UPDATE integrations SET user_id = '' WHERE user_id IS NULL")
+        for table, column, _ in MIGRATIONS:
+            if column == "version":
+                self._backfill_versions(table)
+        self.conn.executescript(INDEXES)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._lock = threading.Lock()
+        self._queued: List[Tuple[Callable[[sqlite3.Connection], Any], asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._committing = False
+
+    async def read(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._fetch, sql, params)
+
+    async def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``fn(conn)`` as one atomic write and return its result once committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._queued.append((fn, loop, future))
+            start = not self._committing
+            self._committing = True
+        if start:
+            self._executor.submit(self._commit_queued)
+        return await future
+
+    def _fetch(self, sql: str, params: Sequence[Any]) -> List[sqlite3.Row]:
+        return self.conn.execute(sql, params).fetchall()
+
+    def _commit_queued(self):
+        with self._lock:
+            batch, self._queued = self._queued[:self.commit_batch], self._queued[self.commit_batch:]
+        outcomes = []
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for fn, _, _ in batch:
+                self.conn.execute("SAVEPOINT write_op")
+                try:
+                    outcomes.append((fn(self.conn), None))
+                except Exception as e:
+                    self.conn.execute("ROLLBACK TO write_op")
+                    outcomes.append((None, e))
+                self.conn.execute("RELEASE write_op")
+            self.conn.execute("COMMIT")
+        except Exception as e:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            outcomes = [(None, e)] * len(batch)
+        for (_, loop, future), (result, error) in zip(batch, outcomes):
+            loop.call_soon_threadsafe(_settle, future, result, error)
+
+        with self._lock:
+            self._committing = bool(self._queued)
+        if self._committing:
+            # Behind any reads that queued up during this commit
+            try:
+                self._executor.submit(self._commit_queued)
+            except RuntimeError:
+                # Shutting down
+                self._commit_queued()
+
+    def _backfill_versions(self, table: str):
+        """Give rows written before versions existed one each from their tenant's sequence.
+
+        Every write stores a version of at least 1, so only those rows are
+        at 0, and left there ``changes(since=0)`` would never return them.
+        """
+        rows = self.conn.execute(f"SELECT id, user_id FROM {table} WHERE version = 0 ORDER BY id").fetchall()
+        if not rows:
+            return
+        self.conn.execute("BEGIN")
+        for row in rows:
+            version = next_version(self.conn, versions_name(table, row["user_id"] or None))
+            self.conn.execute(f"UPDATE {table} SET version = ? WHERE id = ?", (version, row["id"]))
+        self.conn.execute("COMMIT")
+
+    def _columns(self, table: str) -> set:
+        return {r["name"] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+
+    async def current_version(self, name: str) -> Tuple[int, int]:
+        """(version, floor) of a table's change log"""
+        rows = await self.read("SELECT version, floor FROM versions WHERE name = ?", (name,))
+        return (rows[0]["version"], rows[0]["floor"]) if rows else (0, 0)
+
+    def close(self):
+        """Finish queued writes and close the connection"""
+        self._executor.shutdown(wait=True)
+        self.conn.close()
+
+
+def _settle(future: asyncio.Future, result: Any, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SQLiteTaskRepository(TaskRepository):
+    """One user's tasks in SQLite; tags live in an indexed side table"""
+
+    def __init__(self, db: SQLiteDatabase, user_id: Optional[str] = None):
+        self.db = db
+        self.owner = user_id or ""
+        self.versions = versions_name("tasks", user_id)
+
+    async def create(self, data: dict) -> Task:
+        return await self.db.write(lambda conn: _insert_task(conn, self.owner, self.versions, data))
+
+    async def get(self, task_id: int) -> Optional[Task]:
+        rows = await self.db.read("SELECT * FROM tasks WHERE id = ? AND user_id = ?", (task_id, self.owner))
+        return _row_to_task(rows[0]) if rows else None
+
+    async def replace(self, task: Task) -> Task:
+        return await self.db.write(lambda conn: _update_task(conn, self.owner, self.versions, task))
+
+    async def delete(self, task_id: int) -> Optional[Task]:
+        def delete(conn: sqlite3.Connection) -> Optional[Task]:
+            try:
+                return _delete_task(conn, self.owner, self.versions, task_id, self.db.change_log_size)
+            except KeyError:
+                return None
+
+        return await self.db.write(delete)
+
+    async def get_many(self, task_ids: Iterable[int]) -> Dict[int, Task]:
+        ids = list(set(task_ids))
+        found = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            for row in await self.db.read(f"SELECT * FROM tasks WHERE user_id = ? AND id IN ({marks})", [self.owner, *chunk]):
+                found[row["id"]] = _row_to_task(row)
+        return found
+
+    async def bulk_write(self, ops: Sequence[BulkOp]) -> List[Task]:
+        apply = {
+            "create": lambda conn, data: _insert_task(conn, self.owner, self.versions, data),
+            "replace": lambda conn, task: _update_task(conn, self.owner, self.versions, task),
+            "delete": lambda conn, task_id: _delete_task(conn, self.owner, self.versions, task_id, self.db.change_log_size),
+        }
+        # One savepoint: a KeyError from any op rolls back all of them
+        return await self.db.write(lambda conn: [apply[kind](conn, arg) for kind, arg in ops])
+
+    async def all(self) -> List[Task]:
+        rows = await self.db.read("SELECT * FROM tasks WHERE user_id = ? ORDER BY id", (self.owner,))
+        return [_row_to_task(r) for r in rows]
+
+    async def count(self) -> int:
+        return (await self.db.read("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (self.owner,)))[0][0]
+
+    async def version(self) -> int:
+        return (await self.db.current_version(self.versions))[0]
+
+    async def changes(self, since: int) -> Optional[Tuple[List[Task], List[int], int]]:
+        version, floor = await self.db.current_version(self.versions)
+        if since < floor or since > version:
+            return None
+        rows = await self.db.read("SELECT * FROM tasks WHERE user_id = ? AND version > ? ORDER BY version", (self.owner, since))
+        deleted = await self.db.read(
+            "SELECT id FROM tombstones WHERE entity = ? AND version > ? ORDER BY version", (self.versions, since)
+        )
+        return [_row_to_task(r) for r in rows], [r["id"] for r in deleted], version
+
+    async def query(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        match_all_tags: bool = False,
+        updated_since: Optional[str] = None,
+        sort: Sequence[str] = ("id",),
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Task], Optional[List[Any]]]:
+        fields = parse_sort(sort)
+        where, params = ["user_id = ?"], [self.owner]
+        for column, value in (("status", status), ("priority", priority), ("category", category)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if tags:
+            unique_tags = sorted(set(tags))
+            marks = ", ".join("?" for _ in unique_tags)
+            if match_all_tags:
+                where.append(
+                    f"id IN (SELECT task_id FROM task_tags WHERE user_id = ? AND tag IN ({marks}) "
+                    f"GROUP BY task_id HAVING COUNT(*) = {len(unique_tags)})"
+                )
+            else:
+                where.append(f"id IN (SELECT task_id FROM task_tags WHERE user_id = ? AND tag IN ({marks}))")
+            params.extend([self.owner, *unique_tags])
+        if updated_since is not None:
+            where.append("updated_at >= ?")
+            params.append(updated_since)
+        if after is not None:
+            clause, values = keyset_clause([(SORT_COLUMNS.get(n, n), d) for n, d in fields], after)
+            where.append(clause)
+            params.extend(values)
+
+        sql = "SELECT * FROM tasks WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(f"{SORT_COLUMNS.get(n, n)} {'DESC' if d else 'ASC'}" for n, d in fields)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = await self.db.read(sql, params)
+        page = [_row_to_task(r) for r in rows]
+        if limit is None or len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        last = rows[limit - 1]
+        return page, [last[SORT_COLUMNS.get(n, n)] for n, _ in fields]
+
+
+class SQLiteFocusRepository(FocusRepository):
+    """One user's focus sessions in SQLite with rollups updated in the same write"""
+
+    def __init__(self, db: SQLiteDatabase, user_id: Optional[str] = None):
+        self.db = db
+        self.user_id = user_id
+        self.owner = user_id or ""
+        self.versions = versions_name("focus_sessions", user_id)
+
+    async def create(self, data: dict) -> FocusSession:
+        def insert(conn: sqlite3.Connection) -> FocusSession:
+            cursor = conn.execute(
+                "INSERT INTO focus_sessions (duration, task_id, completed, notes, created_at, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (data["duration"], data.get("task_id"), int(data.get("completed", False)), data.get("notes"), data["created_at"], self.owner),
+            )
+            session = FocusSession(id=cursor.lastrowid, **{**data, "user_id": self.user_id})
+            _apply_rollups(conn, self.owner, session, 1)
+            next_version(conn, self.versions)
+            return session
+
+        return await self.db.write(insert)
+
+    async def get(self, session_id: int) -> Optional[FocusSession]:
+        rows = await self.db.read("SELECT * FROM focus_sessions WHERE id = ? AND user_id = ?", (session_id, self.owner))
+        return _row_to_session(rows[0]) if rows else None
+
+    async def replace(self, session: FocusSession) -> FocusSession:
+        session = session.model_copy(update={"user_id": self.user_id})
+
+        def update(conn: sqlite3.Connection):
+            # Read in the write transaction, so each replace takes back what the previous one stored
+            row = conn.execute("SELECT * FROM focus_sessions WHERE id = ? AND user_id = ?", (session.id, self.owner)).fetchone()
+            if row is None:
+                raise KeyError(f"Focus session {session.id} not found")
+            old = _row_to_session(row)
+            conn.execute(
+                "UPDATE focus_sessions SET duration = ?, task_id = ?, completed = ?, notes = ?, created_at = ? WHERE id = ? AND user_id = ?",
+                (session.duration, session.task_id, int(session.completed), session.notes, session.created_at, session.id, self.owner),
+            )
+            _apply_rollups(conn, self.owner, old, -1)
+            _apply_rollups(conn, self.owner, session, 1)
+            next_version(conn, self.versions)
+
+        await self.db.write(update)
+        return session
+
+    async def all(self) -> List[FocusSession]:
+        rows = await self.db.read("SELECT * FROM focus_sessions WHERE user_id = ? ORDER BY id", (self.owner,))
+        return [_row_to_session(r) for r in rows]
+
+    async def count(self) -> int:
+        return (await self.db.read("SELECT COUNT(*) FROM focus_sessions WHERE user_id = ?", (self.owner,)))[0][0]
+
+    async def stats(self, days: Optional[int] = None, task_id: Optional[int] = None, today: Optional[date] = None) -> FocusStats:
+        if task_id is not None:
+            kind, buckets = "task", [str(task_id)]
+        elif days is not None:
+            today = today or date.today()
+            kind, buckets = "day", [(today - timedelta(days=n)).isoformat() for n in range(days)]
+        else:
+            kind, buckets = "total", [""]
+        marks = ", ".join("?" for _ in buckets)
+        row = (await self.db.read(
+            "SELECT COALESCE(SUM(sessions), 0), COALESCE(SUM(minutes), 0), COALESCE(SUM(completed), 0) "
+            f"FROM focus_rollups WHERE user_id = ? AND kind = ? AND bucket IN ({marks})",
+            (self.owner, kind, *buckets),
+        ))[0]
+        sessions, minutes, completed = row
+        return FocusStats(
+            total_sessions=sessions,
+            total_minutes=minutes,
+            completed_sessions=completed,
+            avg_session_minutes=minutes / sessions if sessions > 0 else 0,
+        )
+
+    async def stats_between(self, start: str, end: str) -> FocusStats:
+        sessions, minutes, completed = (await self.db.read(
+            "SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(completed), 0) "
+            "FROM focus_sessions WHERE user_id = ? AND created_at >= ? AND created_at < ?",
+            (self.owner, start, end),
+        ))[0]
+        return FocusStats(
+            total_sessions=sessions,
+            total_minutes=minutes,
+            completed_sessions=completed,
+            avg_session_minutes=minutes / sessions if sessions > 0 else 0,
+        )
+
+    async def hourly(self) -> List[dict]:
+        rows = await self.db.read("SELECT bucket, sessions, minutes FROM focus_rollups WHERE user_id = ? AND kind = 'hour'", (self.owner,))
+        by_hour = {int(r["bucket"]): r for r in rows}
+        return [
+            {
+                "hour": hour,
+                "sessions": by_hour[hour]["sessions"] if hour in by_hour else 0,
+                "minutes": by_hour[hour]["minutes"] if hour in by_hour else 0,
+            }
+            for hour in range(24)
+        ]
+
+    async def version(self) -> int:
+        return (await self.db.current_version(self.versions))[0]
+
+
+class SQLiteIntegrationRepository(IntegrationRepository):
+    """One user's integrations in SQLite"""
+
+    def __init__(self, db: SQLiteDatabase, user_id: Optional[str] = None):
+        self.db = db
+        self.user_id = user_id
+        self.owner = user_id or ""
+        self.versions = versions_name("integrations", user_id)
+
+    async def create(self, data: dict) -> Integration:
+        data = {**data, "user_id": self.user_id}
+
+        def insert(conn: sqlite3.Connection) -> Integration:
+            version = next_version(conn, self.versions)
+            cursor = conn.execute(_INSERT_INTEGRATION, (*_integration_values(data), version))
+            return Integration(id=cursor.lastrowid, **{**data, "version": version})
+
+        return await self.db.write(insert)
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        rows = await self.db.read("SELECT * FROM integrations WHERE id = ? AND user_id = ?", (integration_id, self.owner))
+        return _row_to_integration(rows[0]) if rows else None
+
+    async def replace(self, integration: Integration) -> Integration:
+        integration = integration.model_copy(update={"user_id": self.user_id})
+
+        def update(conn: sqlite3.Connection) -> int:
+            version = next_version(conn, self.versions)
+            cursor = conn.execute(
+                "UPDATE integrations SET name = ?, type = ?, enabled = ?, config = ?, user_id = ?, "
+                "created_at = ?, updated_at = ?, version = ? WHERE id = ? AND user_id = ?",
+                (*_integration_values(integration.model_dump()), version, integration.id, self.owner),
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(f"Integration {integration.id} not found")
+            return version
+
+        version = await self.db.write(update)
+        return integration.model_copy(update={"version": version})
+
+    async def delete(self, integration_id: int) -> Optional[Integration]:
+        integration = await self.get(integration_id)
+        if integration is not None:
+            def delete(conn: sqlite3.Connection):
+                conn.execute("DELETE FROM integrations WHERE id = ?", (integration_id,))
+                conn.execute("DELETE FROM reports_sent WHERE integration_id = ?", (integration_id,))
+                add_tombstone(conn, self.versions, integration_id, next_version(conn, self.versions), self.db.change_log_size)
+
+            await self.db.write(delete)
+        return integration
+
+    async def all(self) -> List[Integration]:
+        rows = await self.db.read("SELECT * FROM integrations WHERE user_id = ? ORDER BY id", (self.owner,))
+        return [_row_to_integration(r) for r in rows]
+
+    async def count(self) -> int:
+        return (await self.db.read("SELECT COUNT(*) FROM integrations WHERE user_id = ?", (self.owner,)))[0][0]
+
+    async def version(self) -> int:
+        return (await self.db.current_version(self.versions))[0]
+
+
+class SQLiteIntegrationIndex(IntegrationIndex):
+    """Every user's integrations in SQLite, and the days their reports were sent"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        rows = await self.db.read("SELECT * FROM integrations WHERE id = ?", (integration_id,))
+        return _row_to_integration(rows[0]) if rows else None
+
+    async def all(self) -> List[Integration]:
+        return [_row_to_integration(r) for r in await self.db.read("SELECT * FROM integrations ORDER BY id")]
+
+    async def count(self) -> int:
+        return (await self.db.read("SELECT COUNT(*) FROM integrations"))[0][0]
+
+    async def claim_report(self, integration_id: int, day: str) -> bool:
+        def claim(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                "INSERT INTO reports_sent (integration_id, day) VALUES (?, ?) "
+                "ON CONFLICT (integration_id) DO UPDATE SET day = excluded.day WHERE day < excluded.day",
+                (integration_id, day),
+            )
+            return cursor.rowcount == 1
+
+        return await self.db.write(claim)
+
+
+_INSERT_INTEGRATION = (
+    "INSERT INTO integrations (name, type, enabled, config, user_id, created_at, updated_at, version) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def keyset_clause(columns: List[Tuple[str, bool]], after: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """WHERE clause selecting rows that sort after ``after``.
+
+    For columns (a, b) this expands to ``a > ? OR (a = ? AND b > ?)``, with
+    ``<`` for descending columns.
+    """
+    if len(after) != len(columns):
+        raise ValueError("Cursor does not match sort order")
+    terms, params = [], []
+    for i, (column, desc) in enumerate(columns):
+        equal = [f"{c} = ?" for c, _ in columns[:i]]
+        terms.append("(" + " AND ".join(equal + [f"{column} {'<' if desc else '>'} ?"]) + ")")
+        params.extend(after[:i + 1])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def _task_values(data: dict) -> tuple:
+    return (
+        data["title"],
+        data.get("description"),
+        data["status"],
+        data["priority"],
+        PRIORITY_RANK.get(data["priority"], len(PRIORITY_RANK)),
+        data.get("category"),
+        json.dumps(data.get("tags") or []),
+        data["created_at"],
+        data["updated_at"],
+    )
+
+
+def versions_name(table: str, user_id: Optional[str]) -> str:
+    """Name of a user's change log for a table; the anonymous tenant keeps the table's"""
+    return f"{table}:{user_id}" if user_id else table
+
+
+def next_version(conn: sqlite3.Connection, name: str) -> int:
+    """Allocate the next write version for a table"""
+    return conn.execute(
+        "INSERT INTO versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1 RETURNING version",
+        (name,),
+    ).fetchone()[0]
+
+
+def add_tombstone(conn: sqlite3.Connection, name: str, record_id: int, version: int, keep: int):
+    """Record a delete, pruning tombstones more than ``keep`` versions old"""
+    conn.execute(
+        "INSERT INTO tombstones (entity, id, version) VALUES (?, ?, ?) "
+        "ON CONFLICT (entity, id) DO UPDATE SET version = excluded.version",
+        (name, record_id, version),
+    )
+    floor = conn.execute("SELECT floor FROM versions WHERE name = ?", (name,)).fetchone()[0]
+    # Prune in steps of ``keep`` so the cost is spread over many deletes
+    if version - floor > 2 * keep:
+        floor = version - keep
+        conn.execute("DELETE FROM tombstones WHERE entity = ? AND version <= ?", (name, floor))
+        conn.execute("UPDATE versions SET floor = ? WHERE name = ?", (floor, name))
+
+
+def _insert_task(conn: sqlite3.Connection, owner: str, versions: str, data: dict) -> Task:
+    version = next_version(conn, versions)
+    cursor = conn.execute(
+        "INSERT INTO tasks (title, description, status, priority, priority_rank, category, tags, created_at, updated_at, version, user_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (*_task_values(data), version, owner),
+    )
+    task = Task(id=cursor.lastrowid, **{**data, "user_id": owner or None, "version": version})
+    _insert_tags(conn, owner, task)
+    return task
+
+
+def _update_task(conn: sqlite3.Connection, owner: str, versions: str, task: Task) -> Task:
+    version = next_version(conn, versions)
+    cursor = conn.execute(
+        "UPDATE tasks SET title = ?, description = ?, status = ?, priority = ?, priority_rank = ?, "
+        "category = ?, tags = ?, created_at = ?, updated_at = ?, version = ? WHERE id = ? AND user_id = ?",
+        (*_task_values(task.model_dump()), version, task.id, owner),
+    )
+    if cursor.rowcount == 0:
+        raise KeyError(f"Task {task.id} not found")
+    task = task.model_copy(update={"user_id": owner or None, "version": version})
+    conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task.id,))
+    _insert_tags(conn, owner, task)
+    return task
+
+
+def _delete_task(conn: sqlite3.Connection, owner: str, versions: str, task_id: int, keep: int) -> Task:
+    row = conn.execute("SELECT * FROM tasks WHERE id = ? AND user_id = ?", (task_id, owner)).fetchone()
+    if row is None:
+        raise KeyError(f"Task {task_id} not found")
+    conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+    add_tombstone(conn, versions, task_id, next_version(conn, versions), keep)
+    return _row_to_task(row)
+
+
+def _insert_tags(conn: sqlite3.Connection, owner: str, task: Task):
+    conn.executemany(
+        "INSERT OR IGNORE INTO task_tags (user_id, tag, task_id) VALUES (?, ?, ?)",
+        [(owner, tag, task.id) for tag in set(task.tags)],
+    )
+
+
+def _row_to_task(row: sqlite3.Row) -> Task:
+    return Task(
+        id=row["id"],
+        title=row["title"],
+        description=row["description"],
+        status=row["status"],
+        priority=row["priority"],
+        category=row["category"],
+        tags=json.loads(row["tags"]),
+        user_id=row["user_id"] or None,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        version=row["version"],
+    )
+
+
+def _apply_rollups(conn: sqlite3.Connection, owner: str, session: FocusSession, sign: int):
+    buckets = [("total", ""), ("day", session.created_at[:10]), ("hour", str(int(session.created_at[11:13])))]
+    if session.task_id is not None:
+        buckets.append(("task", str(session.task_id)))
+    conn.executemany(
+        "INSERT INTO focus_rollups (user_id, kind, bucket, sessions, minutes, completed) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (user_id, kind, bucket) DO UPDATE SET sessions = sessions + excluded.sessions, "
+        "minutes = minutes + excluded.minutes, completed = completed + excluded.completed",
+        [(owner, kind, bucket, sign, sign * session.duration, sign * int(session.completed)) for kind, bucket in buckets],
+    )
+
+
+def _row_to_session(row: sqlite3.Row) -> FocusSession:
+    return FocusSession(
+        id=row["id"],
+        duration=row["duration"],
+        task_id=row["task_id"],
+        completed=bool(row["completed"]),
+        notes=row["notes"],
+        user_id=row["user_id"] or None,
+        created_at=row["created_at"],
+    )
+
+
+def _integration_values(data: dict) -> tuple:
+    return (
+        data["name"],
+        data["type"],
+        int(data["enabled"]),
+        json.dumps(data.get("config") or {}),
+        data.get("user_id") or "",
+        data["created_at"],
+        data["updated_at"],
+    )
+
+
+def _row_to_integration(row: sqlite3.Row) -> Integration:
+    return Integration(
+        id=row["id"],
+        name=row["name"],
+        type=row["type"],
+        enabled=bool(row["enabled"]),
+        config=json.loads(row["config"]),
+        user_id=row["user_id"] or None,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        version=row["version"],
+    )
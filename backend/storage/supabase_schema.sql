@@ -0,0 +1,205 @@
+-- Additions for STORAGE_BACKEND=supabase. Run after the tables in
+-- DEPLOYMENT.md have been created.
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS category TEXT;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS priority_rank SMALLINT
+  GENERATED ALWAYS AS (
+    CASE priority WHEN 'low' THEN 0 WHEN 'medium' THEN 1 WHEN 'high' THEN 2 ELSE 3 END
+  ) STORED;
+
+-- Every query is scoped to one user (NULL for the anonymous tenant), so
+-- the indexes lead with user_id
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_priority;
+DROP INDEX IF EXISTS idx_tasks_category;
+DROP INDEX IF EXISTS idx_tasks_updated_at;
+DROP INDEX IF EXISTS idx_tasks_version;
+CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, priority_rank);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_category ON tasks (user_id, category);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_updated_at ON tasks (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_tags ON tasks USING GIN (tags);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user ON focus_sessions (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_focus_sessions_user_created_at ON focus_sessions (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_integrations_user ON integrations (user_id, id);
+
+-- Write versions: every insert, update and delete on tasks, integrations
+-- or focus sessions takes the next value of one sequence, and is recorded
+-- under the table name for the anonymous tenant or "table:user_id" for a
+-- user. Deleted ids are kept as tombstones for the last change_log_size
+-- versions.
+CREATE SEQUENCE IF NOT EXISTS record_version_seq;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE integrations ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE focus_sessions ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_tasks_user_version ON tasks (user_id, version);
+
+CREATE TABLE IF NOT EXISTS versions (
+  name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  floor BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS tombstones (
+  entity TEXT NOT NULL,
+  id BIGINT NOT NULL,
+  version BIGINT NOT NULL,
+  PRIMARY KEY (entity, id)
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_version ON tombstones (entity, version);
+
+CREATE OR REPLACE FUNCTION stamp_version() RETURNS TRIGGER AS $$
+DECLARE
+  v BIGINT := nextval('record_version_seq');
+  change_log_size CONSTANT BIGINT := 10000;
+  current_floor BIGINT;
+  owner UUID;
+  log_name TEXT;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    owner := OLD.user_id;
+  ELSE
+    owner := NEW.user_id;
+  END IF;
+  log_name := CASE WHEN owner IS NULL THEN TG_TABLE_NAME ELSE TG_TABLE_NAME || ':' || owner END;
+  INSERT INTO versions (name, version) VALUES (log_name, v)
+  ON CONFLICT (name) DO UPDATE SET version = GREATEST(versions.version, EXCLUDED.version)
+  RETURNING floor INTO current_floor;
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO tombstones (entity, id, version) VALUES (log_name, OLD.id, v)
+    ON CONFLICT (entity, id) DO UPDATE SET version = EXCLUDED.version;
+    IF v - current_floor > 2 * change_log_size THEN
+      DELETE FROM tombstones WHERE entity = log_name AND version <= v - change_log_size;
+      UPDATE versions SET floor = v - change_log_size WHERE name = log_name;
+    END IF;
+    RETURN OLD;
+  END IF;
+  NEW.version := v;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_version ON tasks;
+CREATE TRIGGER tasks_version
+  BEFORE INSERT OR UPDATE OR DELETE ON tasks
+  FOR EACH ROW EXECUTE FUNCTION stamp_version();
+
+DROP TRIGGER IF EXISTS integrations_version ON integrations;
+CREATE TRIGGER integrations_version
+  BEFORE INSERT OR UPDATE OR DELETE ON integrations
+  FOR EACH ROW EXECUTE FUNCTION stamp_version();
+
+DROP TRIGGER IF EXISTS focus_sessions_version ON focus_sessions;
+CREATE TRIGGER focus_sessions_version
+  BEFORE INSERT OR UPDATE OR DELETE ON focus_sessions
+  FOR EACH ROW EXECUTE FUNCTION stamp_version();
+
+-- Rows written before versions existed are still at 0, which changes since
+-- 0 never returns; touching them lets the trigger give each a version
+UPDATE tasks SET version = 0 WHERE version = 0;
+UPDATE integrations SET version = 0 WHERE version = 0;
+UPDATE focus_sessions SET version = 0 WHERE version = 0;
+
+-- Applies a batch of task writes in one transaction. ops is a JSON array of
+-- {"op": "create", "row": {...}}, {"op": "replace", "id": n, "row": {...}}
+-- or {"op": "delete", "id": n}; returns the affected rows in order. Only
+-- owner's tasks (NULL for the anonymous tenant) can be replaced or deleted.
+DROP FUNCTION IF EXISTS bulk_write_tasks(JSONB);
+CREATE OR REPLACE FUNCTION bulk_write_tasks(ops JSONB, owner UUID DEFAULT NULL) RETURNS SETOF tasks AS $$
+DECLARE
+  item JSONB;
+  result tasks;
+BEGIN
+  FOR item IN SELECT * FROM jsonb_array_elements(ops) LOOP
+    IF item->>'op' = 'create' THEN
+      INSERT INTO tasks (title, description, status, priority, category, tags, user_id, created_at, updated_at)
+      SELECT r.title, r.description, r.status, r.priority, r.category, r.tags, owner, r.created_at, r.updated_at
+      FROM jsonb_populate_record(NULL::tasks, item->'row') AS r
+      RETURNING * INTO result;
+    ELSIF item->>'op' = 'replace' THEN
+      UPDATE tasks SET
+        title = r.title, description = r.description, status = r.status, priority = r.priority,
+        category = r.category, tags = r.tags, created_at = r.created_at, updated_at = r.updated_at
+      FROM jsonb_populate_record(NULL::tasks, item->'row') AS r
+      WHERE tasks.id = (item->>'id')::BIGINT AND tasks.user_id IS NOT DISTINCT FROM owner
+      RETURNING tasks.* INTO result;
+    ELSE
+      DELETE FROM tasks WHERE id = (item->>'id')::BIGINT AND user_id IS NOT DISTINCT FROM owner
+      RETURNING * INTO result;
+    END IF;
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'Task % not found', item->>'id';
+    END IF;
+    RETURN NEXT result;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Day of the last scheduled report sent per integration. claim_report
+-- moves it forward and returns true, or returns NULL if that day's report
+-- was already claimed, so one worker sends it.
+CREATE TABLE IF NOT EXISTS reports_sent (
+  integration_id BIGINT PRIMARY KEY REFERENCES integrations (id) ON DELETE CASCADE,
+  day DATE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION claim_report(claimed_id BIGINT, claimed_day DATE) RETURNS BOOLEAN AS $$
+  INSERT INTO reports_sent (integration_id, day) VALUES (claimed_id, claimed_day)
+  ON CONFLICT (integration_id) DO UPDATE SET day = EXCLUDED.day WHERE reports_sent.day < EXCLUDED.day
+  RETURNING TRUE;
+$$ LANGUAGE sql;
+
+-- Running focus aggregates per user and bucket: kind is total, day, hour
+-- or task
+CREATE TABLE IF NOT EXISTS focus_rollups (
+  user_id UUID,
+  kind TEXT NOT NULL,
+  bucket TEXT NOT NULL,
+  sessions INTEGER NOT NULL DEFAULT 0,
+  minutes INTEGER NOT NULL DEFAULT 0,
+  completed INTEGER NOT NULL DEFAULT 0
+);
+-- Existing rollups predate user_id; rebuild them per user
+ALTER TABLE focus_rollups ADD COLUMN IF NOT EXISTS user_id UUID;
+ALTER TABLE focus_rollups DROP CONSTRAINT IF EXISTS focus_rollups_pkey;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_focus_rollups_user
+  ON focus_rollups (user_id, kind, bucket) NULLS NOT DISTINCT;
+
+CREATE OR REPLACE FUNCTION apply_focus_rollup(s focus_sessions, sign INTEGER)
+RETURNS VOID AS $$
+  INSERT INTO focus_rollups (user_id, kind, bucket, sessions, minutes, completed)
+  SELECT s.user_id, b.kind, b.bucket, sign, sign * s.duration, sign * s.completed::INTEGER
+  FROM (VALUES
+    ('total', ''),
+    ('day', to_char(s.created_at, 'YYYY-MM-DD')),
+    ('hour', extract(hour FROM s.created_at)::INTEGER::TEXT),
+    ('task', s.task_id::TEXT)
+  ) AS b (kind, bucket)
+  WHERE b.bucket IS NOT NULL
+  ON CONFLICT (user_id, kind, bucket) DO UPDATE SET
+    sessions = focus_rollups.sessions + EXCLUDED.sessions,
+    minutes = focus_rollups.minutes + EXCLUDED.minutes,
+    completed = focus_rollups.completed + EXCLUDED.completed;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION focus_sessions_rollup() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_focus_rollup(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_focus_rollup(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS focus_sessions_rollup ON focus_sessions;
+CREATE TRIGGER focus_sessions_rollup
+  AFTER INSERT OR UPDATE OR DELETE ON focus_sessions
+  FOR EACH ROW EXECUTE FUNCTION focus_sessions_rollup();
+
+-- Recount the rollups from the sessions, per user (safe to re-run)
+TRUNCATE focus_rollups;
+SELECT apply_focus_rollup(s, 1) FROM focus_sessions AS s;
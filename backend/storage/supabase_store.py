@@ -0,0 +1,372 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.models.focus_model import FocusSession, FocusStats
+from backend.models.integration_model import Integration
+from backend.models.task_model import Task
+from backend.storage.focus_store import FocusRepository
+from backend.storage.integration_store import IntegrationIndex, IntegrationRepository
+from backend.storage.task_store import BulkOp, TaskRepository, parse_sort
+from backend.utils.supabase_client import SupabaseClient
+
+# Sort fields that map to a different column
+SORT_COLUMNS = {"priority": "priority_rank"}
+
+TASK_COLUMNS = ("title", "description", "status", "priority", "category", "tags", "user_id", "created_at", "updated_at")
+SESSION_COLUMNS = ("duration", "task_id", "completed", "notes", "user_id", "created_at")
+INTEGRATION_COLUMNS = ("name", "type", "enabled", "config", "user_id", "created_at", "updated_at")
+
+
+class InsertBatcher:
+    """Groups concurrent inserts into one multi-row PostgREST request.
+
+    The first insert opens a ``window`` second batch; inserts arriving
+    meanwhile join it, up to ``max_rows``. Each caller gets back its own
+    row, with the id Postgres assigned.
+    """
+
+    def __init__(self, supabase: SupabaseClient, table: str, window: float = 0.005, max_rows: int = 100):
+        self.supabase = supabase
+        self.table = table
+        self.window = window
+        self.max_rows = max_rows
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    async def insert(self, row: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_rows:
+            asyncio.ensure_future(self._flush())
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+        return await future
+
+    async def flush(self):
+        await self._flush()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        rows = [row for row, _ in batch]
+        try:
+            response = await self.supabase.run(lambda: self.supabase.client.table(self.table).insert(rows).execute())
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), created in zip(batch, response.data):
+            if not future.done():
+                future.set_result(created)
+
+
+class _SupabaseRepository:
+    """One user's rows of ``table``, or every user's when ``scoped`` is False"""
+
+    table = ""
+
+    def __init__(self, supabase: SupabaseClient, user_id: Optional[str] = None, scoped: bool = True):
+        self.supabase = supabase
+        self.user_id = user_id
+        self.scoped = scoped
+        # Matches the names the stamp_version trigger writes
+        self.versions = f"{self.table}:{user_id}" if user_id else self.table
+        self._inserts = InsertBatcher(supabase, self.table)
+
+    def _query(self):
+        return self.supabase.client.table(self.table)
+
+    def _owned(self, q):
+        if not self.scoped:
+            return q
+        return q.eq("user_id", self.user_id) if self.user_id else q.is_("user_id", "null")
+
+    def _owner(self, row: dict) -> dict:
+        return {**row, "user_id": self.user_id}
+
+    async def _execute(self, build) -> list:
+        response = await self.supabase.run(lambda: self._owned(build(self._query())).execute())
+        return response.data
+
+    async def count(self) -> int:
+        response = await self.supabase.run(lambda: self._owned(self._query().select("id", count="exact").limit(1)).execute())
+        return response.count or 0
+
+    async def version(self) -> int:
+        return (await self._current_version())[0]
+
+    async def _current_version(self) -> Tuple[int, int]:
+        response = await self.supabase.run(
+            lambda: self.supabase.client.table("versions").select("version, floor").eq("name", self.versions).execute()
+        )
+        return (response.data[0]["version"], response.data[0]["floor"]) if response.data else (0, 0)
+
+    async def close(self):
+        await self._inserts.flush()
+
+
+class SupabaseTaskRepository(_SupabaseRepository, TaskRepository):
+    """Tasks in the Supabase ``tasks`` table, queried through PostgREST"""
+
+    table = "tasks"
+
+    async def create(self, data: dict) -> Task:
+        return _row_to_task(await self._inserts.insert(_pick(self._owner(data), TASK_COLUMNS)))
+
+    async def get(self, task_id: int) -> Optional[Task]:
+        rows = await self._execute(lambda q: q.select("*").eq("id", task_id))
+        return _row_to_task(rows[0]) if rows else None
+
+    async def replace(self, task: Task) -> Task:
+        rows = await self._execute(lambda q: q.update(_pick(self._owner(task.model_dump()), TASK_COLUMNS)).eq("id", task.id))
+        if not rows:
+            raise KeyError(f"Task {task.id} not found")
+        return _row_to_task(rows[0])
+
+    async def delete(self, task_id: int) -> Optional[Task]:
+        rows = await self._execute(lambda q: q.delete().eq("id", task_id))
+        return _row_to_task(rows[0]) if rows else None
+
+    async def get_many(self, task_ids: Iterable[int]) -> Dict[int, Task]:
+        ids = list(set(task_ids))
+        if not ids:
+            return {}
+        rows = await self._execute(lambda q: q.select("*").in_("id", ids))
+        return {r["id"]: _row_to_task(r) for r in rows}
+
+    async def bulk_write(self, ops: Sequence[BulkOp]) -> List[Task]:
+        # PostgREST runs each request in its own transaction, so the whole
+        # batch goes through the bulk_write_tasks function in one call
+        payload = []
+        for kind, arg in ops:
+            if kind == "create":
+                payload.append({"op": kind, "row": _pick(self._owner(arg), TASK_COLUMNS)})
+            elif kind == "replace":
+                payload.append({"op": kind, "id": arg.id, "row": _pick(self._owner(arg.model_dump()), TASK_COLUMNS)})
+            else:
+                payload.append({"op": kind, "id": arg})
+        try:
+            response = await self.supabase.run(
+                lambda: self.supabase.client.rpc("bulk_write_tasks", {"ops": payload, "owner": self.user_id}).execute()
+            )
+        except Exception as e:
+            if "not found" in str(e):
+                raise KeyError(str(e)) from e
+            raise
+        return [_row_to_task(r) for r in response.data]
+
+    async def all(self) -> List[Task]:
+        return [_row_to_task(r) for r in await self._execute(lambda q: q.select("*").order("id"))]
+
+    async def changes(self, since: int) -> Optional[Tuple[List[Task], List[int], int]]:
+        version, floor = await self._current_version()
+        if since < floor or since > version:
+            return None
+        rows, deleted = await asyncio.gather(
+            self._execute(lambda q: q.select("*").gt("version", since).order("version")),
+            self.supabase.run(
+                lambda: self.supabase.client.table("tombstones").select("id, version")
+                .eq("entity", self.versions).gt("version", since).order("version").execute()
+            ),
+        )
+        # Rows may include writes committed after the versions read
+        latest = max([version] + [r["version"] for r in rows] + [r["version"] for r in deleted.data])
+        return [_row_to_task(r) for r in rows], [r["id"] for r in deleted.data], latest
+
+    async def query(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        match_all_tags: bool = False,
+        updated_since: Optional[str] = None,
+        sort: Sequence[str] = ("id",),
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Task], Optional[List[Any]]]:
+        fields = [(SORT_COLUMNS.get(n, n), d) for n, d in parse_sort(sort)]
+        if after is not None and len(after) != len(fields):
+            raise ValueError("Cursor does not match sort order")
+
+        def build(q):
+            q = q.select("*")
+            for column, value in (("status", status), ("priority", priority), ("category", category)):
+                if value is not None:
+                    q = q.eq(column, value)
+            if tags:
+                q = q.contains("tags", list(tags)) if match_all_tags else q.overlaps("tags", list(tags))
+            if updated_since is not None:
+                q = q.gte("updated_at", updated_since)
+            if after is not None:
+                q = q.or_(keyset_filter(fields, after))
+            for column, desc in fields:
+                q = q.order(column, desc=desc)
+            if limit is not None:
+                q = q.limit(limit + 1)
+            return q
+
+        rows = await self._execute(build)
+        page = [_row_to_task(r) for r in rows]
+        if limit is None or len(page) <= limit:
+            return page, None
+        last = rows[limit - 1]
+        return page[:limit], [last[column] for column, _ in fields]
+
+
+class SupabaseFocusRepository(_SupabaseRepository, FocusRepository):
+    """Focus sessions in Supabase; stats come from the trigger-maintained focus_rollups table"""
+
+    table = "focus_sessions"
+
+    async def create(self, data: dict) -> FocusSession:
+        return _row_to_session(await self._inserts.insert(_pick(self._owner(data), SESSION_COLUMNS)))
+
+    async def get(self, session_id: int) -> Optional[FocusSession]:
+        rows = await self._execute(lambda q: q.select("*").eq("id", session_id))
+        return _row_to_session(rows[0]) if rows else None
+
+    async def replace(self, session: FocusSession) -> FocusSession:
+        rows = await self._execute(lambda q: q.update(_pick(self._owner(session.model_dump()), SESSION_COLUMNS)).eq("id", session.id))
+        if not rows:
+            raise KeyError(f"Focus session {session.id} not found")
+        return _row_to_session(rows[0])
+
+    async def all(self) -> List[FocusSession]:
+        return [_row_to_session(r) for r in await self._execute(lambda q: q.select("*").order("id"))]
+
+    async def stats(self, days: Optional[int] = None, task_id: Optional[int] = None, today: Optional[date] = None) -> FocusStats:
+        if task_id is not None:
+            kind, buckets = "task", [str(task_id)]
+        elif days is not None:
+            kind, buckets = "day", _recent_days(days, today)
+        else:
+            kind, buckets = "total", [""]
+        response = await self.supabase.run(
+            lambda: self._owned(self.supabase.client.table("focus_rollups").select("*").eq("kind", kind).in_("bucket", buckets)).execute()
+        )
+        sessions = sum(r["sessions"] for r in response.data)
+        minutes = sum(r["minutes"] for r in response.data)
+        completed = sum(r["completed"] for r in response.data)
+        return FocusStats(
+            total_sessions=sessions,
+            total_minutes=minutes,
+            completed_sessions=completed,
+            avg_session_minutes=minutes / sessions if sessions > 0 else 0,
+        )
+
+    async def stats_between(self, start: str, end: str) -> FocusStats:
+        rows = await self._execute(lambda q: q.select("duration,completed").gte("created_at", start).lt("created_at", end))
+        sessions = len(rows)
+        minutes = sum(r["duration"] for r in rows)
+        return FocusStats(
+            total_sessions=sessions,
+            total_minutes=minutes,
+            completed_sessions=sum(1 for r in rows if r["completed"]),
+            avg_session_minutes=minutes / sessions if sessions > 0 else 0,
+        )
+
+    async def hourly(self) -> List[dict]:
+        response = await self.supabase.run(
+            lambda: self._owned(self.supabase.client.table("focus_rollups").select("*").eq("kind", "hour")).execute()
+        )
+        by_hour = {int(r["bucket"]): r for r in response.data}
+        return [
+            {"hour": h, "sessions": by_hour.get(h, {}).get("sessions", 0), "minutes": by_hour.get(h, {}).get("minutes", 0)}
+            for h in range(24)
+        ]
+
+
+class SupabaseIntegrationRepository(_SupabaseRepository, IntegrationRepository):
+    """Integrations in the Supabase ``integrations`` table; ids are unique across users"""
+
+    table = "integrations"
+
+    async def create(self, data: dict) -> Integration:
+        return Integration(**await self._inserts.insert(_pick(self._owner(data), INTEGRATION_COLUMNS)))
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        rows = await self._execute(lambda q: q.select("*").eq("id", integration_id))
+        return Integration(**rows[0]) if rows else None
+
+    async def replace(self, integration: Integration) -> Integration:
+        rows = await self._execute(
+            lambda q: q.update(_pick(self._owner(integration.model_dump()), INTEGRATION_COLUMNS)).eq("id", integration.id)
+        )
+        if not rows:
+            raise KeyError(f"Integration {integration.id} not found")
+        return Integration(**rows[0])
+
+    async def delete(self, integration_id: int) -> Optional[Integration]:
+        rows = await self._execute(lambda q: q.delete().eq("id", integration_id))
+        return Integration(**rows[0]) if rows else None
+
+    async def all(self) -> List[Integration]:
+        return [Integration(**r) for r in await self._execute(lambda q: q.select("*").order("id"))]
+
+
+class SupabaseIntegrationIndex(_SupabaseRepository, IntegrationIndex):
+    """Every user's integrations in Supabase, and the days their reports were sent"""
+
+    table = "integrations"
+
+    def __init__(self, supabase: SupabaseClient):
+        super().__init__(supabase, scoped=False)
+
+    async def get(self, integration_id: int) -> Optional[Integration]:
+        rows = await self._execute(lambda q: q.select("*").eq("id", integration_id))
+        return Integration(**rows[0]) if rows else None
+
+    async def all(self) -> List[Integration]:
+        return [Integration(**r) for r in await self._execute(lambda q: q.select("*").order("id"))]
+
+    async def claim_report(self, integration_id: int, day: str) -> bool:
+        response = await self.supabase.run(
+            lambda: self.supabase.client.rpc("claim_report", {"claimed_id": integration_id, "claimed_day": day}).execute()
+        )
+        return bool(response.data)
+
+
+def keyset_filter(columns: List[Tuple[str, bool]], after: Sequence[Any]) -> str:
+    """PostgREST ``or`` filter selecting rows that sort after ``after``"""
+    terms = []
+    for i, (column, desc) in enumerate(columns):
+        parts = [f"{c}.eq.{_literal(v)}" for (c, _), v in zip(columns[:i], after)]
+        parts.append(f"{column}.{'lt' if desc else 'gt'}.{_literal(after[i])}")
+        terms.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return ",".join(terms)
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, str):
+        return json.dumps(value)
+    return str(value)
+
+
+def _pick(data: dict, columns: Sequence[str]) -> dict:
+    return {c: data.get(c) for c in columns if c in data}
+
+
+def _recent_days(days: int, today: Optional[date] = None) -> List[str]:
+    today = today or date.today()
+    return [(today - timedelta(days=n)).isoformat() for n in range(days)]
+
+
+def _row_to_task(row: dict) -> Task:
+    task = {k: row.get(k) for k in ("id", *TASK_COLUMNS)}
+    task["tags"] = task["tags"] or []
+    task["version"] = row.get("version") or 0
+    return Task(**task)
+
+
+def _row_to_session(row: dict) -> FocusSession:
+    return FocusSession(**{k: row.get(k) for k in ("id", *SESSION_COLUMNS)})
@@ -0,0 +1,613 @@
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import compress, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import heapq
+import math
+
+from backend.models.task_model import Task
+from backend.storage.change_log import ChangeLog
+from backend.storage.compact import Interner, decode_time, encode_time
+
+# ("create", data) | ("replace", Task) | ("delete", task_id)
+BulkOp = Tuple[str, Any]
+
+# Task fields that get a secondary index (value -> set of task ids)
+INDEXED_FIELDS = ("status", "priority", "category")
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Fields tasks can be sorted by; priority sorts by PRIORITY_RANK
+SORT_FIELDS = ("id", "created_at", "updated_at", "title", "status", "priority")
+
+# A filtered query sorted by one field walks that field's sorted index,
+# skipping tasks that do not match, unless fewer than one task in this
+# many matches; then sorting just the matches is cheaper
+INDEX_WALK_MAX_SKIP = 8
+
+
+class TaskRepository(ABC):
+    """Storage interface used by the tasks router"""
+
+    @abstractmethod
+    async def create(self, data: dict) -> Task:
+        """Insert a new task under a newly allocated, never reused id"""
+
+    @abstractmethod
+    async def get(self, task_id: int) -> Optional[Task]:
+        """Return a task by id, or None"""
+
+    @abstractmethod
+    async def replace(self, task: Task) -> Task:
+        """Overwrite an existing task with the same id"""
+
+    @abstractmethod
+    async def delete(self, task_id: int) -> Optional[Task]:
+        """Remove a task, returning it or None if it did not exist"""
+
+    @abstractmethod
+    async def get_many(self, task_ids: Iterable[int]) -> Dict[int, Task]:
+        """Return the existing tasks among task_ids, keyed by id"""
+
+    @abstractmethod
+    async def bulk_write(self, ops: Sequence[BulkOp]) -> List[Task]:
+        """Apply create/replace/delete operations atomically.
+
+        Each op is ``("create", data)``, ``("replace", task)`` or
+        ``("delete", task_id)``. Returns the created, updated or deleted task
+        for each op. If any replace or delete targets a missing task,
+        KeyError is raised and nothing is applied.
+        """
+
+    @abstractmethod
+    async def all(self) -> List[Task]:
+        """Return every task in id order"""
+
+    @abstractmethod
+    async def query(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        match_all_tags: bool = False,
+        updated_since: Optional[str] = None,
+        sort: Sequence[str] = ("id",),
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Task], Optional[List[Any]]]:
+        """Filter, sort and page tasks.
+
+        ``sort`` holds field names from SORT_FIELDS, prefixed with ``-`` for
+        descending order. ``after`` is the sort key returned with the
+        previous page. Returns the page and the key to resume after, or
+        None when there are no more results.
+
+        Sorting by one field (optionally then ``id``) is index backed;
+        sorting by several may scan every matching task.
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored tasks"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """Version of the latest write, deletes included"""
+
+    @abstractmethod
+    async def changes(self, since: int) -> Optional[Tuple[List[Task], List[int], int]]:
+        """Tasks written and ids deleted after version ``since``.
+
+        Returns (upserts, deleted ids, current version), or None when the
+        change log no longer reaches back to ``since``.
+        """
+
+    async def close(self):
+        """Flush pending writes and release resources"""
+
+
+class InMemoryTaskRepository(TaskRepository):
+    """Column-oriented task store with secondary indexes, holding one user's tasks.
+
+    Ids are numbered per user, so task ``n`` lives in row ``n - 1`` of a
+    set of parallel columns: title and description strings, status,
+    priority, category and tag-set codes interned per store, timestamps
+    as epoch microseconds and the version, 0 once deleted. Task models
+    are only built for the rows a call returns. Lookups are O(1) in the
+    number of stored tasks; writes also keep each sort field's SortedIds
+    in order, at O(log n) plus a block-sized memmove.
+    """
+
+    def __init__(self, change_log_size: int = 10000, user_id: Optional[str] = None):
+        self.user_id = user_id
+        self._last_id = 0
+        self._count = 0
+        self._statuses: Interner[str] = Interner()
+        self._priorities: Interner[str] = Interner()
+        self._categories: Interner[Optional[str]] = Interner()
+        self._tags: Interner[str] = Interner()
+        # Tag lists as tuples of tag codes, in order
+        self._tag_lists: Interner[Tuple[int, ...]] = Interner()
+        self._titles: List[Optional[str]] = []
+        self._descriptions: List[Optional[str]] = []
+        self._status = array("I")
+        self._priority = array("I")
+        self._category = array("I")
+        self._tag_list = array("I")
+        self._created = array("q")
+        self._updated = array("q")
+        self._versions = array("q")
+        self._columns = (
+            self._titles, self._descriptions, self._status, self._priority, self._category,
+            self._tag_list, self._created, self._updated, self._versions,
+        )
+        # (created_at, updated_at) of tasks whose timestamps would not format back unchanged
+        self._raw_times: Dict[int, Tuple[str, str]] = {}
+        self._indexes: Dict[str, Dict[Optional[str], Set[int]]] = {
+            field: {} for field in INDEXED_FIELDS
+        }
+        self._tag_index: Dict[str, Set[int]] = {}
+        self._sorted: Dict[str, SortedIds] = {
+            name: SortedIds(self._sort_column(name)) for name in SORT_FIELDS if name != "id"
+        }
+        # Task id and version of every write, oldest first; entries whose
+        # version is no longer the task's are skipped and compacted away
+        self._write_ids = array("q")
+        self._write_versions = array("q")
+        self._changes = ChangeLog(change_log_size)
+
+    async def create(self, data: dict) -> Task:
+        return self._create(data)
+
+    async def get(self, task_id: int) -> Optional[Task]:
+        return self._task(task_id) if self._exists(task_id) else None
+
+    async def replace(self, task: Task) -> Task:
+        if not self._exists(task.id):
+            raise KeyError(f"Task {task.id} not found")
+        return self._replace(task)
+
+    async def delete(self, task_id: int) -> Optional[Task]:
+        return self._delete(task_id)
+
+    async def get_many(self, task_ids: Iterable[int]) -> Dict[int, Task]:
+        return {i: self._task(i) for i in task_ids if self._exists(i)}
+
+    async def bulk_write(self, ops: Sequence[BulkOp]) -> List[Task]:
+        # Check every target before touching anything so a failure leaves
+        # the store unchanged; nothing awaits in between, so no other
+        # request can interleave
+        deleted = set()
+        for kind, arg in ops:
+            if kind in ("replace", "delete"):
+                task_id = arg.id if kind == "replace" else arg
+                if not self._exists(task_id) or task_id in deleted:
+                    raise KeyError(f"Task {task_id} not found")
+                if kind == "delete":
+                    deleted.add(task_id)
+        apply = {"create": self._create, "replace": self._replace, "delete": self._delete}
+        return [apply[kind](arg) for kind, arg in ops]
+
+    def _create(self, data: dict) -> Task:
+        self._last_id += 1
+        task = Task(id=self._last_id, **{**data, "user_id": self.user_id, "version": self._changes.record(self._last_id)})
+        for column, value in zip(self._columns, self._encode(task)):
+            column.append(value)
+        self._count += 1
+        self._index(task.id)
+        for index in self._sorted.values():
+            index.add(task.id)
+        self._log_write(task.id, task.version)
+        return task
+
+    def _replace(self, task: Task) -> Task:
+        task = task.model_copy(update={"user_id": self.user_id, "version": self._changes.record(task.id)})
+        row = task.id - 1
+        self._unindex(task.id)
+        # Old positions must be found while the columns still hold the old values
+        moved = [
+            (index, index.position(task.id)) for name, index in self._sorted.items()
+            if index.value(task.id) != _sort_value(name, task)
+        ]
+        for column, value in zip(self._columns, self._encode(task)):
+            column[row] = value
+        self._index(task.id)
+        for index, position in moved:
+            index.move(task.id, position)
+        self._log_write(task.id, task.version)
+        return task
+
+    def _delete(self, task_id: int) -> Optional[Task]:
+        if not self._exists(task_id):
+            return None
+        task = self._task(task_id)
+        row = task_id - 1
+        self._unindex(task_id)
+        for index in self._sorted.values():
+            index.remove(task_id)
+        self._titles[row] = self._descriptions[row] = None
+        self._versions[row] = 0
+        self._raw_times.pop(task_id, None)
+        self._count -= 1
+        self._changes.record(task_id, deleted=True)
+        return task
+
+    async def all(self) -> List[Task]:
+        return [self._task(i) for i in self._live_ids()]
+
+    async def count(self) -> int:
+        return self._count
+
+    async def version(self) -> int:
+        return self._changes.version
+
+    async def changes(self, since: int) -> Optional[Tuple[List[Task], List[int], int]]:
+        found = self._changes.since(since)
+        if found is None:
+            return None
+        written, deleted = found
+        return [self._task(i) for i in written], deleted, self._changes.version
+
+    async def query(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        match_all_tags: bool = False,
+        updated_since: Optional[str] = None,
+        sort: Sequence[str] = ("id",),
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Task], Optional[List[Any]]]:
+        fields = parse_sort(sort)
+        sort_key = SortKey([(self._sort_column(name), desc) for name, desc in fields])
+        candidates = self._candidates(status, priority, category, tags, match_all_tags, updated_since)
+        (first, descending), single = fields[0], fields[1:] in ([], [("id", False)])
+
+        walk = single and (candidates is None or limit is not None and len(candidates) * INDEX_WALK_MAX_SKIP >= self._count)
+        if walk and first == "id":
+            # Id order: walk the id space from the cursor instead of
+            # touching every task
+            page = self._walk_ids(descending, after, limit, candidates)
+        elif walk:
+            # One sort field: read the page off its sorted index from the cursor
+            if after is not None:
+                sort_key.resume_point(after)
+            ids = self._sorted[first].walk(descending, after)
+            if candidates is not None:
+                ids = (i for i in ids if i in candidates)
+            page = list(islice(ids, None if limit is None else limit + 1))
+        else:
+            # Several sort fields, or few matches: sort the matching tasks,
+            # which costs O(n log limit) over every task when unfiltered
+            ids = self._live_ids() if candidates is None else candidates
+            if after is not None:
+                resume = sort_key.resume_point(after)
+                ids = (i for i in ids if sort_key(i) > resume)
+            if limit is None:
+                page = sorted(ids, key=sort_key)
+            else:
+                page = heapq.nsmallest(limit + 1, ids, key=sort_key)
+
+        if limit is None or len(page) <= limit:
+            return [self._task(i) for i in page], None
+        page = page[:limit]
+        return [self._task(i) for i in page], sort_key.raw(page[-1])
+
+    def ids_for(self, field: str, value: Optional[str]) -> Set[int]:
+        """Ids of tasks whose indexed field equals value"""
+        return self._indexes[field].get(value, set())
+
+    def ids_for_tag(self, tag: str) -> Set[int]:
+        """Ids of tasks carrying the given tag"""
+        return self._tag_index.get(tag, set())
+
+    def _candidates(self, status, priority, category, tags, match_all_tags, updated_since) -> Optional[Set[int]]:
+        """Intersect the relevant indexes; None means no filter applied"""
+        sets: List[Set[int]] = []
+        for field, value in (("status", status), ("priority", priority), ("category", category)):
+            if value is not None:
+                sets.append(self.ids_for(field, value))
+        if tags:
+            tag_sets = [self.ids_for_tag(tag) for tag in tags]
+            if match_all_tags:
+                sets.extend(tag_sets)
+            else:
+                sets.append(set().union(*tag_sets))
+        if updated_since is not None:
+            sets.append(self._updated_since(updated_since))
+        if not sets:
+            return None
+        if len(sets) == 1:
+            # The index's own set: only read, never changed, by the caller
+            return sets[0]
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _updated_since(self, since: str) -> Set[int]:
+        # Writes stamp updated_at with the current time, so the most recently
+        # written tasks sit at the end of the write log
+        since_micros, _ = encode_time(since)
+        ids = set()
+        for position in range(len(self._write_ids) - 1, -1, -1):
+            task_id = self._write_ids[position]
+            if self._versions[task_id - 1] != self._write_versions[position]:
+                continue
+            if self._updated[task_id - 1] < since_micros:
+                break
+            ids.add(task_id)
+        return ids
+
+    def _walk_ids(
+        self, descending: bool, after: Optional[Sequence[Any]], limit: Optional[int], candidates: Optional[Set[int]] = None
+    ) -> List[int]:
+        if not self._count:
+            return []
+        if descending:
+            start = int(after[0]) - 1 if after else self._last_id
+            ids = range(min(start, self._last_id), 0, -1)
+        else:
+            start = int(after[0]) + 1 if after else 1
+            ids = range(max(start, 1), self._last_id + 1)
+        page = []
+        for task_id in ids:
+            if self._versions[task_id - 1] and (candidates is None or task_id in candidates):
+                page.append(task_id)
+                if limit is not None and len(page) > limit:
+                    break
+        return page
+
+    def _exists(self, task_id: int) -> bool:
+        return 0 < task_id <= self._last_id and self._versions[task_id - 1] != 0
+
+    def _live_ids(self) -> Iterable[int]:
+        return compress(range(1, self._last_id + 1), self._versions)
+
+    def _encode(self, task: Task) -> tuple:
+        """Column values of a task, in the order of ``_columns``"""
+        created, created_exact = encode_time(task.created_at)
+        updated, updated_exact = encode_time(task.updated_at)
+        if created_exact and updated_exact:
+            self._raw_times.pop(task.id, None)
+        else:
+            self._raw_times[task.id] = (task.created_at, task.updated_at)
+        return (
+            task.title,
+            task.description,
+            self._statuses.code(task.status),
+            self._priorities.code(task.priority),
+            self._categories.code(task.category),
+            self._tag_lists.code(tuple(self._tags.code(tag) for tag in task.tags)),
+            created,
+            updated,
+            task.version,
+        )
+
+    def _task(self, task_id: int) -> Task:
+        """Build the model for a stored task"""
+        row = task_id - 1
+        raw = self._raw_times.get(task_id)
+        if raw is not None:
+            created_at, updated_at = raw
+        else:
+            created_at = decode_time(self._created[row])
+            updated_at = created_at if self._updated[row] == self._created[row] else decode_time(self._updated[row])
+        tags = self._tags.values
+        return Task(
+            id=task_id,
+            title=self._titles[row],
+            description=self._descriptions[row],
+            status=self._statuses.values[self._status[row]],
+            priority=self._priorities.values[self._priority[row]],
+            category=self._categories.values[self._category[row]],
+            tags=[tags[code] for code in self._tag_lists.values[self._tag_list[row]]],
+            user_id=self.user_id,
+            created_at=created_at,
+            updated_at=updated_at,
+            version=self._versions[row],
+        )
+
+    def _sort_column(self, name: str) -> Callable[[int], Any]:
+        """Sort value of a task id for one of SORT_FIELDS, read from the columns"""
+        if name == "id":
+            return lambda i: i
+        if name in ("created_at", "updated_at"):
+            column = self._created if name == "created_at" else self._updated
+            return lambda i: column[i - 1]
+        if name == "title":
+            return lambda i: self._titles[i - 1]
+        if name == "status":
+            return lambda i: self._statuses.values[self._status[i - 1]]
+        # Read the interned priorities on each call: the sorted index lives as long as the store
+        priorities = self._priorities.values
+        return lambda i: PRIORITY_RANK.get(priorities[self._priority[i - 1]], len(PRIORITY_RANK))
+
+    def _log_write(self, task_id: int, version: int):
+        self._write_ids.append(task_id)
+        self._write_versions.append(version)
+        if len(self._write_ids) > 2 * self._count + 1024:
+            live = [
+                (i, v) for i, v in zip(self._write_ids, self._write_versions) if self._versions[i - 1] == v
+            ]
+            self._write_ids = array("q", (i for i, _ in live))
+            self._write_versions = array("q", (v for _, v in live))
+
+    def _index(self, task_id: int):
+        for field, value in self._indexed_values(task_id):
+            self._indexes[field].setdefault(value, set()).add(task_id)
+        for tag in self._tag_names(task_id):
+            self._tag_index.setdefault(tag, set()).add(task_id)
+
+    def _unindex(self, task_id: int):
+        for field, value in self._indexed_values(task_id):
+            _discard(self._indexes[field], value, task_id)
+        for tag in self._tag_names(task_id):
+            _discard(self._tag_index, tag, task_id)
+
+    def _indexed_values(self, task_id: int) -> Tuple[Tuple[str, Optional[str]], ...]:
+        row = task_id - 1
+        return (
+            ("status", self._statuses.values[self._status[row]]),
+            ("priority", self._priorities.values[self._priority[row]]),
+            ("category", self._categories.values[self._category[row]]),
+        )
+
+    def _tag_names(self, task_id: int) -> Set[str]:
+        tags = self._tags.values
+        return {tags[code] for code in self._tag_lists.values[self._tag_list[task_id - 1]]}
+
+
+class SortedIds:
+    """Task ids ordered by (``value(id)``, id), in compact arrays of at most ``block`` ids.
+
+    Walking it from a cursor reads only the tasks on the page, whatever
+    the board size. Adding or removing an id bisects the blocks by their
+    last key and then one block, so the memmove stays block sized.
+    Positions are (block, offset) pairs.
+    """
+
+    def __init__(self, value: Callable[[int], Any], block: int = 1024):
+        self.value = value
+        self.block = block
+        self._blocks: List[array] = []
+
+    def key(self, task_id: int) -> tuple:
+        return self.value(task_id), task_id
+
+    def add(self, task_id: int):
+        blocks = self._blocks
+        if not blocks:
+            blocks.append(array("q", [task_id]))
+            return
+        b = min(bisect_right(blocks, self.key(task_id), key=self._last), len(blocks) - 1)
+        insort(blocks[b], task_id, key=self.key)
+        if len(blocks[b]) > 2 * self.block:
+            blocks[b:b + 1] = [blocks[b][:self.block], blocks[b][self.block:]]
+
+    def position(self, task_id: int) -> Tuple[int, int]:
+        return self._find(self.key(task_id))
+
+    def remove(self, task_id: int):
+        self._delete(self.position(task_id))
+
+    def move(self, task_id: int, position: Tuple[int, int]):
+        """Re-place an id whose value changed; ``position`` is where it was found before the change"""
+        self._delete(position)
+        self.add(task_id)
+
+    def walk(self, descending: bool, after: Optional[Sequence[Any]] = None) -> Iterator[int]:
+        """Ids after the (value, id) cursor; descending values still list equal ones by ascending id"""
+        if not descending:
+            start = (0, 0) if after is None else self._find(tuple(after), right=True)
+            yield from self._range(start, (len(self._blocks), 0))
+            return
+        if after is None:
+            end = (len(self._blocks), 0)
+        else:
+            value, task_id = after
+            # The rest of the cursor's value first; (value,) sorts before any (value, id)
+            end = self._find((value,))
+            yield from self._range(self._find((value, task_id), right=True), self._find((value, math.inf), right=True))
+        while end > (0, 0):
+            b, offset = end
+            last = self._blocks[b][offset - 1] if offset else self._blocks[b - 1][-1]
+            start = self._find((self.value(last),))
+            yield from self._range(start, end)
+            end = start
+
+    def _last(self, block: array) -> tuple:
+        return self.key(block[-1])
+
+    def _find(self, key: tuple, right: bool = False) -> Tuple[int, int]:
+        search = bisect_right if right else bisect_left
+        b = search(self._blocks, key, key=self._last)
+        if b == len(self._blocks):
+            return b, 0
+        return b, search(self._blocks[b], key, key=self.key)
+
+    def _delete(self, position: Tuple[int, int]):
+        b, offset = position
+        del self._blocks[b][offset]
+        if not self._blocks[b]:
+            del self._blocks[b]
+
+    def _range(self, start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[int]:
+        (b, offset), (end_b, end_offset) = start, end
+        while (b, offset) < (end_b, end_offset):
+            block = self._blocks[b]
+            stop = end_offset if b == end_b else len(block)
+            yield from block[offset:stop]
+            b, offset = b + 1, 0
+
+
+class _Descending:
+    """Wraps a sort value so that it orders in reverse"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class SortKey:
+    """Composite sort key of a task id, with id as the final tie-breaker"""
+
+    def __init__(self, fields: List[Tuple[Callable[[int], Any], bool]]):
+        self.fields = fields
+
+    def __call__(self, task_id: int) -> tuple:
+        return tuple(_Descending(get(task_id)) if desc else get(task_id) for get, desc in self.fields)
+
+    def raw(self, task_id: int) -> List[Any]:
+        """Plain values of the key, suitable for a pagination cursor"""
+        return [get(task_id) for get, _ in self.fields]
+
+    def resume_point(self, values: Sequence[Any]) -> tuple:
+        if len(values) != len(self.fields):
+            raise ValueError("Cursor does not match sort order")
+        return tuple(_Descending(v) if desc else v for v, (_, desc) in zip(values, self.fields))
+
+
+def _sort_value(name: str, task: Task) -> Any:
+    """What ``InMemoryTaskRepository._sort_column(name)`` will read once ``task`` is stored"""
+    if name in ("created_at", "updated_at"):
+        return encode_time(getattr(task, name))[0]
+    if name == "priority":
+        return PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK))
+    return getattr(task, name)
+
+
+def parse_sort(sort: Sequence[str]) -> List[Tuple[str, bool]]:
+    """Validate a sort spec into (field, descending) pairs ending with id"""
+    fields = []
+    for spec in sort:
+        desc = spec.startswith("-")
+        name = spec.lstrip("-")
+        if name not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by '{name}'")
+        fields.append((name, desc))
+    if "id" not in [name for name, _ in fields]:
+        fields.append(("id", False))
+    return fields
+
+
+def _discard(index: Dict, key, task_id: int):
+    ids = index.get(key)
+    if ids is None:
+        return
+    ids.discard(task_id)
+    if not ids:
+        del index[key]
+
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+# Requests without an access token, when allowed, belong to this tenant
+ANONYMOUS = None
+
+R = TypeVar("R")
+
+
+class QuotaExceededError(Exception):
+    """Raised when a write would take a tenant past its row quota"""
+
+
+class TenantPartitions(Generic[R]):
+    """Per-user repositories, created on first use.
+
+    ``factory(user_id)`` builds a repository that only sees and writes that
+    user's rows, so each tenant gets its own indexes, aggregates and
+    versions and a request costs what the caller's own data costs.
+
+    For durable backends a partition is only a view over shared tables, so
+    partitions idle for ``idle_seconds`` are closed and dropped by
+    ``evict_idle``, and ``unscoped``, when given, is a read-only view
+    across every tenant with ``get``, ``all`` and ``close``. In-memory
+    partitions hold the data itself, so they take no ``idle_seconds`` and
+    ``quota`` is what bounds their size.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Optional[str]], R],
+        quota: int,
+        unscoped: Optional[Any] = None,
+        idle_seconds: Optional[float] = None,
+    ):
+        self.factory = factory
+        self.quota = quota
+        self.unscoped = unscoped
+        self.idle_seconds = idle_seconds
+        # user id -> (repository, last used)
+        self._partitions: Dict[Optional[str], Tuple[R, float]] = {}
+        self.evicted = 0
+
+    def tenant(self, user_id: Optional[str]) -> R:
+        entry = self._partitions.get(user_id)
+        repository = entry[0] if entry is not None else self.factory(user_id)
+        self._partitions[user_id] = (repository, time.monotonic())
+        return repository
+
+    def partitions(self) -> List[R]:
+        return [repository for repository, _ in self._partitions.values()]
+
+    async def check_quota(self, repository, adding: int = 1):
+        """Raise QuotaExceededError unless ``adding`` more rows fit in the tenant's quota"""
+        count = await repository.count()
+        if count + adding > self.quota:
+            raise QuotaExceededError(f"Quota of {self.quota} reached ({count} stored)")
+
+    async def find(self, record_id: int):
+        """Look a record up by id whichever tenant owns it; without ``unscoped``, only open partitions are searched"""
+        if self.unscoped is not None:
+            return await self.unscoped.get(record_id)
+        for repository in self.partitions():
+            record = await repository.get(record_id)
+            if record is not None:
+                return record
+        return None
+
+    async def all_records(self) -> list:
+        """Every tenant's records"""
+        if self.unscoped is not None:
+            return await self.unscoped.all()
+        records = []
+        for repository in self.partitions():
+            records.extend(await repository.all())
+        return records
+
+    async def evict_idle(self) -> int:
+        """Close and drop partitions idle for ``idle_seconds``; a no-op for in-memory data"""
+        if self.idle_seconds is None:
+            return 0
+        cutoff = time.monotonic() - self.idle_seconds
+        idle = [user_id for user_id, (_, used) in self._partitions.items() if used < cutoff]
+        for user_id in idle:
+            repository, _ = self._partitions.pop(user_id)
+            await repository.close()
+        self.evicted += len(idle)
+        return len(idle)
+
+    def stats(self) -> dict:
+        return {"tenants": len(self._partitions), "evicted": self.evicted, "quota": self.quota}
+
+    async def close(self):
+        for repository in self.partitions():
+            await repository.close()
+        if self.unscoped is not None:
+            await self.unscoped.close()
+
+
+class TenantEvictor:
+    """Periodically evicts idle tenants from a set of partitioned stores"""
+
+    def __init__(self, stores: Sequence[TenantPartitions], interval: float = 60.0):
+        self.stores = stores
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            for store in self.stores:
+                try:
+                    await store.evict_idle()
+                except Exception as e:
+                    print(f"Warning: Tenant eviction failed: {e}")
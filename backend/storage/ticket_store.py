@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional, Set
+
+
+class TicketStore:
+    """Local copy of synced Jira tickets, keyed by issue key and indexed by status"""
+
+    def __init__(self):
+        self._tickets: Dict[str, dict] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+
+    def upsert(self, ticket: dict):
+        key = ticket["id"]
+        old = self._tickets.get(key)
+        if old is not None:
+            self._unindex(old)
+        self._tickets[key] = ticket
+        self._by_status.setdefault(ticket["status"], set()).add(key)
+
+    def remove(self, key: str) -> Optional[dict]:
+        ticket = self._tickets.pop(key, None)
+        if ticket is not None:
+            self._unindex(ticket)
+        return ticket
+
+    def retain(self, keys: Set[str]):
+        """Drop every ticket whose key is not in keys"""
+        for key in [k for k in self._tickets if k not in keys]:
+            self.remove(key)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._tickets.get(key)
+
+    def all(self, status: Optional[str] = None) -> List[dict]:
+        if status is None:
+            return list(self._tickets.values())
+        return [self._tickets[k] for k in self._by_status.get(status, ())]
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def _unindex(self, ticket: dict):
+        keys = self._by_status.get(ticket["status"])
+        if keys is not None:
+            keys.discard(ticket["id"])
+            if not keys:
+                del self._by_status[ticket["status"]]
+
+
+# Global instance
+ticket_store = TicketStore()
@@ -0,0 +1,364 @@
+import asyncio
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# NumPy once imported, None without it; imported with the first window
+# computed, since it would add tens of milliseconds to every cold start
+np = False
+
+from backend.models.focus_model import FocusSession
+from backend.models.task_model import Task
+from backend.storage import focus_store, task_store
+from backend.storage.compact import Interner
+
+# Day of tasks not done, deleted tasks and unreadable timestamps; before any window
+NO_DAY = 0
+
+
+def day_of(timestamp: Optional[str]) -> int:
+    """Day ordinal of a stored timestamp, in server time like the focus stats"""
+    try:
+        return datetime.fromisoformat(timestamp).toordinal()
+    except (TypeError, ValueError):
+        return NO_DAY
+
+
+def _numpy():
+    global np
+    if np is False:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+def _row(ids: array, record_id: int) -> Tuple[int, bool]:
+    """Row of record_id in ascending ids, and whether it is already there"""
+    row = bisect_left(ids, record_id)
+    return row, row < len(ids) and ids[row] == record_id
+
+
+def _view(column: array):
+    """Zero-copy NumPy view of an array column; drop it before the column grows"""
+    return np.frombuffer(column, dtype=column.typecode)
+
+
+class FocusSeries:
+    """One user's focus sessions as parallel arrays, in id order"""
+
+    def __init__(self):
+        self.version = 0
+        self.ids = array("q")
+        self.day = array("i")
+        self.minutes = array("q")
+        self.completed = array("b")
+
+    def load(self, sessions: Iterable[FocusSession], version: int):
+        self.__init__()
+        for session in sorted(sessions, key=lambda s: s.id):
+            self.apply(session)
+        self.version = version
+
+    def apply(self, session: FocusSession) -> List[int]:
+        """Store a created or updated session; returns the days whose figures changed"""
+        row, found = _row(self.ids, session.id)
+        values = (session.id, day_of(session.created_at), session.duration, int(session.completed))
+        columns = (self.ids, self.day, self.minutes, self.completed)
+        if found:
+            old = self.day[row]
+            for column, value in zip(columns, values):
+                column[row] = value
+            return [old, values[1]]
+        for column, value in zip(columns, values):
+            column.insert(row, value)
+        return [values[1]]
+
+
+class TaskSeries:
+    """One user's tasks as parallel arrays of created day, done day, category and priority, in id order.
+
+    A task's done day is the day of its last update while its status is
+    done. Deleted tasks keep their row with both days cleared.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.categories: Interner[Optional[str]] = Interner()
+        self.priorities: Interner[str] = Interner()
+        self.ids = array("q")
+        self.created = array("i")
+        self.done = array("i")
+        self.category = array("I")
+        self.priority = array("I")
+
+    def load(self, tasks: Iterable[Task], version: int):
+        self.__init__()
+        for task in tasks:
+            self.upsert(task)
+        self.version = version
+
+    def upsert(self, task: Task) -> List[int]:
+        """Store a task; returns the days whose figures changed"""
+        row, found = _row(self.ids, task.id)
+        values = (
+            task.id,
+            day_of(task.created_at),
+            day_of(task.updated_at) if task.status == "done" else NO_DAY,
+            self.categories.code(task.category),
+            self.priorities.code(task.priority),
+        )
+        columns = (self.ids, self.created, self.done, self.category, self.priority)
+        if found:
+            old = [self.created[row], self.done[row]]
+            for column, value in zip(columns, values):
+                column[row] = value
+            return old + [values[1], values[2]]
+        for column, value in zip(columns, values):
+            column.insert(row, value)
+        return [values[1], values[2]]
+
+    def remove(self, task_id: int) -> List[int]:
+        row, found = _row(self.ids, task_id)
+        if not found:
+            return []
+        old = [self.created[row], self.done[row]]
+        self.created[row] = self.done[row] = NO_DAY
+        return old
+
+
+class UserAnalytics:
+    """A user's focus and task series plus their computed windows, each kept until a write touches it"""
+
+    def __init__(self):
+        self.focus = FocusSeries()
+        self.tasks = TaskSeries()
+        # (first day, last day) -> computed report
+        self._windows: Dict[Tuple[int, int], dict] = {}
+        self._lock = asyncio.Lock()
+
+    async def sync(self, tasks, focus):
+        """Catch up with the stores: tasks through their change log, focus sessions by reloading if a write was missed"""
+        async with self._lock:
+            version = await tasks.version()
+            if version != self.tasks.version:
+                changes = await tasks.changes(self.tasks.version) if self.tasks.version else None
+                if changes is None:
+                    self.tasks.load(await tasks.all(), version)
+                    self._windows.clear()
+                else:
+                    upserts, deleted, latest = changes
+                    for task in upserts:
+                        self.task_days_changed(self.tasks.upsert(task))
+                    for task_id in deleted:
+                        self.task_days_changed(self.tasks.remove(task_id))
+                    self.tasks.version = latest
+            version = await focus.version()
+            if version != self.focus.version:
+                self.focus.load(await focus.all(), version)
+                self._windows.clear()
+
+    def focus_written(self, session: FocusSession):
+        # Streaks run up to a window's last day, so a session changes every window ending on or after its day
+        days = self.focus.apply(session)
+        self.focus.version += 1
+        first = min(days)
+        self._drop(lambda start, end: end >= first)
+
+    def task_days_changed(self, days: List[int]):
+        for day in set(days) - {NO_DAY}:
+            self._drop(lambda start, end: start <= day <= end)
+
+    def window(self, start: int, end: int) -> Tuple[dict, bool]:
+        """Report for days ``start`` to ``end`` (ordinals), and whether it came from the cache"""
+        report = self._windows.get((start, end))
+        if report is not None:
+            return report, True
+        report = self._windows[(start, end)] = compute_window(self.focus, self.tasks, start, end)
+        return report, False
+
+    def _drop(self, covers):
+        for key in [key for key in self._windows if covers(*key)]:
+            del self._windows[key]
+
+
+def compute_window(focus: FocusSeries, tasks: TaskSeries, start: int, end: int) -> dict:
+    """Daily focus and task figures, throughput, completion rates and streaks for days ``start`` to ``end``"""
+    days = end - start + 1
+    if _numpy() is not None:
+        minutes, sessions, completed, done, by_category, by_priority, created, created_done, active = (
+            _reduce_numpy(focus, tasks, start, end)
+        )
+    else:
+        minutes, sessions, completed, done, by_category, by_priority, created, created_done, active = (
+            _reduce_python(focus, tasks, start, end)
+        )
+    current, longest = _streaks(active, end)
+    labels = _date_labels(start, days)
+    total_minutes, total_sessions, total_completed, total_done = sum(minutes), sum(sessions), sum(completed), sum(done)
+    return {
+        "start": labels[0],
+        "end": labels[-1],
+        "days": days,
+        "daily": [
+            {
+                "date": labels[i],
+                "focus_minutes": minutes[i],
+                "sessions": sessions[i],
+                "completed_sessions": completed[i],
+                "tasks_done": done[i],
+            }
+            for i in range(days)
+        ],
+        "focus": {
+            "total_minutes": total_minutes,
+            "sessions": total_sessions,
+            "completed_sessions": total_completed,
+            "completion_rate": total_completed / total_sessions if total_sessions else 0.0,
+            "avg_daily_minutes": total_minutes / days,
+        },
+        "tasks": {
+            "created": created,
+            "done": total_done,
+            "completion_rate": created_done / created if created else 0.0,
+            "by_category": _groups(tasks.categories, by_category),
+            "by_priority": _groups(tasks.priorities, by_priority),
+        },
+        "streaks": {"current": current, "longest": longest},
+    }
+
+
+def _reduce_numpy(focus: FocusSeries, tasks: TaskSeries, start: int, end: int) -> tuple:
+    days = end - start + 1
+    day, minutes = _view(focus.day), _view(focus.minutes)
+    in_window = (day >= start) & (day <= end)
+    offset = day[in_window] - start
+    daily_minutes = np.bincount(offset, weights=minutes[in_window], minlength=days)
+    daily_sessions = np.bincount(offset, minlength=days)
+    daily_completed = np.bincount(offset, weights=_view(focus.completed)[in_window], minlength=days)
+    active = np.unique(day[(day <= end) & (minutes > 0)])
+
+    created, done = _view(tasks.created), _view(tasks.done)
+    done_in_window = (done >= start) & (done <= end)
+    daily_done = np.bincount(done[done_in_window] - start, minlength=days)
+    by_category = np.bincount(_view(tasks.category)[done_in_window], minlength=len(tasks.categories))
+    by_priority = np.bincount(_view(tasks.priority)[done_in_window], minlength=len(tasks.priorities))
+    created_in_window = (created >= start) & (created <= end)
+    return (
+        daily_minutes.astype(np.int64).tolist(),
+        daily_sessions.tolist(),
+        daily_completed.astype(np.int64).tolist(),
+        daily_done.tolist(),
+        by_category.tolist(),
+        by_priority.tolist(),
+        int(created_in_window.sum()),
+        int((created_in_window & (done != NO_DAY)).sum()),
+        active,
+    )
+
+
+def _reduce_python(focus: FocusSeries, tasks: TaskSeries, start: int, end: int) -> tuple:
+    days = end - start + 1
+    minutes, sessions, completed = [0] * days, [0] * days, [0] * days
+    active = set()
+    for day, spent, finished in zip(focus.day, focus.minutes, focus.completed):
+        if day <= end and spent > 0:
+            active.add(day)
+        if start <= day <= end:
+            minutes[day - start] += spent
+            sessions[day - start] += 1
+            completed[day - start] += finished
+    done = [0] * days
+    by_category, by_priority = [0] * len(tasks.categories), [0] * len(tasks.priorities)
+    created = created_done = 0
+    for created_day, done_day, category, priority in zip(tasks.created, tasks.done, tasks.category, tasks.priority):
+        if start <= done_day <= end:
+            done[done_day - start] += 1
+            by_category[category] += 1
+            by_priority[priority] += 1
+        if start <= created_day <= end:
+            created += 1
+            created_done += done_day != NO_DAY
+    return minutes, sessions, completed, done, by_category, by_priority, created, created_done, sorted(active)
+
+
+def _streaks(active, end: int) -> Tuple[int, int]:
+    """(current, longest) runs of consecutive days in sorted ``active``; the current run must reach ``end`` or the day before"""
+    if len(active) == 0:
+        return 0, 0
+    if _numpy() is not None:
+        # Run lengths are the gaps between the positions where consecutive days break
+        breaks = np.flatnonzero(np.diff(active) != 1)
+        runs = np.diff(np.concatenate(([-1], breaks, [len(active) - 1])))
+        longest, run = int(runs.max()), int(runs[-1])
+    else:
+        longest = run = 0
+        previous = None
+        for day in active:
+            run = run + 1 if previous == day - 1 else 1
+            longest = max(longest, run)
+            previous = day
+    return (run if active[-1] >= end - 1 else 0), longest
+
+
+@lru_cache(maxsize=64)
+def _date_labels(start: int, days: int) -> Tuple[str, ...]:
+    return tuple(date.fromordinal(start + i).isoformat() for i in range(days))
+
+
+def _groups(keys: Interner, counts: List[int]) -> List[dict]:
+    groups = [{"key": keys.values[code], "done": count} for code, count in enumerate(counts) if count]
+    return sorted(groups, key=lambda g: -g["done"])
+
+
+class AnalyticsEngine:
+    """Per-user analytics for the ``max_tenants`` most recently active users"""
+
+    def __init__(self, max_tenants: int = 1000):
+        self.max_tenants = max_tenants
+        self._users: "OrderedDict[Optional[str], UserAnalytics]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def report(self, user_id: Optional[str], days: int, today: Optional[date] = None) -> dict:
+        """The user's trends over the ``days`` days up to ``today`` (default: the current date)"""
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = UserAnalytics()
+            while len(self._users) > self.max_tenants:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        await user.sync(task_store.tenant(user_id), focus_store.tenant(user_id))
+        end = (today or date.today()).toordinal()
+        report, cached = user.window(end - days + 1, end)
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return report
+
+    def focus_written(self, user_id: Optional[str], session: FocusSession):
+        """Fold a session written through the API into the user's series, if they are loaded"""
+        user = self._users.get(user_id)
+        if user is not None:
+            user.focus_written(session)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "users": len(self._users),
+            "numpy": bool(np),
+        }
+
+
+# Global instance
+analytics_engine = AnalyticsEngine(max_tenants=int(os.getenv("ANALYTICS_TENANTS", "1000")))
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value: Any, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class AsyncTTLCache:
+    """Shared async cache with stale-while-revalidate and single-flight loads.
+
+    A value younger than ``ttl`` is served directly. Up to ``stale_ttl``
+    seconds after that it is still served, while one background refresh is
+    started. Older or missing values are loaded inline, and concurrent
+    callers for the same key wait on the same load, so each key causes at
+    most one upstream call at a time.
+
+    A load that returns None is not cached, so lookups of keys that do not
+    exist cannot fill the cache. Past ``max_entries`` the least recently
+    used keys are dropped, and expired ones go first.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_load(key, loader)
+                return entry.value
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = self._start_load(key, loader)
+        return await asyncio.shield(future)
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the cached value regardless of age, without loading"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "keys": len(self._entries),
+        }
+
+    def _start_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = asyncio.ensure_future(self._load(key, loader))
+        # Background refreshes have no awaiter; mark their errors as retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        return future
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if value is None:
+            self._entries.pop(key, None)
+            return value
+        self._entries[key] = _Entry(value, self._clock())
+        self._entries.move_to_end(key)
+        self._evict()
+        return value
+
+    def _evict(self):
+        expires = self._clock() - self.ttl - self.stale_ttl
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.fetched_at > expires and (self.max_entries is None or len(self._entries) <= self.max_entries):
+                break
+            del self._entries[key]
+
+
+class ResponseCache:
+    """Serialized response bodies keyed by request, valid for one store version.
+
+    An entry is only served while the store's version still equals the one
+    it was rendered at, so any write invalidates it without the writer
+    having to know which responses exist. Least recently used entries are
+    dropped beyond ``max_entries`` or ``max_bytes`` of bodies.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (version, body, extra headers)
+        self._entries: "OrderedDict[Hashable, Tuple[int, bytes, Dict[str, str]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: Hashable, version: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self._drop(key)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[key] = (version, body, headers or {})
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "keys": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
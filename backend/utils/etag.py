@@ -0,0 +1,30 @@
+import hashlib
+from typing import Optional
+
+# Lists are per tenant, so a shared cache must not answer one caller with another's
+VARY = "Authorization"
+
+
+def collection_etag(version: int, tenant: Optional[str] = None) -> str:
+    """Weak ETag for a tenant's list whose contents are fixed by a store version.
+
+    Versions count per tenant, so the tenant is part of the tag: one
+    tenant's ETag never matches another's list at the same version.
+    """
+    scope = hashlib.sha256((tenant or "").encode()).hexdigest()[:16]
+    return f'W/"{scope}-v{version}"'
+
+
+def etag_headers(etag: str) -> dict:
+    """Headers for a list response or its 304"""
+    return {"ETag": etag, "Vary": VARY}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Iterable, List, Optional, Set, Tuple
+
+# Tenant of events every subscriber receives, such as alert and ticket changes
+BROADCAST = "*"
+
+# (seq, type, JSON text of the whole event, tenant)
+Event = Tuple[int, str, str, Optional[str]]
+
+
+class Subscription:
+    """One stream connection's view of the bus.
+
+    Events wait in a bounded queue. A subscriber that falls behind by more
+    than ``maxsize`` events has its queue dropped and is sent a ``resync``
+    event instead, so a slow client costs at most ``maxsize`` events of
+    memory and never slows down publishers or other subscribers. Only
+    broadcast events and those of the subscriber's own tenant are
+    delivered.
+    """
+
+    def __init__(self, bus: "EventBus", maxsize: int, topics: Optional[Iterable[str]] = None, tenant: Optional[str] = None):
+        self.bus = bus
+        self.topics = tuple(topics) if topics else None
+        self.tenant = tenant
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize)
+
+    def wants(self, event: Event) -> bool:
+        _, event_type, _, tenant = event
+        if tenant != BROADCAST and tenant != self.tenant:
+            return False
+        return self.topics is None or event_type == "resync" or event_type.startswith(self.topics)
+
+    def offer(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and have the client refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.bus.resync_event())
+            self.queue.put_nowait(event)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Wait for the next event; None if ``timeout`` passes first"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process fan-out of change events to stream subscribers.
+
+    Every event gets the next sequence number and is serialized once, then
+    handed to each subscriber's queue. The last ``history`` events are kept
+    so a reconnecting client can resume from the last id it saw. Ids are
+    ``<epoch>:<seq>``; the epoch changes on every restart, so a resume id
+    from another process or an evicted sequence gets a ``resync`` event,
+    telling the client to refetch in full.
+
+    The bus only sees writes handled by its own process, which is why the
+    image runs a single worker (WEB_CONCURRENCY=1).
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 256):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self.seq = 0
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}:{seq}"
+
+    def publish(self, event_type: str, data: Any, tenant: Optional[str] = BROADCAST) -> int:
+        """Send an event to every interested subscriber of ``tenant`` and return its sequence number"""
+        self.seq += 1
+        text = json.dumps({"id": self.event_id(self.seq), "type": event_type, "data": data}, default=str)
+        event = (self.seq, event_type, text, tenant)
+        self._history.append(event)
+        for subscription in self._subscribers:
+            if subscription.wants(event):
+                subscription.offer(event)
+        return self.seq
+
+    def subscribe(
+        self,
+        last_event_id: Optional[str] = None,
+        topics: Optional[Iterable[str]] = None,
+        tenant: Optional[str] = None,
+    ) -> Subscription:
+        """Register a subscriber to ``tenant``'s events, replaying what it missed after ``last_event_id``"""
+        subscription = Subscription(self, self.queue_size, topics, tenant)
+        if last_event_id:
+            for event in self._replay(last_event_id):
+                if subscription.wants(event):
+                    subscription.offer(event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def resync_event(self) -> Event:
+        text = json.dumps({"id": self.event_id(self.seq), "type": "resync", "data": None})
+        return (self.seq, "resync", text, BROADCAST)
+
+    def _replay(self, last_event_id: str) -> List[Event]:
+        epoch, _, seq = last_event_id.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return [self.resync_event()]
+        seq = int(seq)
+        oldest = self._history[0][0] if self._history else self.seq + 1
+        if seq > self.seq or seq < oldest - 1:
+            return [self.resync_event()]
+        return [e for e in self._history if e[0] > seq]
+
+
+# Global instance
+event_bus = EventBus(
+    history=int(os.getenv("EVENT_HISTORY", "1000")),
+    queue_size=int(os.getenv("EVENT_QUEUE_SIZE", "256")),
+)
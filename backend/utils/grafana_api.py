@@ -1,25 +1,70 @@
 import os
-import requests
+from typing import Optional
+
+from backend.utils.http_client import get_http_client
+from backend.utils.metrics import timed
+from backend.utils.resilience import upstream
+
+# Grafana unified alerting exposes the Alertmanager v2 API under this path
+ALERTS_PATH = "/api/alertmanager/grafana/api/v2/alerts"
+
 
 class GrafanaClient:
     def __init__(self):
         self.base_url = os.getenv("GRAFANA_BASE_URL", "https://grafana.example.com")
         self.api_key = os.getenv("GRAFANA_API_KEY", "")
-    
-    def get_alerts(self):
-        """Fetch Grafana/Alertmanager alerts"""
-        # TODO: Implement actual Grafana API integration
-        # headers = {"Authorization": f"Bearer {self.api_key}"}
-        # response = requests.get(f"{self.base_url}/api/alerts", headers=headers)
-        
-        # Mock data for now
-        return {
-            "alerts": [
-                {
-                    "id": "alert-1",
-                    "name": "High CPU Usage",
-                    "severity": "critical",
-                    "status": "firing"
-                }
-            ]
-        }
+        self._etag: Optional[str] = None
+        self._last_alerts: Optional[dict] = None
+        self.upstream = upstream("grafana", float(os.getenv("HTTP_TIMEOUT_SECONDS", "10")))
+
+    @timed("grafana", "get_alerts")
+    async def get_alerts(self):
+        """Fetch Grafana/Alertmanager alerts; the last alerts fetched while Grafana is down"""
+        if not self.api_key:
+            # Mock data when Grafana is not configured
+            return {
+                "alerts": [
+                    {
+                        "id": "alert-1",
+                        "name": "High CPU Usage",
+                        "severity": "critical",
+                        "status": "firing",
+                        "labels": {"alertname": "High CPU Usage", "severity": "critical"}
+                    }
+                ]
+            }
+
+        return await self.upstream.call(self._fetch_alerts, fallback="alerts")
+
+    async def _fetch_alerts(self) -> dict:
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if self._etag and self._last_alerts is not None:
+            headers["If-None-Match"] = self._etag
+
+        client = get_http_client()
+        response = await client.get(f"{self.base_url.rstrip('/')}{ALERTS_PATH}", headers=headers)
+        if response.status_code == 304 and self._last_alerts is not None:
+            return self._last_alerts
+        response.raise_for_status()
+
+        alerts = {"alerts": [normalize_alert(a) for a in response.json()]}
+        self._etag = response.headers.get("ETag")
+        self._last_alerts = alerts
+        return alerts
+
+
+def normalize_alert(alert: dict) -> dict:
+    """Map an Alertmanager v2 alert onto the dashboard's alert shape"""
+    labels = alert.get("labels", {})
+    status = alert.get("status", {})
+    # The v2 API nests the state; webhook notifications send "firing"/"resolved"
+    state = status.get("state", "active") if isinstance(status, dict) else status
+    return {
+        "id": alert.get("fingerprint", ""),
+        "fingerprint": alert.get("fingerprint"),
+        "name": labels.get("alertname", "unknown"),
+        "severity": labels.get("severity", "none"),
+        "status": "firing" if state == "active" else state,
+        "labels": labels,
+        "starts_at": alert.get("startsAt"),
+    }
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from backend.models.integration_model import Integration
+from backend.storage import integration_store
+from backend.utils.http_client import PUBLIC_ONLY, TargetRefusedError, get_http_client
+
+
+class ProbeError(ValueError):
+    """A probe failure whose message is safe to show the user"""
+
+
+def _missing(config: dict, *keys: str) -> Optional[str]:
+    absent = [key for key in keys if not config.get(key)]
+    if absent:
+        return f"Missing {', '.join(absent)}"
+    wrong = [key for key in keys if not isinstance(config[key], str)]
+    return f"Expected text for {', '.join(wrong)}" if wrong else None
+
+
+async def _probe_grafana(client: httpx.AsyncClient, config: dict, timeout: float) -> str:
+    base = config["url"].rstrip("/")
+    if config.get("api_key"):
+        # /api/org needs a valid key; /api/health only shows the server is up
+        response = await client.get(f"{base}/api/org", headers={"Authorization": f"Bearer {config['api_key']}"}, timeout=timeout, extensions=PUBLIC_ONLY)
+    else:
+        response = await client.get(f"{base}/api/health", timeout=timeout, extensions=PUBLIC_ONLY)
+    response.raise_for_status()
+    return f"Grafana responded with HTTP {response.status_code}"
+
+
+async def _probe_jira(client: httpx.AsyncClient, config: dict, timeout: float) -> str:
+    response = await client.get(
+        f"{config['url'].rstrip('/')}/rest/api/3/myself",
+        auth=(config["email"], config["api_token"]),
+        headers={"Accept": "application/json"},
+        timeout=timeout,
+        extensions=PUBLIC_ONLY,
+    )
+    response.raise_for_status()
+    return f"Jira accepted the credentials with HTTP {response.status_code}"
+
+
+async def _probe_slack(client: httpx.AsyncClient, config: dict, timeout: float) -> str:
+    # An empty message is refused with "no_text" by a live webhook and with
+    # no_service/invalid_token by a revoked one, and nothing gets posted
+    response = await client.post(config["webhook_url"], json={}, timeout=timeout, extensions=PUBLIC_ONLY)
+    if response.status_code == 400 and "no_text" in response.text:
+        return "Webhook is live"
+    raise ProbeError(f"Slack answered HTTP {response.status_code}")
+
+
+async def _probe_webhook(client: httpx.AsyncClient, config: dict, timeout: float) -> str:
+    # Only reachability can be checked without sending a payload
+    response = await client.head(config["url"], timeout=timeout, extensions=PUBLIC_ONLY)
+    if response.status_code >= 500:
+        raise ProbeError(f"Endpoint answered HTTP {response.status_code}")
+    return f"Endpoint answered HTTP {response.status_code}"
+
+
+# Probe and required config keys, the URL probed first, for each integration type
+PROBES = {
+    "grafana": (_probe_grafana, ("url",)),
+    "jira": (_probe_jira, ("url", "email", "api_token")),
+    "slack": (_probe_slack, ("webhook_url",)),
+    "webhook": (_probe_webhook, ("url",)),
+}
+
+
+async def probe(integration: Integration, timeout: float) -> dict:
+    """Check one integration's connection and time it.
+
+    Messages carry only status codes and error categories, never what the
+    upstream answered.
+    """
+    result = {
+        "id": integration.id,
+        "name": integration.name,
+        "type": integration.type,
+        "status": "error",
+        "latency_ms": None,
+        "message": "",
+        "checked_at": datetime.now().isoformat(),
+    }
+    if integration.type not in PROBES:
+        result["message"] = f"No health check for {integration.type} integrations"
+        return result
+    check, required = PROBES[integration.type]
+    config = integration.config if isinstance(integration.config, dict) else {}
+    missing = _missing(config, *required)
+    if missing:
+        result.update(status="unconfigured", message=missing)
+        return result
+
+    start = time.perf_counter()
+    try:
+        result["message"] = await asyncio.wait_for(check(get_http_client(), config, timeout), timeout)
+        result["status"] = "ok"
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        result["message"] = f"Timed out after {timeout:g}s"
+    except httpx.HTTPStatusError as e:
+        result["message"] = f"HTTP {e.response.status_code} from {e.request.url.host}"
+    except (ProbeError, TargetRefusedError) as e:
+        result["message"] = str(e)
+    except httpx.ConnectError:
+        result["message"] = "Could not connect"
+    except Exception as e:
+        # Anything else, e.g. httpx.InvalidURL, is still this integration's
+        # problem and must not fail the other probes in the sweep
+        result["message"] = type(e).__name__
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+class HealthMonitor:
+    """Probes enabled integrations in the background and keeps the results.
+
+    Every ``interval`` seconds all enabled integrations are checked at
+    once, at most ``concurrency`` at a time and each cut off after
+    ``timeout`` seconds, so one unreachable host delays nothing else. The
+    settings page reads ``results`` and never waits on an outbound call.
+    """
+
+    def __init__(self, interval: float = 60.0, timeout: float = 5.0, concurrency: int = 10):
+        self.interval = interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.results: Dict[int, dict] = {}
+        self.last_run: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self, integration: Integration) -> dict:
+        result = await probe(integration, self.timeout)
+        self.results[integration.id] = result
+        return result
+
+    async def check_all(self, integrations: Optional[List[Integration]] = None) -> List[dict]:
+        """Probe the given integrations, or every user's, concurrently; disabled ones are skipped"""
+        sweep = integrations is None
+        if sweep:
+            integrations = await integration_store.all_records()
+        integrations = [i for i in integrations if i.enabled]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(integration: Integration) -> dict:
+            async with semaphore:
+                return await self.check(integration)
+
+        results = await asyncio.gather(*(limited(i) for i in integrations))
+        if sweep:
+            enabled = {i.id for i in integrations}
+            for integration_id in [i for i in self.results if i not in enabled]:
+                del self.results[integration_id]
+            self.last_run = datetime.now().isoformat()
+        return results
+
+    def forget(self, integration_id: int):
+        self.results.pop(integration_id, None)
+
+    def status(self, integration_ids: Optional[Iterable[int]] = None) -> dict:
+        """Latest results, limited to ``integration_ids`` when given"""
+        results = self.results.values()
+        if integration_ids is not None:
+            results = [self.results[i] for i in integration_ids if i in self.results]
+        return {"last_run": self.last_run, "interval": self.interval, "results": list(results)}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                print(f"Warning: Integration health check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Global instance
+health_monitor = HealthMonitor(
+    interval=float(os.getenv("INTEGRATION_HEALTH_INTERVAL", "60")),
+    timeout=float(os.getenv("INTEGRATION_PROBE_TIMEOUT", "5")),
+    concurrency=int(os.getenv("INTEGRATION_PROBE_CONCURRENCY", "10")),
+)
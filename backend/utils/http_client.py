@@ -0,0 +1,339 @@
+import asyncio
+import contextlib
+import contextvars
+import ipaddress
+import os
+import socket
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from backend.utils.metrics import register_cache
+
+# Shared connection pool for all outbound integration calls
+_client: Optional[httpx.AsyncClient] = None
+
+# Self-hosted setups whose Grafana, Jira or webhooks sit on the local network
+# can let user configured URLs reach private addresses; by default any user
+# could otherwise make the server call internal services
+ALLOW_PRIVATE_TARGETS = os.getenv("INTEGRATION_PROBE_ALLOW_PRIVATE", "false").lower() == "true"
+
+# Request extensions for calls to a URL a user configured: the shared
+# client only connects if its host resolves to public addresses
+PUBLIC_ONLY = {"public_only": True}
+
+
+class TargetRefusedError(ValueError):
+    """A user configured URL the server will not call; the message is safe to show the user"""
+
+
+class CachingResolver:
+    """DNS answers kept for ``ttl`` seconds, shared by every outbound connection.
+
+    A failed connect forgets the host's entry.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache: Dict[str, Tuple[List[str], float]] = {}
+
+    async def resolve(self, host: str) -> List[str]:
+        """Addresses for a host; raises socket.gaierror if it has none"""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        cached = self._cache.get(host)
+        if cached is not None and cached[1] > time.monotonic():
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[host] = (addresses, time.monotonic() + self.ttl)
+        return addresses
+
+    def forget(self, host: str):
+        self._cache.pop(host, None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hosts": len(self._cache)}
+
+
+resolver = CachingResolver(float(os.getenv("HTTP_DNS_CACHE_TTL", "300")))
+register_cache("dns", resolver)
+
+
+def _check_addresses(host: str, addresses: List[str]):
+    if ALLOW_PRIVATE_TARGETS:
+        return
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        mapped = getattr(ip, "ipv4_mapped", None)
+        if not (mapped or ip).is_global:
+            raise TargetRefusedError(f"{host} is a private, loopback or link-local address")
+
+
+async def check_target(url: str):
+    """Refuse URLs whose host is or resolves to a non-public address, unless private targets are allowed.
+
+    For validating a URL before it is stored; requests sent with
+    ``PUBLIC_ONLY`` are checked again against the addresses they connect to.
+    """
+    if ALLOW_PRIVATE_TARGETS:
+        return
+    try:
+        host = httpx.URL(url).host
+    except httpx.InvalidURL:
+        raise TargetRefusedError("Invalid URL")
+    if not host:
+        raise TargetRefusedError("URL has no host")
+    try:
+        addresses = await resolver.resolve(host)
+    except socket.gaierror:
+        raise TargetRefusedError(f"Could not resolve {host}")
+    _check_addresses(host, addresses)
+
+
+# (host, addresses) the request being sent was resolved and checked to; a
+# new connection for it dials exactly these
+_pinned: contextvars.ContextVar[Optional[Tuple[str, List[str]]]] = contextvars.ContextVar("pinned_addresses", default=None)
+
+
+class PinningTransport(httpx.AsyncBaseTransport):
+    """Resolves each request's host once and has ``transport`` connect to that answer.
+
+    Requests sent with ``PUBLIC_ONLY`` are refused with TargetRefusedError
+    unless every address is public. Checking and connecting use the same
+    lookup, so a DNS answer that changes in between (DNS rebinding) cannot
+    steer the connection to an internal address. Pooled connections are
+    reused without a lookup.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, resolver: CachingResolver):
+        self.transport = transport
+        self.resolver = resolver
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.raw_host.decode("ascii")
+        try:
+            addresses = await self.resolver.resolve(host)
+        except socket.gaierror as e:
+            raise httpx.ConnectError(f"Could not resolve {host}: {e}", request=request)
+        if request.extensions.get("public_only"):
+            _check_addresses(host, addresses)
+        token = _pinned.set((host, addresses))
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            _pinned.reset(token)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class PinnedBackend(httpcore.AsyncNetworkBackend):
+    """Network backend dialling the addresses pinned for the request being sent.
+
+    Connections are still pooled by hostname, and TLS verifies against the
+    hostname in the URL, since httpcore sends that as SNI whatever address
+    is dialled.
+    """
+
+    def __init__(self, resolver: CachingResolver, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.resolver = resolver
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None, socket_options=None):
+        pinned = _pinned.get()
+        if pinned is not None and pinned[0] == host:
+            addresses = pinned[1]
+        else:
+            try:
+                addresses = await self.resolver.resolve(host)
+            except socket.gaierror as e:
+                raise httpcore.ConnectError(str(e))
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self.resolver.forget(host)
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+# httpcore errors and what httpx raises for them, most specific first
+_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextlib.contextmanager
+def _httpx_errors() -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        for core, error in _ERRORS:
+            if isinstance(e, core):
+                raise error(str(e)) from e
+        raise
+
+
+class _CoreStream(httpx.AsyncByteStream):
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """httpx transport over an httpcore connection pool with our own network backend.
+
+    httpx.AsyncHTTPTransport takes no network backend, while httpcore's
+    pool does; this is the part of the former that maps requests,
+    responses and errors between the two.
+    """
+
+    def __init__(self, limits: httpx.Limits, network_backend: httpcore.AsyncNetworkBackend):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_CoreStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps concurrent requests per host, on top of the pool's overall limit.
+
+    A slot is held from sending the request until the response is closed,
+    so one slow integration can take at most ``per_host`` of the pool's
+    connections and never starves calls to other hosts.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int):
+        self.transport = transport
+        self.per_host = per_host
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slots = self._slots.get(request.url.host)
+        if slots is None:
+            slots = self._slots[request.url.host] = asyncio.Semaphore(self.per_host)
+        await slots.acquire()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            slots.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, slots.release)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _transport(limits: httpx.Limits) -> httpx.AsyncBaseTransport:
+    pool = PoolTransport(limits, PinnedBackend(resolver))
+    return HostLimitedTransport(PinningTransport(pool, resolver), int(os.getenv("HTTP_MAX_PER_HOST", "20")))
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled async HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30")),
+        )
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv("HTTP_TIMEOUT_SECONDS", "10")), connect=5.0),
+            limits=limits,
+            transport=_transport(limits),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client; called on application shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
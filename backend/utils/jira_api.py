@@ -1,22 +1,27 @@
+import base64
 import os
-import requests
+
+from backend.utils.http_client import get_http_client
+from backend.utils.metrics import timed
+from backend.utils.resilience import upstream
+
+# Issue fields requested from the search API
+SEARCH_FIELDS = ["summary", "status", "priority", "labels", "created", "updated"]
+
 
 class JiraClient:
     def __init__(self):
         self.base_url = os.getenv("JIRA_BASE_URL", "https://your-domain.atlassian.net")
         self.email = os.getenv("JIRA_EMAIL", "")
         self.api_token = os.getenv("JIRA_API_TOKEN", "")
-    
+        self.upstream = upstream("jira", float(os.getenv("HTTP_TIMEOUT_SECONDS", "10")))
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.email and self.api_token)
+
     def get_tickets(self):
-        """Fetch Jira tickets"""
-        # TODO: Implement actual Jira API integration
-        # Example using Basic Auth:
-        # headers = {
-        #     "Authorization": f"Basic {base64.b64encode(f'{self.email}:{self.api_token}'.encode()).decode()}"
-        # }
-        # response = requests.get(f"{self.base_url}/rest/api/3/search", headers=headers)
-        
-        # Mock data for now
+        """Mock Jira tickets, used when Jira is not configured"""
         return {
             "tickets": [
                 {
@@ -27,3 +32,27 @@ class JiraClient:
                 }
             ]
         }
+
+    @timed("jira", "search")
+    async def search(self, jql: str, start_at: int = 0, max_results: int = 100) -> dict:
+        """Fetch one page of issues from /rest/api/3/search"""
+        params = {
+            "jql": jql,
+            "startAt": start_at,
+            "maxResults": max_results,
+            "fields": ",".join(SEARCH_FIELDS),
+        }
+        return await self.upstream.call(self._get, "/rest/api/3/search", params)
+
+    @timed("jira", "myself")
+    async def myself(self) -> dict:
+        """Fetch the API user's profile, including the time zone JQL dates are read in"""
+        return await self.upstream.call(self._get, "/rest/api/3/myself", {})
+
+    async def _get(self, path: str, params: dict) -> dict:
+        credentials = base64.b64encode(f"{self.email}:{self.api_token}".encode()).decode()
+        headers = {"Authorization": f"Basic {credentials}", "Accept": "application/json"}
+        client = get_http_client()
+        response = await client.get(f"{self.base_url.rstrip('/')}{path}", headers=headers, params=params)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,218 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, tzinfo
+from typing import Iterable, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from backend.models.task_model import Task
+from backend.storage.ticket_store import TicketStore, ticket_store
+from backend.utils.jira_api import JiraClient
+
+# Delta queries reach back this far before the newest update already seen.
+# JQL only has minute resolution and upserts are idempotent, so overlap is
+# harmless.
+SYNC_OVERLAP = timedelta(minutes=1)
+
+STATUS_CATEGORY_TO_TASK = {"new": "todo", "indeterminate": "in_progress", "done": "done"}
+PRIORITY_TO_TASK = {"highest": "high", "high": "high", "medium": "medium", "low": "low", "lowest": "low"}
+
+
+class JiraSyncEngine:
+    """Keeps a local TicketStore in step with Jira.
+
+    The first run imports every issue matching the configured JQL. Later
+    runs only ask for issues updated since the newest ``updated`` time seen
+    so far, so traffic is proportional to the number of changes. That
+    cursor comes from Jira's clock rather than ours, and JQL reads dates in
+    the API user's time zone, so it is written in the zone /myself reports.
+    Every ``full_sync_every`` polls
+    a full import runs again to drop issues that were deleted or moved out
+    of the query. Pages after the first are fetched concurrently, at most
+    ``concurrency`` at a time.
+    """
+
+    def __init__(
+        self,
+        client: JiraClient,
+        store: TicketStore,
+        jql: str,
+        page_size: int = 100,
+        concurrency: int = 4,
+        interval: float = 60.0,
+        full_sync_every: int = 60,
+    ):
+        self.client = client
+        self.store = store
+        self.jql = jql
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.interval = interval
+        self.full_sync_every = full_sync_every
+        self.last_sync: Optional[datetime] = None
+        # Newest issue update seen, and the zone JQL dates are read in
+        self.cursor: Optional[datetime] = None
+        self.timezone: Optional[tzinfo] = None
+        self.last_result: Optional[dict] = None
+        self._polls_since_full = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def configured(self) -> bool:
+        return self.client.configured
+
+    async def sync_once(self) -> dict:
+        """Run one full or delta sync and return a summary of it"""
+        full = self.cursor is None or self._polls_since_full >= self.full_sync_every
+        started = datetime.now()
+        requests_made = 0
+        if full:
+            jql = self.jql
+        else:
+            if self.timezone is None:
+                self.timezone = await self._jira_timezone()
+                requests_made += 1
+            since = jql_date(self.cursor - SYNC_OVERLAP, self.timezone)
+            jql = f'({self.jql}) AND updated >= "{since}"'
+
+        issues, pages = await self._fetch_all(f"{jql} ORDER BY key ASC")
+        requests_made += pages
+        tickets = [issue_to_ticket(issue) for issue in issues]
+        for ticket in tickets:
+            self.store.upsert(ticket)
+
+        if full:
+            self.store.retain({t["id"] for t in tickets})
+            self._polls_since_full = 0
+        else:
+            self._polls_since_full += 1
+        self.cursor = latest_update(tickets, self.cursor)
+        self.last_sync = started
+        self.last_result = {
+            "full": full,
+            "fetched": len(tickets),
+            "requests": requests_made,
+            "finished_at": datetime.now().isoformat(),
+        }
+        return self.last_result
+
+    def start(self):
+        """Start the background polling loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "configured": self.configured,
+            "running": self._task is not None and not self._task.done(),
+            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+            "cursor": self.cursor.isoformat() if self.cursor else None,
+            "last_result": self.last_result,
+            "tickets": len(self.store),
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                print(f"Warning: Jira sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _jira_timezone(self) -> Optional[tzinfo]:
+        """The API user's time zone, or None to fall back on the offset of the cursor"""
+        try:
+            name = (await self.client.myself()).get("timeZone")
+            return ZoneInfo(name) if name else None
+        except ZoneInfoNotFoundError as e:
+            print(f"Warning: Unknown Jira time zone: {e}")
+        except Exception as e:
+            print(f"Warning: Could not read the Jira user's time zone: {e}")
+        return None
+
+    async def _fetch_all(self, jql: str):
+        first = await self.client.search(jql, 0, self.page_size)
+        issues: List[dict] = list(first.get("issues", []))
+        starts = range(len(issues), first.get("total", 0), self.page_size) if issues else ()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_page(start_at: int) -> List[dict]:
+            async with semaphore:
+                page = await self.client.search(jql, start_at, self.page_size)
+                return page.get("issues", [])
+
+        for page in await asyncio.gather(*(fetch_page(s) for s in starts)):
+            issues.extend(page)
+        return issues, 1 + len(starts)
+
+
+def jql_date(moment: datetime, zone: Optional[tzinfo]) -> str:
+    """Format an aware datetime the way JQL compares dates, in ``zone``"""
+    if zone is not None:
+        moment = moment.astimezone(zone)
+    return moment.strftime("%Y/%m/%d %H:%M")
+
+
+def latest_update(tickets: Iterable[dict], since: Optional[datetime] = None) -> Optional[datetime]:
+    """The newest ``updated`` time among tickets, or ``since`` if that is newer"""
+    latest = since
+    for ticket in tickets:
+        try:
+            updated = datetime.fromisoformat(ticket["updated"])
+        except (TypeError, ValueError):
+            continue
+        if updated.tzinfo is not None and (latest is None or updated > latest):
+            latest = updated
+    return latest
+
+
+def issue_to_ticket(issue: dict) -> dict:
+    """Flatten a Jira search result issue into the dashboard's ticket shape"""
+    fields = issue.get("fields", {})
+    status = fields.get("status") or {}
+    priority = fields.get("priority") or {}
+    return {
+        "id": issue["key"],
+        "issue_id": int(issue["id"]),
+        "title": fields.get("summary", ""),
+        "status": status.get("name", ""),
+        "status_category": (status.get("statusCategory") or {}).get("key", "new"),
+        "priority": priority.get("name", ""),
+        "labels": fields.get("labels", []),
+        "created": fields.get("created"),
+        "updated": fields.get("updated"),
+    }
+
+
+def ticket_to_task(ticket: dict) -> Task:
+    """Represent a synced ticket as a dashboard Task"""
+    return Task(
+        id=ticket["issue_id"],
+        title=f"{ticket['id']}: {ticket['title']}",
+        status=STATUS_CATEGORY_TO_TASK.get(ticket["status_category"], "todo"),
+        priority=PRIORITY_TO_TASK.get(ticket["priority"].lower(), "medium"),
+        category="work",
+        tags=["jira", *ticket["labels"]],
+        created_at=ticket["created"] or ticket["updated"] or "",
+        updated_at=ticket["updated"] or "",
+    )
+
+
+# Global instance
+jira_sync = JiraSyncEngine(
+    JiraClient(),
+    ticket_store,
+    jql=os.getenv("JIRA_JQL", "assignee = currentUser()"),
+    page_size=int(os.getenv("JIRA_PAGE_SIZE", "100")),
+    concurrency=int(os.getenv("JIRA_SYNC_CONCURRENCY", "4")),
+    interval=float(os.getenv("JIRA_SYNC_INTERVAL", "60")),
+    full_sync_every=int(os.getenv("JIRA_FULL_SYNC_EVERY", "60")),
+)
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, List, Sequence, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_bytes(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def model_list_bytes(model: Type[BaseModel], items: Sequence[BaseModel]) -> bytes:
+    """Serialize models that are already built, without validating them again"""
+    return _list_adapter(model).dump_json(items)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; returning one from a route also skips jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return json_bytes(content)
+
+
+class RawJSONResponse(JSONResponse):
+    """A response whose body is JSON bytes that were serialized earlier"""
+
+    def render(self, content: bytes) -> bytes:
+        return content
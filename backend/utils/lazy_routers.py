@@ -0,0 +1,67 @@
+import importlib
+import sys
+from types import ModuleType
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI
+
+# Pages describing the whole API, which need every router
+SCHEMA_PATHS = ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc")
+
+
+class LazyRouters:
+    """Includes each router in the app on the first request under its prefix.
+
+    Importing a router pulls in its models, stores and clients, so a cold
+    serverless instance only pays for the routers its requests reach.
+    ``routers`` maps a module name in ``package`` to its URL prefix and
+    OpenAPI tag; the schema and docs pages load them all.
+    """
+
+    def __init__(self, app: FastAPI, routers: Dict[str, Tuple[str, str]], package: str = "backend.routes"):
+        self.app = app
+        self.routers = routers
+        self.package = package
+        self._included: Dict[str, ModuleType] = {}
+
+    def load(self, name: str) -> ModuleType:
+        module = self._included.get(name)
+        if module is None:
+            prefix, tag = self.routers[name]
+            module = importlib.import_module(f"{self.package}.{name}")
+            self.app.include_router(module.router, prefix=prefix, tags=[tag])
+            self.app.openapi_schema = None
+            self._included[name] = module
+        return module
+
+    def load_all(self):
+        for name in self.routers:
+            self.load(name)
+
+    def load_for(self, path: str):
+        """Include whichever routers could serve ``path``"""
+        if len(self._included) == len(self.routers):
+            return
+        if path in SCHEMA_PATHS:
+            self.load_all()
+            return
+        for name, (prefix, _) in self.routers.items():
+            if name not in self._included and (path == prefix or path.startswith(prefix + "/")):
+                self.load(name)
+
+    def imported(self, name: str) -> Optional[ModuleType]:
+        """The module if anything has imported it yet, router included or not"""
+        return sys.modules.get(f"{self.package}.{name}")
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware loading the routers a request needs before the app routes it"""
+
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            self.routers.load_for(scope["path"])
+        await self.app(scope, receive, send)
@@ -0,0 +1,283 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers a cached read up to a slow upstream call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination; labels are passed positionally"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label combination.
+
+    Each observation bumps a single bucket; buckets are only made
+    cumulative when rendered, so recording costs one bisect and three
+    additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics rendered together in the Prometheus text format.
+
+    Besides metrics updated as things happen, a registry has collectors:
+    callables run at scrape time that read numbers other components
+    already keep, such as cache statistics or queue depths, so those cost
+    nothing between scrapes.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Samples]]]):
+        """Add a callable yielding (name, type, help, samples) at every scrape"""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                print(f"Warning: Metrics collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_duration = registry.histogram("http_request_duration_seconds", "Time to handle an HTTP request", ("method", "route"))
+http_response_size = registry.histogram("http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled, including open streams")
+outbound_requests = registry.counter("outbound_requests_total", "Calls to external services", ("service", "operation", "outcome"))
+outbound_duration = registry.histogram("outbound_request_duration_seconds", "Time spent in calls to external services", ("service", "operation"))
+loop_lag = registry.histogram("event_loop_lag_seconds", "How late the event loop woke a sleeping task", (), LATENCY_BUCKETS)
+
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """Export a cache's stats(); hits, stale_hits, misses and coalesced are read if present"""
+    _caches[name] = cache
+
+
+@registry.collector
+def _collect_caches():
+    lookups: Samples = []
+    ratios: Samples = []
+    for name, cache in _caches.items():
+        stats = cache.stats()
+        hits = stats.get("hits", 0) + stats.get("stale_hits", 0)
+        total = 0
+        for result in ("hits", "stale_hits", "misses", "coalesced"):
+            if result in stats:
+                lookups.append(({"cache": name, "result": result}, stats[result]))
+                total += stats[result]
+        ratios.append(({"cache": name}, hits / total if total else 0.0))
+    yield "cache_lookups_total", "counter", "Cache lookups by result", lookups
+    yield "cache_hit_ratio", "gauge", "Share of lookups answered from cache", ratios
+
+
+def timed(service: str, operation: str):
+    """Record latency and outcome of an async call to an external service"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                # Clients that hand back the response leave the status to the caller
+                outcome = "error" if getattr(result, "status_code", 200) >= 400 else "ok"
+                return result
+            finally:
+                outbound_duration.observe(time.perf_counter() - start, service, operation)
+                outbound_requests.inc(service, operation, outcome)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and size for every HTTP request.
+
+    Routes are labelled with their path template (``/api/tasks/{task_id}``)
+    so the number of series stays bounded; requests that match no route
+    share the ``unmatched`` label. Written against raw ASGI rather than
+    BaseHTTPMiddleware so streaming responses pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            # The router fills in the matched route on the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_duration.observe(time.perf_counter() - start, method, path)
+            http_response_size.observe(size, method, path)
+            http_requests.inc(method, path, str(status))
+
+
+class LoopLagMonitor:
+    """Samples event loop lag: how much later than asked a sleep returns"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            loop_lag.observe(max(0.0, time.perf_counter() - start - self.interval))
+
+
+loop_lag_monitor = LoopLagMonitor()
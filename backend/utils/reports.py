@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import os
+import time
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from backend.models.integration_model import Integration
+from backend.storage import focus_store, integration_store, task_store
+from backend.utils.slack_notify import SlackDispatcher, slack_dispatcher
+
+
+def server_day(day: date, zone: Optional[tzinfo] = None) -> Tuple[str, str]:
+    """Start and end of ``day`` in ``zone`` (default: the server's) as server time ISO timestamps.
+
+    Tasks and sessions are stamped with the server's naive local time, so
+    that is what a user's day has to be compared in.
+    """
+    if zone is None:
+        return day.isoformat(), (day + timedelta(days=1)).isoformat()
+    start = datetime.combine(day, datetime.min.time(), zone)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time(), zone)
+    return start.astimezone().replace(tzinfo=None).isoformat(), end.astimezone().replace(tzinfo=None).isoformat()
+
+
+async def build_report(user_id: Optional[str], day: date, zone: Optional[tzinfo] = None) -> dict:
+    """A user's end of day report for ``day`` in ``zone`` (default: the server's), from the done-task index and focus sessions"""
+    start, end = server_day(day, zone)
+    done, _ = await task_store.tenant(user_id).query(status="done", updated_since=start)
+    focus = await focus_store.tenant(user_id).stats_between(start, end)
+    return {
+        "date": day.isoformat(),
+        "tasks_completed": sum(1 for t in done if t.updated_at < end),
+        "focus_minutes": focus.total_minutes,
+        "focus_sessions": focus.total_sessions,
+    }
+
+
+def report_schedule(integration: Integration) -> Optional[Tuple[int, int, ZoneInfo]]:
+    """(hour, minute, zone) of an integration's daily report, or None if it has none"""
+    config = integration.config or {}
+    if integration.type != "slack" or not integration.enabled or not config.get("webhook_url"):
+        return None
+    try:
+        hour, minute = (int(part) for part in str(config.get("report_time") or "").split(":"))
+        zone = ZoneInfo(config.get("timezone") or "UTC")
+    except (ValueError, ZoneInfoNotFoundError):
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour, minute, zone
+
+
+def next_report_time(hour: int, minute: int, zone: ZoneInfo, after: datetime) -> datetime:
+    """First hour:minute in ``zone`` strictly after ``after``"""
+    local = after.astimezone(zone)
+    due = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if due <= local:
+        due = datetime.combine(local.date() + timedelta(days=1), due.timetz())
+    return due
+
+
+class ReportScheduler:
+    """Sends each user's end of day report to Slack at their local report time.
+
+    A user schedules a report by giving an enabled Slack integration a
+    ``report_time`` (``HH:MM``) and optionally a ``timezone`` (IANA name,
+    default UTC). Due times sit in a heap, so each tick touches only the
+    reports that are due. Those are built ``concurrency`` at a time and
+    handed to the Slack dispatcher, which waits for room in its queue
+    instead of dropping reports, rate limits the sends and delivers each
+    one independently, so a slow webhook delays no one else's report.
+
+    Every worker process runs its own scheduler, and the routes that
+    change an integration only reschedule it in the worker that served
+    them. So a due report's integration is read again from the store
+    before it is sent, each report day is claimed in the store so only
+    one worker sends it, and schedules are reloaded every
+    ``reload_interval`` seconds to pick up integrations added elsewhere.
+    """
+
+    def __init__(
+        self,
+        dispatcher: SlackDispatcher,
+        interval: float = 30.0,
+        concurrency: int = 50,
+        reload_interval: float = 300.0,
+    ):
+        self.dispatcher = dispatcher
+        self.interval = interval
+        self.concurrency = concurrency
+        self.reload_interval = reload_interval
+        # (due timestamp, integration id, generation); stale generations are skipped
+        self._heap: List[Tuple[float, int, int]] = []
+        self._scheduled: Dict[int, Tuple[int, Tuple[int, int, ZoneInfo]]] = {}
+        self._generation = 0
+        self.sent = 0
+        self.failed = 0
+        self.claimed_elsewhere = 0
+        self.last_run: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, integration: Integration, after: Optional[datetime] = None):
+        """(Re)schedule an integration's next report, or drop it if it no longer has one"""
+        schedule = report_schedule(integration)
+        if schedule is None:
+            self.forget(integration.id)
+            return
+        self._generation += 1
+        self._scheduled[integration.id] = (self._generation, schedule)
+        due = next_report_time(*schedule, after or datetime.now(timezone.utc))
+        heapq.heappush(self._heap, (due.timestamp(), integration.id, self._generation))
+
+    def forget(self, integration_id: int):
+        self._scheduled.pop(integration_id, None)
+
+    async def load(self):
+        """Schedule every user's reports from the integration store.
+
+        Reports whose schedule is unchanged keep their place in the heap,
+        and ones whose integration is gone are dropped.
+        """
+        integrations = await integration_store.all_records()
+        for integration in integrations:
+            entry = self._scheduled.get(integration.id)
+            if entry is None or entry[1] != report_schedule(integration):
+                self.schedule(integration)
+        stored = {integration.id for integration in integrations}
+        for integration_id in [i for i in self._scheduled if i not in stored]:
+            self.forget(integration_id)
+
+    async def run_due(self, now: Optional[float] = None) -> int:
+        """Build and queue every report due by ``now``; returns how many were queued"""
+        now = now if now is not None else time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, integration_id, generation = heapq.heappop(self._heap)
+            entry = self._scheduled.get(integration_id)
+            if entry is not None and entry[0] == generation:
+                due.append((timestamp, integration_id))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(timestamp: float, integration_id: int) -> int:
+            async with semaphore:
+                try:
+                    # Another worker may have changed, disabled or deleted it since it was scheduled here
+                    integration = await integration_store.find(integration_id)
+                    schedule = report_schedule(integration) if integration is not None else None
+                    if schedule is None:
+                        self.forget(integration_id)
+                        return 0
+                    when = next_report_time(*schedule, datetime.fromtimestamp(timestamp - 1, timezone.utc))
+                    if when.timestamp() > now:
+                        self.schedule(integration, after=when - timedelta(seconds=1))
+                        return 0
+                    day = when.astimezone(schedule[2]).date()
+                    if not await integration_store.unscoped.claim_report(integration_id, day.isoformat()):
+                        self.claimed_elsewhere += 1
+                        self.schedule(integration, after=when)
+                        return 0
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Warning: End of day report for integration {integration_id} failed: {e}")
+                    self._retry(timestamp, integration_id)
+                    return 0
+                try:
+                    report = await build_report(integration.user_id, day, schedule[2])
+                    payload = self.dispatcher.notifier.build_end_of_day_payload(report)
+                    await self.dispatcher.enqueue(payload, integration.config["webhook_url"])
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Warning: End of day report for integration {integration_id} failed: {e}")
+                self.schedule(integration, after=when)
+                return 1
+
+        queued = await asyncio.gather(*(send(timestamp, integration_id) for timestamp, integration_id in due))
+        self.last_run = datetime.now().isoformat()
+        return sum(queued)
+
+    def _retry(self, timestamp: float, integration_id: int):
+        """Look at a report again next tick, when reading or claiming it failed"""
+        entry = self._scheduled.get(integration_id)
+        if entry is not None:
+            heapq.heappush(self._heap, (timestamp, integration_id, entry[0]))
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self._scheduled),
+            "next_due": datetime.fromtimestamp(self._heap[0][0], timezone.utc).isoformat() if self._heap else None,
+            "sent": self.sent,
+            "failed": self.failed,
+            "claimed_elsewhere": self.claimed_elsewhere,
+            "last_run": self.last_run,
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loaded = None
+        while True:
+            if loaded is None or time.monotonic() - loaded >= self.reload_interval:
+                try:
+                    await self.load()
+                    loaded = time.monotonic()
+                except Exception as e:
+                    print(f"Warning: Loading report schedules failed: {e}")
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_due()
+            except Exception as e:
+                print(f"Warning: End of day reports failed: {e}")
+
+
+# Global instance
+report_scheduler = ReportScheduler(
+    slack_dispatcher,
+    interval=float(os.getenv("REPORT_TICK_SECONDS", "30")),
+    concurrency=int(os.getenv("REPORT_CONCURRENCY", "50")),
+    reload_interval=float(os.getenv("REPORT_RELOAD_SECONDS", "300")),
+)
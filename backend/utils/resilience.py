@@ -0,0 +1,407 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from backend.utils.metrics import registry
+
+# Consecutive failures that open an upstream's circuit, and how long it
+# stays open before one trial call is let through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Calls are cut off at this multiple of the upstream's recent p99 latency,
+# but never sooner than the floor
+OUTBOUND_TIMEOUT_MULTIPLIER = float(os.getenv("OUTBOUND_TIMEOUT_MULTIPLIER", "3"))
+OUTBOUND_TIMEOUT_FLOOR = float(os.getenv("OUTBOUND_TIMEOUT_FLOOR_SECONDS", "1"))
+# Calls in flight per upstream, and how many more may wait for a slot
+OUTBOUND_MAX_CONCURRENCY = int(os.getenv("OUTBOUND_MAX_CONCURRENCY", "10"))
+OUTBOUND_MAX_WAITING = int(os.getenv("OUTBOUND_MAX_WAITING", "50"))
+# Per-destination policies kept for services users point at their own URLs
+OUTBOUND_MAX_KEYS = int(os.getenv("OUTBOUND_MAX_KEYS", "1000"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# How soon a caller turned away while a half-open trial is running should try again
+TRIAL_RETRY_SECONDS = 1.0
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised when a call is refused or cut off; ``retry_after`` hints when to try again, in seconds"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def upstream_failed(error: BaseException) -> bool:
+    """Whether an error means the upstream is unhealthy, rather than that it refused this one request.
+
+    Errors carrying an HTTP status count when it is a 5xx. Otherwise only
+    network errors and timeouts count, not errors raised by the caller's
+    own handling of a response.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status >= 500
+    return isinstance(error, (httpx.TransportError, OSError, asyncio.TimeoutError, UpstreamUnavailableError))
+
+
+class CircuitBreaker:
+    """Stops calls to an upstream after ``failure_threshold`` consecutive failures.
+
+    While open, calls are refused for ``reset_timeout`` seconds. Then it is
+    half open and lets a single trial call through: success closes it,
+    failure opens it again for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._trial = False
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; a half-open breaker lets one through until it reports back"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self._trial:
+            return False
+        self._state = HALF_OPEN
+        self._trial = True
+        return True
+
+    def succeeded(self):
+        self._state = CLOSED
+        self._trial = False
+        self.failures = 0
+
+    def failed(self):
+        self.failures += 1
+        self._trial = False
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.times_opened += 1
+            self._state = OPEN
+            self.opened_at = self._clock()
+
+    def abandon(self):
+        """Forget an allowed call that ended without telling anything about the upstream"""
+        self._trial = False
+
+    def retry_after(self) -> float:
+        state = self.state
+        if state == OPEN:
+            return max(0.0, self.opened_at + self.reset_timeout - self._clock())
+        return TRIAL_RETRY_SECONDS if state == HALF_OPEN else 0.0
+
+
+class AdaptiveTimeout:
+    """Timeout following an upstream's latency: ``multiplier`` times the p99 of the last ``window`` calls.
+
+    It stays within [``floor``, ``ceiling``] and is the ceiling until
+    ``min_samples`` calls have been timed. A call that times out counts as
+    taking the whole timeout, so a lasting slowdown raises the timeout
+    instead of failing every call.
+    """
+
+    def __init__(self, ceiling: float, floor: float = 1.0, multiplier: float = 3.0, window: int = 200, min_samples: int = 20):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.value = ceiling
+        self.p99: Optional[float] = None
+        self._samples = deque(maxlen=window)
+        self._unsorted = 0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self._unsorted += 1
+        # Sorting the window on every call is wasted work; every tenth is plenty
+        if len(self._samples) >= self.min_samples and (self._unsorted >= 10 or self.p99 is None):
+            ordered = sorted(self._samples)
+            self.p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            self.value = min(self.ceiling, max(self.floor, self.p99 * self.multiplier))
+            self._unsorted = 0
+
+
+class Upstream:
+    """Circuit breaker, adaptive timeout and bulkhead for one external service.
+
+    A call is refused straight away while the circuit is open, or when
+    ``max_concurrency`` calls are in flight and ``max_waiting`` more are
+    already queued for a slot (None queues without limit). Admitted calls
+    are cut off at the adaptive timeout. Calls given a ``fallback`` key
+    remember their last good result and return it instead of failing
+    while the upstream is down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ceiling: float,
+        max_concurrency: int = 10,
+        max_waiting: Optional[int] = 50,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timeout_floor: float = 1.0,
+        timeout_multiplier: float = 3.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self.timeout = AdaptiveTimeout(ceiling, timeout_floor, timeout_multiplier)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = {"circuit_open": 0, "bulkhead_full": 0, "timeout": 0}
+        self.fallbacks = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[str] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._last_good: Dict[str, Any] = {}
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, fallback: Optional[str] = None, **kwargs) -> Any:
+        """Await ``fn(*args, **kwargs)`` under this upstream's breaker, bulkhead and timeout"""
+        try:
+            result = await self._guarded(fn, args, kwargs)
+        except Exception as e:
+            if fallback is not None and fallback in self._last_good and upstream_failed(e):
+                self.fallbacks += 1
+                return self._last_good[fallback]
+            raise
+        if fallback is not None:
+            self._last_good[fallback] = result
+        return result
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+            "retry_after": round(self.breaker.retry_after(), 1),
+            "timeout": round(self.timeout.value, 3),
+            "p99_ms": round(self.timeout.p99 * 1000, 1) if self.timeout.p99 is not None else None,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "rejected": dict(self.rejected),
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at,
+        }
+
+    async def _guarded(self, fn, args, kwargs) -> Any:
+        if not self.breaker.allow():
+            self.rejected["circuit_open"] += 1
+            raise UpstreamUnavailableError(f"{self.name} circuit is open", self.breaker.retry_after())
+        try:
+            await self._acquire()
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        timeout = self.timeout.value
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            self.rejected["timeout"] += 1
+            self.timeout.observe(timeout)
+            error = UpstreamUnavailableError(f"{self.name} did not answer within {timeout:.2f}s")
+            self._failed(error)
+            raise error
+        except Exception as e:
+            if upstream_failed(e):
+                self._failed(e)
+            else:
+                # It answered, if only to refuse this request
+                self.timeout.observe(time.perf_counter() - start)
+                self.breaker.succeeded()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        finally:
+            self._release()
+
+        self.timeout.observe(time.perf_counter() - start)
+        # Clients that hand back the response leave the status to the caller
+        if getattr(result, "status_code", 200) >= 500:
+            self._failed(f"HTTP {result.status_code}")
+        else:
+            self.breaker.succeeded()
+        return result
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._slots.locked() and self.max_waiting is not None and self.waiting >= self.max_waiting:
+            self.rejected["bulkhead_full"] += 1
+            raise UpstreamUnavailableError(f"{self.name} has {self.in_flight} calls in flight and {self.waiting} waiting")
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    def _failed(self, error):
+        self.breaker.failed()
+        self.last_error = str(error) or type(error).__name__
+        self.last_failure_at = datetime.now().isoformat()
+
+
+class UpstreamPool:
+    """A separate Upstream per destination of one service.
+
+    For services such as Slack webhooks, where each user supplies their
+    own URL, one user's failing or hanging destination must only open its
+    own breaker and fill its own bulkhead. Destinations are named by a
+    digest of their key, so status and errors never show the URL. At most
+    ``max_keys`` are kept; the least recently used idle ones are dropped.
+    """
+
+    def __init__(self, name: str, ceiling: float, max_keys: int = 1000, **options):
+        self.name = name
+        self.ceiling = ceiling
+        self.max_keys = max_keys
+        self.options = options
+        self._upstreams: "OrderedDict[str, Upstream]" = OrderedDict()
+        # Counts of dropped destinations, so the totals never go down
+        self._retired = {"times_opened": 0, "fallbacks": 0, "rejected": {"circuit_open": 0, "bulkhead_full": 0, "timeout": 0}}
+
+    def get(self, key: str) -> Upstream:
+        existing = self._upstreams.get(key)
+        if existing is not None:
+            self._upstreams.move_to_end(key)
+            return existing
+        digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+        created = self._upstreams[key] = Upstream(f"{self.name}:{digest}", self.ceiling, **self.options)
+        self._evict()
+        return created
+
+    def upstreams(self) -> List[Upstream]:
+        return list(self._upstreams.values())
+
+    def status(self) -> dict:
+        upstreams = self.upstreams()
+        states = [u.breaker.state for u in upstreams]
+        rejected = dict(self._retired["rejected"])
+        for u in upstreams:
+            for reason, count in u.rejected.items():
+                rejected[reason] += count
+        return {
+            "name": self.name,
+            "destinations": len(upstreams),
+            "open": states.count(OPEN),
+            "half_open": states.count(HALF_OPEN),
+            "times_opened": self._retired["times_opened"] + sum(u.breaker.times_opened for u in upstreams),
+            "in_flight": sum(u.in_flight for u in upstreams),
+            "waiting": sum(u.waiting for u in upstreams),
+            "rejected": rejected,
+            "fallbacks": self._retired["fallbacks"] + sum(u.fallbacks for u in upstreams),
+        }
+
+    def _evict(self):
+        excess = len(self._upstreams) - self.max_keys
+        if excess <= 0:
+            return
+        for key in [k for k, u in self._upstreams.items() if not (u.in_flight or u.waiting)][:excess]:
+            dropped = self._upstreams.pop(key)
+            self._retired["times_opened"] += dropped.breaker.times_opened
+            self._retired["fallbacks"] += dropped.fallbacks
+            for reason, count in dropped.rejected.items():
+                self._retired["rejected"][reason] += count
+
+
+_upstreams: Dict[str, Upstream] = {}
+_pools: Dict[str, UpstreamPool] = {}
+
+
+def _defaults(options: dict) -> dict:
+    defaults = {
+        "max_concurrency": OUTBOUND_MAX_CONCURRENCY,
+        "max_waiting": OUTBOUND_MAX_WAITING,
+        "failure_threshold": CIRCUIT_FAILURE_THRESHOLD,
+        "reset_timeout": CIRCUIT_RESET_SECONDS,
+        "timeout_floor": OUTBOUND_TIMEOUT_FLOOR,
+        "timeout_multiplier": OUTBOUND_TIMEOUT_MULTIPLIER,
+    }
+    return {**defaults, **options}
+
+
+def upstream(name: str, ceiling: float, **options) -> Upstream:
+    """The shared policy for an external service, created with the configured defaults on first use"""
+    existing = _upstreams.get(name)
+    if existing is not None:
+        return existing
+    created = _upstreams[name] = Upstream(name, ceiling, **_defaults(options))
+    return created
+
+
+def upstream_pool(name: str, ceiling: float, **options) -> UpstreamPool:
+    """Per-destination policies for a service, created with the configured defaults on first use"""
+    existing = _pools.get(name)
+    if existing is not None:
+        return existing
+    created = _pools[name] = UpstreamPool(name, ceiling, OUTBOUND_MAX_KEYS, **_defaults(options))
+    return created
+
+
+def upstream_status() -> List[dict]:
+    """Breaker, timeout and bulkhead state of every upstream, by name; pools are summed over their destinations"""
+    services = {**_upstreams, **_pools}
+    return [services[name].status() for name in sorted(services)]
+
+
+@registry.collector
+def _collect_upstreams():
+    states = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    upstreams = [(u, {"upstream": u.name}) for u in _upstreams.values()]
+    # A pool's destinations are summed under the pool's name
+    pools = [(pool.status(), {"upstream": pool.name}) for pool in _pools.values()]
+    yield "circuit_state", "gauge", "Circuit breaker state: 0 closed, 1 half open, 2 open", [
+        (labels, states[u.breaker.state]) for u, labels in upstreams
+    ]
+    yield "circuits_open", "gauge", "Destinations of a pooled upstream whose circuit is open", [
+        (labels, status["open"]) for status, labels in pools
+    ]
+    yield "circuit_opened_total", "counter", "Times a circuit breaker opened", [
+        (labels, u.breaker.times_opened) for u, labels in upstreams
+    ] + [(labels, status["times_opened"]) for status, labels in pools]
+    yield "outbound_timeout_seconds", "gauge", "Current adaptive timeout for calls to an upstream", [
+        (labels, u.timeout.value) for u, labels in upstreams
+    ]
+    yield "outbound_in_flight", "gauge", "Calls in flight to an upstream", [
+        (labels, u.in_flight) for u, labels in upstreams
+    ] + [(labels, status["in_flight"]) for status, labels in pools]
+    yield "outbound_rejected_total", "counter", "Calls refused by a breaker or bulkhead, or cut off by the timeout", [
+        ({**labels, "reason": reason}, count) for u, labels in upstreams for reason, count in u.rejected.items()
+    ] + [({**labels, "reason": reason}, count) for status, labels in pools for reason, count in status["rejected"].items()]
+    yield "outbound_fallbacks_total", "counter", "Last known good results served while an upstream failed", [
+        (labels, u.fallbacks) for u, labels in upstreams
+    ] + [(labels, status["fallbacks"]) for status, labels in pools]
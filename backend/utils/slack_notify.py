@@ -1,24 +1,40 @@
+import asyncio
 import os
-import requests
-import json
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from backend.utils.http_client import PUBLIC_ONLY, get_http_client
+from backend.utils.metrics import timed
+from backend.utils.resilience import UpstreamUnavailableError, upstream_pool
+
 
 class SlackNotifier:
     def __init__(self):
         self.webhook_url = os.getenv("SLACK_WEBHOOK_URL", "")
-    
-    def send_end_of_day_report(self, report: dict):
-        """Send end of day report to Slack"""
-        if not self.webhook_url:
-            return {"message": "Slack webhook not configured"}
-        
-        payload = {
-            "text": "📊 End of Day Report",
+        self.timeout = float(os.getenv("SLACK_TIMEOUT_SECONDS", "5"))
+        # Users bring their own webhooks: each gets its own breaker, timeout and bulkhead
+        self.upstreams = upstream_pool(
+            "slack", self.timeout, max_concurrency=int(os.getenv("SLACK_MAX_IN_FLIGHT_PER_WEBHOOK", "4")), max_waiting=None
+        )
+
+    @staticmethod
+    def build_end_of_day_payload(report: dict) -> dict:
+        """Build the Slack message for an end of day report"""
+        title = f"📊 End of Day Report — {report['date']}" if report.get("date") else "📊 End of Day Report"
+        return {
+            "text": title,
             "blocks": [
                 {
                     "type": "header",
                     "text": {
                         "type": "plain_text",
-                        "text": "📊 End of Day Report"
+                        "text": title
                     }
                 },
                 {
@@ -36,6 +52,213 @@ class SlackNotifier:
                 }
             ]
         }
-        
-        response = requests.post(self.webhook_url, json=payload)
-        return {"status": "sent", "response": response.status_code}
+
+    @timed("slack", "post")
+    async def post(self, payload: dict, webhook_url: Optional[str] = None) -> httpx.Response:
+        """Post a payload to a Slack webhook: a user's, or the configured one by default"""
+        client = get_http_client()
+        # Users' webhooks may have been stored before they were checked, or re-pointed in DNS since
+        extensions = PUBLIC_ONLY if webhook_url else {}
+        url = webhook_url or self.webhook_url
+        return await self.upstreams.get(url).call(client.post, url, json=payload, timeout=self.timeout, extensions=extensions)
+
+
+class QueueFullError(Exception):
+    """Raised when the delivery queue cannot take more messages"""
+
+
+class SlackDispatcher:
+    """Background delivery queue for Slack messages.
+
+    Messages are accepted into a bounded queue and delivered by a consumer
+    that takes them off in batches and sends each one independently, so a
+    slow or rate limited webhook never holds up the others. Failed sends are
+    retried with exponential backoff and full jitter; a 429 waits for the
+    Retry-After the webhook asked for. New sends start at most
+    ``rate_per_second`` times a second (0 for no limit), in bursts of up to
+    ``burst``.
+    """
+
+    def __init__(
+        self,
+        notifier: SlackNotifier,
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        max_in_flight: int = 20,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        history: int = 10000,
+        rate_per_second: float = 0.0,
+        burst: int = 10,
+    ):
+        self.notifier = notifier
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.history = history
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._allowance = float(burst)
+        self._checked = time.monotonic()
+        self.deliveries: "OrderedDict[str, dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._sending = set()
+
+    def submit(self, payload: dict, webhook_url: Optional[str] = None) -> str:
+        """Queue a message and return its delivery id"""
+        self._ensure_started()
+        delivery = self._new_delivery()
+        try:
+            self._queue.put_nowait((delivery, payload, webhook_url))
+        except asyncio.QueueFull:
+            raise QueueFullError("Slack delivery queue is full")
+        self._remember(delivery)
+        return delivery["id"]
+
+    async def enqueue(self, payload: dict, webhook_url: Optional[str] = None) -> str:
+        """Queue a message, waiting for room when the queue is full, and return its delivery id"""
+        self._ensure_started()
+        delivery = self._new_delivery()
+        await self._queue.put((delivery, payload, webhook_url))
+        self._remember(delivery)
+        return delivery["id"]
+
+    def get(self, delivery_id: str) -> Optional[dict]:
+        return self.deliveries.get(delivery_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def stop(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+        for task in list(self._sending):
+            task.cancel()
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.ensure_future(self._consume())
+
+    async def _consume(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for item in batch:
+                await self._pace()
+                await self._slots.acquire()
+                task = asyncio.ensure_future(self._deliver(*item))
+                self._sending.add(task)
+                task.add_done_callback(self._sent)
+
+    async def _pace(self):
+        """Wait until the rate limit allows another send to start"""
+        if self.rate_per_second <= 0:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.burst, self._allowance + (now - self._checked) * self.rate_per_second)
+        self._checked = now
+        if self._allowance < 1:
+            await asyncio.sleep((1 - self._allowance) / self.rate_per_second)
+            self._allowance = 1.0
+            self._checked = time.monotonic()
+        self._allowance -= 1
+
+    def _sent(self, task: asyncio.Task):
+        self._sending.discard(task)
+        self._slots.release()
+
+    async def _deliver(self, delivery: dict, payload: dict, webhook_url: Optional[str]):
+        while True:
+            delivery["attempts"] += 1
+            self._update(delivery, "sending")
+            delay = None
+            try:
+                response = await self.notifier.post(payload, webhook_url)
+                if response.status_code < 300:
+                    self._update(delivery, "sent")
+                    return
+                delivery["last_error"] = f"HTTP {response.status_code}"
+                if response.status_code == 429:
+                    delay = _retry_after(response)
+                elif response.status_code < 500:
+                    self._update(delivery, "failed")
+                    return
+            except httpx.HTTPError as e:
+                delivery["last_error"] = str(e) or type(e).__name__
+            except UpstreamUnavailableError as e:
+                delivery["last_error"] = str(e)
+                if e.retry_after:
+                    # Refused without reaching Slack: wait for the circuit rather than spend an attempt
+                    delivery["attempts"] -= 1
+                    delay = e.retry_after
+            except Exception as e:
+                # A refused webhook URL or anything unexpected: retrying will not help, and
+                # the delivery must not stay "sending" forever
+                delivery["last_error"] = str(e) or type(e).__name__
+                self._update(delivery, "failed")
+                return
+
+            if delivery["attempts"] >= self.max_attempts:
+                self._update(delivery, "failed")
+                return
+            if delay is None:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** delivery["attempts"]))
+            self._update(delivery, "retrying")
+            # Give the send slot back while waiting, so retries to a broken
+            # webhook never hold up deliveries to the others
+            self._slots.release()
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                await self._slots.acquire()
+
+    def _new_delivery(self) -> dict:
+        return {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "attempts": 0,
+            "last_error": None,
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def _update(self, delivery: dict, status: str):
+        delivery["status"] = status
+        delivery["updated_at"] = datetime.now().isoformat()
+
+    def _remember(self, delivery: dict):
+        self.deliveries[delivery["id"]] = delivery
+        while len(self.deliveries) > self.history:
+            self.deliveries.popitem(last=False)
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "1")))
+    except ValueError:
+        return 1.0
+
+
+# Global instance
+slack_dispatcher = SlackDispatcher(
+    SlackNotifier(),
+    max_queue=int(os.getenv("SLACK_QUEUE_SIZE", "1000")),
+    max_in_flight=int(os.getenv("SLACK_MAX_IN_FLIGHT", "20")),
+    rate_per_second=float(os.getenv("SLACK_RATE_PER_SECOND", "20")),
+    burst=int(os.getenv("SLACK_RATE_BURST", "10")),
+)
@@ -1,44 +1,115 @@
+import asyncio
+import importlib.util
 import os
-from typing import Optional
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
 
-load_dotenv()
+from backend.utils.metrics import outbound_duration, outbound_requests
+from backend.utils.resilience import UpstreamUnavailableError, upstream
+
+# supabase-py is only imported when the first call needs the client: it
+# pulls in several HTTP, auth and realtime packages that would otherwise
+# load on every cold start
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
 
-# Try to import supabase only if available
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    Client = None
 
 class SupabaseClient:
-    def __init__(self):
+    """Async facade over the synchronous supabase-py client.
+
+    supabase-py blocks on I/O, so every call runs on a dedicated, bounded
+    thread pool and goes through the "supabase" upstream's circuit breaker,
+    adaptive timeout and bulkhead. The event loop never waits on Supabase,
+    and at most ``max_concurrency`` calls are in flight; the underlying
+    client keeps its HTTP connections pooled across calls.
+
+    The shared client never holds a user session. Signing in or up stores
+    the session on the client and sends its token with every later query,
+    so those flows use a throwaway client of their own. Logging out goes
+    through the auth admin API, which only accepts the service role key.
+    """
+
+    def __init__(self, supabase_key: Optional[str] = None):
         supabase_url = os.getenv("SUPABASE_URL", "")
-        supabase_key = os.getenv("SUPABASE_ANON_KEY", "")
-        
-        self.enabled = False
-        
-        if not supabase_url or not supabase_key:
-            self.client = None
-            self.enabled = False
-        elif not SUPABASE_AVAILABLE:
-            self.client = None
-            self.enabled = False
+        supabase_key = supabase_key or os.getenv("SUPABASE_ANON_KEY", "")
+        self.timeout = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10"))
+        max_concurrency = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "16"))
+
+        self._url = supabase_url
+        self._key = supabase_key
+        self._service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+        self._client = None
+        self._admin = None
+        self._client_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="supabase")
+        # Storage calls queue for a slot as they always have rather than fail fast
+        self.upstream = upstream("supabase", self.timeout, max_concurrency=max_concurrency, max_waiting=None)
+
+        # Configured and installed; the client itself is created on first use
+        self.enabled = bool(supabase_url and supabase_key) and SUPABASE_AVAILABLE
+        if supabase_url and supabase_key and not SUPABASE_AVAILABLE:
             print("Warning: supabase package not installed")
-        else:
-            try:
-                self.client = create_client(supabase_url, supabase_key)
-                self.enabled = True
-            except Exception as e:
-                print(f"Warning: Failed to initialize Supabase client: {e}")
-                self.client = None
-                self.enabled = False
-    
-    def get_client(self) -> Optional[Client]:
+
+    @property
+    def client(self):
+        """The supabase-py client, created on first access; None if disabled or creation failed"""
+        if self._client is None and self.enabled:
+            # Storage queries read this from pool threads
+            with self._client_lock:
+                if self._client is None and self.enabled:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self):
+        try:
+            return self._new_client()
+        except Exception as e:
+            print(f"Warning: Failed to initialize Supabase client: {e}")
+            self.enabled = False
+            return None
+
+    def _new_client(self, key: Optional[str] = None, **options):
+        from supabase import create_client
+        from supabase.lib.client_options import ClientOptions
+
+        return create_client(self._url, key or self._key, options=ClientOptions(postgrest_client_timeout=self.timeout, **options))
+
+    def _session_client(self):
+        """A client for one sign in or sign up, whose session nobody else sees"""
+        # Nothing should outlive the call: no stored session, no refresh timer
+        return self._new_client(persist_session=False, auto_refresh_token=False)
+
+    def _admin_client(self):
+        """A client with the service role key, created on first use; it never holds a session"""
+        if not self._service_key:
+            raise RuntimeError("Revoking sessions needs SUPABASE_SERVICE_ROLE_KEY")
+        if self._admin is None:
+            with self._client_lock:
+                if self._admin is None:
+                    self._admin = self._new_client(self._service_key, persist_session=False, auto_refresh_token=False)
+        return self._admin
+
+    def get_client(self):
         """Get the Supabase client instance"""
         return self.client
-    
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a blocking supabase-py call on the pool, bounded and with a timeout"""
+        # Storage queries are lambdas; auth calls are named methods
+        name = getattr(fn, "__name__", "<lambda>")
+        operation = "query" if name == "<lambda>" else name.lstrip("_")
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            loop = asyncio.get_running_loop()
+            result = await self.upstream.call(loop.run_in_executor, self._executor, fn, *args)
+            outcome = "ok"
+            return result
+        finally:
+            outbound_duration.observe(time.perf_counter() - start, "supabase", operation)
+            outbound_requests.inc("supabase", operation, outcome)
+
     async def create_user(self, email: str, password: str, name: str) -> dict:
         """Create a new user"""
         if not self.enabled or not self.client:
@@ -47,69 +118,113 @@ class SupabaseClient:
                 "user": {"id": "mock-user-123", "email": email},
                 "session": {"access_token": "mock-token", "token_type": "bearer"}
             }
-        
+
         try:
-            # Create auth user
-            response = self.client.auth.sign_up({
-                "email": email,
-                "password": password
-            })
-            
-            if response.user:
-                # Store additional user info in a custom table
-                user_data = {
-                    "id": response.user.id,
-                    "email": email,
-                    "name": name,
-                    "created_at": "now()"
-                }
-                
-                # Insert into profiles table
-                self.client.table("profiles").insert(user_data).execute()
-                
-                return {
-                    "user": response.user,
-                    "session": response.session
-                }
-            return {"error": "Failed to create user"}
+            return await self.run(self._create_user, email, password, name)
+        except UpstreamUnavailableError as e:
+            return {"error": f"Supabase unavailable: {e}"}
         except Exception as e:
             return {"error": str(e)}
-    
+
     async def login(self, email: str, password: str) -> dict:
-        """Authenticate user"""
+        """Authenticate user and resolve their display name"""
         if not self.enabled or not self.client:
             # Return mock response when Supabase not configured
             return {
                 "user": {"id": "mock-user-123", "email": email},
-                "session": {"access_token": "mock-token", "token_type": "bearer"}
+                "session": {"access_token": "mock-token", "token_type": "bearer"},
+                "name": email.split("@")[0]
             }
-        
+
         try:
-            response = self.client.auth.sign_in_with_password({
-                "email": email,
-                "password": password
-            })
-            return {
-                "user": response.user,
-                "session": response.session
-            }
+            return await self.run(self._login, email, password)
+        except UpstreamUnavailableError as e:
+            return {"error": f"Supabase unavailable: {e}"}
         except Exception as e:
             return {"error": str(e)}
-    
+
     async def get_user(self, access_token: str) -> dict:
         """Get user from access token"""
         if not self.enabled or not self.client:
             # Return mock user when Supabase not configured
-            return {"user": {"id": "mock-user-123", "email": "user@example.com"}}
-        
+            return {"user": {"id": "mock-user-123", "email": "user@example.com", "role": "authenticated"}}
+
         try:
-            # Set the session
-            self.client.auth.set_session(access_token, "")
-            user = self.client.auth.get_user()
-            return {"user": user}
+            # Pass the token explicitly rather than setting it as the shared
+            # client's session, which concurrent requests would race on
+            response = await self.run(self.client.auth.get_user, access_token)
+            user = response.user
+            return {"user": {"id": user.id, "email": user.email, "role": user.role}}
+        except UpstreamUnavailableError as e:
+            return {"error": f"Supabase unavailable: {e}"}
         except Exception as e:
             return {"error": str(e)}
 
+    async def logout(self, access_token: str):
+        """Revoke the session the access token belongs to"""
+        if self.enabled and self.client:
+            await self.run(self._logout, access_token)
+
+    def _create_user(self, email: str, password: str, name: str) -> dict:
+        client = self._session_client()
+        response = client.auth.sign_up({
+            "email": email,
+            "password": password,
+            # Keep the name on the auth user so login can read it without a
+            # separate profiles query
+            "options": {"data": {"name": name}}
+        })
+
+        if not response.user:
+            return {"error": "Failed to create user"}
+
+        # Store additional user info in a custom table
+        user_data = {
+            "id": response.user.id,
+            "email": email,
+            "name": name,
+            "created_at": "now()"
+        }
+
+        # Insert into profiles table, as the new user when signed in
+        client.table("profiles").insert(user_data).execute()
+
+        return {
+            "user": {"id": response.user.id, "email": response.user.email},
+            "session": _session_dict(response.session)
+        }
+
+    def _login(self, email: str, password: str) -> dict:
+        client = self._session_client()
+        response = client.auth.sign_in_with_password({
+            "email": email,
+            "password": password
+        })
+        user = response.user
+        name = (user.user_metadata or {}).get("name")
+        if not name:
+            # Accounts created before the name was kept in user metadata
+            try:
+                profile = client.table("profiles").select("name").eq("id", user.id).execute()
+                name = profile.data[0]["name"] if profile.data else user.email
+            except Exception:
+                name = user.email
+        return {
+            "user": {"id": user.id, "email": user.email},
+            "session": _session_dict(response.session),
+            "name": name
+        }
+
+    def _logout(self, access_token: str):
+        # Stateless: signs out the token's session, not the admin client's
+        self._admin_client().auth.admin.sign_out(access_token)
+
+
+def _session_dict(session) -> Optional[dict]:
+    if session is None:
+        return None
+    return {"access_token": session.access_token, "token_type": session.token_type}
+
+
 # Global instance
 supabase_client = SupabaseClient()
-
@@ -0,0 +1,193 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query
+
+from backend.utils.http_client import get_http_client
+from backend.utils.metrics import register_cache
+from backend.utils.supabase_client import supabase_client
+
+HMAC_ALGORITHMS = ["HS256"]
+JWKS_ALGORITHMS = ["RS256", "ES256"]
+
+
+class InvalidTokenError(Exception):
+    """Raised when an access token cannot be verified"""
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens without a round-trip per request.
+
+    Tokens are checked locally against the project's JWT secret (HS256) or
+    its published JWKS, which is cached for ``jwks_ttl`` seconds. Verified
+    claims are kept in an LRU until the token expires. Only when no key
+    material is configured does verification fall back to asking Supabase.
+    """
+
+    def __init__(
+        self,
+        secret: str = "",
+        jwks_url: str = "",
+        audience: str = "authenticated",
+        cache_size: int = 10000,
+        jwks_ttl: float = 600.0,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache_size = cache_size
+        self.jwks_ttl = jwks_ttl
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._jwks: Optional[dict] = None
+        self._jwks_fetched_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.remote_calls = 0
+
+    async def verify(self, token: str) -> dict:
+        """Return the token's claims, or raise InvalidTokenError"""
+        claims = self._cache.get(token)
+        if claims is not None and claims.get("exp", 0) > time.time():
+            self._cache.move_to_end(token)
+            self.hits += 1
+            return claims
+        self.misses += 1
+
+        jwks = await self._get_jwks() if self.jwks_url and not self.secret else None
+        if self.secret:
+            claims = self._decode(token, self.secret, HMAC_ALGORITHMS)
+        elif jwks and jwks.get("keys"):
+            claims = self._decode(token, jwks, JWKS_ALGORITHMS)
+        else:
+            claims = await self._verify_remote(token)
+
+        self._remember(token, claims)
+        return claims
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "remote_calls": self.remote_calls, "cached": len(self._cache)}
+
+    def _decode(self, token: str, key, algorithms) -> dict:
+        # python-jose loads the cryptography backend; only pay for it once a token arrives
+        from jose import JWTError, jwt
+
+        try:
+            return jwt.decode(token, key, algorithms=algorithms, audience=self.audience)
+        except JWTError as e:
+            raise InvalidTokenError(str(e))
+
+    async def _get_jwks(self) -> Optional[dict]:
+        """Cached JWKS; projects still on a shared secret publish no keys"""
+        if self._jwks is None or time.monotonic() - self._jwks_fetched_at > self.jwks_ttl:
+            try:
+                response = await get_http_client().get(self.jwks_url)
+                response.raise_for_status()
+                self._jwks = response.json()
+            except Exception as e:
+                print(f"Warning: Failed to fetch JWKS: {e}")
+                self._jwks = self._jwks or {}
+            self._jwks_fetched_at = time.monotonic()
+        return self._jwks
+
+    async def _verify_remote(self, token: str) -> dict:
+        self.remote_calls += 1
+        result = await supabase_client.get_user(token)
+        if "error" in result:
+            raise InvalidTokenError(result["error"])
+        user = result.get("user")
+        user = getattr(user, "user", user)  # supabase-py wraps the user in a response
+        user_id = user.get("id") if isinstance(user, dict) else user.id
+        email = user.get("email") if isinstance(user, dict) else user.email
+        role = user.get("role") if isinstance(user, dict) else getattr(user, "role", None)
+        from jose import JWTError, jwt
+
+        try:
+            exp = jwt.get_unverified_claims(token).get("exp")
+        except JWTError:
+            exp = None
+        # Without a verifiable expiry, trust the remote answer for a minute
+        return {"sub": user_id, "email": email, "role": role, "exp": exp or time.time() + 60}
+
+    def _remember(self, token: str, claims: dict):
+        if "exp" not in claims:
+            return
+        self._cache[token] = claims
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def _jwks_url() -> str:
+    supabase_url = os.getenv("SUPABASE_URL", "")
+    if not supabase_url or os.getenv("SUPABASE_JWT_SECRET"):
+        return ""
+    return supabase_url.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+
+
+# Global instance
+token_verifier = TokenVerifier(
+    secret=os.getenv("SUPABASE_JWT_SECRET", ""),
+    jwks_url=os.getenv("SUPABASE_JWKS_URL", "") or _jwks_url(),
+)
+register_cache("auth_tokens", token_verifier)
+
+
+def _user_claims(claims: dict) -> dict:
+    """Refuse validly signed tokens that are not a signed-in user's, such as the public anon key"""
+    if not claims.get("sub") or claims.get("role") != "authenticated":
+        raise InvalidTokenError("Not a user access token")
+    return claims
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return None
+
+
+async def get_current_user(
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None),
+) -> dict:
+    """FastAPI dependency resolving the caller from a bearer token"""
+    token = _bearer_token(authorization) or access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing access token")
+    try:
+        claims = _user_claims(await token_verifier.verify(token))
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return {
+        "id": claims.get("sub"),
+        "email": claims.get("email"),
+        "role": claims.get("role"),
+        "user_metadata": claims.get("user_metadata", {}),
+    }
+
+
+# Without this, requests carrying no access token are refused instead of
+# sharing the anonymous tenant
+ALLOW_ANONYMOUS = os.getenv("ALLOW_ANONYMOUS", "true").lower() == "true"
+
+
+async def resolve_tenant(token: Optional[str]) -> Optional[str]:
+    """User id owning a request's data; None for the anonymous tenant"""
+    if not token:
+        if not ALLOW_ANONYMOUS:
+            raise InvalidTokenError("Missing access token")
+        return None
+    claims = _user_claims(await token_verifier.verify(token))
+    return claims["sub"]
+
+
+async def get_tenant_id(
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None),
+) -> Optional[str]:
+    """FastAPI dependency giving the caller's tenant: their user id, or None when anonymous"""
+    try:
+        return await resolve_tenant(_bearer_token(authorization) or access_token)
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.utils.slack_notify import QueueFullError
+
+# Headers a sender may put the signature in, as "sha256=<hex digest of the body>"
+SIGNATURE_HEADERS = ("x-hub-signature-256", "x-hub-signature", "x-signature")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check an HMAC-SHA256 signature of the raw request body"""
+    if not secret or not signature:
+        return False
+    algorithm, _, digest = signature.partition("=")
+    if algorithm.lower() != "sha256":
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest.strip().lower())
+
+
+def detect_source(payload: dict) -> Optional[str]:
+    """Tell an Alertmanager notification from a Jira event by its shape"""
+    if "webhookEvent" in payload:
+        return "jira"
+    if isinstance(payload.get("alerts"), list):
+        return "alertmanager"
+    return None
+
+
+class WebhookQueue:
+    """Bounded hand-off between webhook receivers and the local stores.
+
+    Receivers only check the signature and call ``submit`` with the raw
+    body, so a sender is answered as soon as the bytes are in. A single
+    worker parses what has queued up. Each source has a (prepare, apply)
+    pair of handlers: ``prepare`` validates and converts one payload, and
+    a payload it raises on is dropped and counted as failed on its own.
+    ``apply`` then gets the whole batch of prepared payloads at once, so
+    a burst of Alertmanager notifications becomes one store update and
+    one stream event. The queue is capped both in
+    entries and in bytes; past either cap ``submit`` raises QueueFullError
+    and the receiver sheds the request with a 429 instead of buffering it.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Tuple[Callable[[dict], Any], Callable[[List[Any]], None]]],
+        max_queue: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        batch_size: int = 500,
+    ):
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.queued_bytes = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def full(self) -> bool:
+        return self.pending() >= self.max_queue or self.queued_bytes >= self.max_bytes
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, source: Optional[str], body: bytes):
+        """Queue a verified body; source None means detect it from the payload"""
+        self._ensure_started()
+        if self.queued_bytes + len(body) > self.max_bytes:
+            self.rejected += 1
+            raise QueueFullError("Webhook queue is full")
+        try:
+            self._queue.put_nowait((source, body))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError("Webhook queue is full")
+        self.queued_bytes += len(body)
+        self.accepted += 1
+
+    def reject(self):
+        """Count a request shed before its body was read"""
+        self.rejected += 1
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": self.pending(),
+            "queued_bytes": self.queued_bytes,
+            "last_error": self.last_error,
+        }
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._work())
+
+    async def _work(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._apply(batch)
+            # Let receivers run between batches while a burst is queued
+            await asyncio.sleep(0)
+
+    def _apply(self, batch: List[Tuple[Optional[str], bytes]]):
+        by_source: Dict[str, List[Any]] = {}
+        for source, body in batch:
+            self.queued_bytes -= len(body)
+            try:
+                payload = json.loads(body)
+                if not isinstance(payload, dict):
+                    raise ValueError("Webhook body is not a JSON object")
+                source = source or detect_source(payload)
+                if source not in self.handlers:
+                    raise ValueError("Unrecognized webhook payload")
+                prepare, _ = self.handlers[source]
+                by_source.setdefault(source, []).append(prepare(payload))
+            except Exception as e:
+                # Only this payload is dropped; the rest of the batch still applies
+                self._failed(1, e)
+
+        for source, prepared in by_source.items():
+            _, apply = self.handlers[source]
+            try:
+                apply(prepared)
+                self.processed += len(prepared)
+            except Exception as e:
+                self._failed(len(prepared), e)
+
+    def _failed(self, count: int, error: Exception):
+        self.failed += count
+        self.last_error = str(error) or type(error).__name__
+        print(f"Warning: Webhook processing failed: {self.last_error}")
@@ -0,0 +1,144 @@
+"""Alert pipeline cost for a large synthetic Alertmanager feed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_alerts --alerts 100000 --churn 0.01
+
+Starts a fake Alertmanager on localhost that serves --alerts alerts (plus
+--duplicates repeated ones) from the Grafana alerts path, with ETag
+support. The app's GrafanaClient is pointed at it and each step is timed:
+the first full load into the alert store, polls where --churn of the
+alerts resolve and as many new ones fire, a poll answered with 304, and
+the dashboard views served from the store.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from backend.main import app
+from backend.routes import alerts as alerts_route
+from backend.storage import alert_store
+from backend.utils.grafana_api import ALERTS_PATH
+
+SEVERITIES = ("critical", "warning", "info")
+ALERTNAMES = [f"Alert{n}" for n in range(50)]
+
+
+def make_alert(n: int) -> dict:
+    labels = {
+        "alertname": ALERTNAMES[n % len(ALERTNAMES)],
+        "severity": SEVERITIES[n % 7 % 3],
+        "instance": f"host-{n}:9100",
+        "job": f"job-{n % 20}",
+    }
+    return {
+        "labels": labels,
+        "annotations": {"summary": f"Synthetic alert {n}"},
+        "fingerprint": hashlib.md5(str(n).encode()).hexdigest()[:16],
+        "startsAt": datetime.now(timezone.utc).isoformat(),
+        "status": {"state": "active", "silencedBy": [], "inhibitedBy": []},
+    }
+
+
+class FakeAlertmanager:
+    """Serves a mutable alert list over HTTP, answering 304 while it is unchanged"""
+
+    def __init__(self, alerts: list):
+        self.set_alerts(alerts)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != ALERTS_PATH:
+                    self.send_error(404)
+                    return
+                if self.headers.get("If-None-Match") == fake.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", fake.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(fake.body)))
+                self.send_header("ETag", fake.etag)
+                self.end_headers()
+                self.wfile.write(fake.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def set_alerts(self, alerts: list):
+        self.body = json.dumps(alerts).encode()
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+
+    def close(self):
+        self.server.shutdown()
+
+
+async def timed(fn):
+    start = time.perf_counter()
+    result = await fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def run(count: int, duplicates: int, churn: float, polls: int):
+    feed = [make_alert(n) for n in range(count)]
+    fake = FakeAlertmanager(feed + random.sample(feed, duplicates))
+    print(f"fake Alertmanager: {count} alerts + {duplicates} duplicates, {len(fake.body) / 1e6:.1f} MB of JSON")
+
+    grafana = alerts_route.grafana
+    grafana.base_url, grafana.api_key = fake.url, "bench"
+    load = alerts_route.alert_watcher.load
+
+    ms, _ = await timed(load)
+    print(f"{'first load':>24}: {ms:8.1f} ms  ({len(alert_store)} alerts stored)")
+
+    next_id = count
+    for _ in range(polls):
+        changed = int(count * churn)
+        for i in random.sample(range(len(feed)), changed):
+            feed[i] = make_alert(next_id)
+            next_id += 1
+        fake.set_alerts(feed)
+        ms, _ = await timed(load)
+        print(f"{f'poll, {changed} changed':>24}: {ms:8.1f} ms  ({alert_store.total('firing')} firing, {alert_store.total('resolved')} resolved)")
+
+    ms, _ = await timed(load)
+    print(f"{'poll, 304':>24}: {ms:8.1f} ms")
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        alerts_route.alerts_cache.ttl = 3600
+        for path in ("/api/alerts/grafana/counts", "/api/alerts/grafana/groups", "/api/alerts/grafana/groups?by=job,severity",
+                     "/api/alerts/grafana?limit=50", "/api/alerts/grafana"):
+            ms, response = await timed(lambda: client.get(path))
+            print(f"{path:>45}: {ms:8.1f} ms, {len(response.content) / 1e3:9.1f} KB")
+    fake.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=int, default=5_000)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--polls", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.alerts, args.duplicates, args.churn, args.polls))
+
+
+if __name__ == "__main__":
+    main()
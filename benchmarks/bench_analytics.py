@@ -0,0 +1,93 @@
+"""Analytics windows over years of history for thousands of users.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_analytics --users 2000 --years 3
+
+Gives each of --users users --years years of focus sessions (--per-day a
+day) and a task done most days, filling the analytics columns directly
+rather than through the stores. Then times computing a 30 and a 365 day
+window for every user, serving them again from the window cache, and
+recomputing after each user logs one more session, which only drops the
+windows covering today. --python times the fallback used without NumPy.
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+import backend.utils.analytics as analytics
+from backend.utils.analytics import UserAnalytics
+
+CATEGORIES = ("work", "personal", "focus", None)
+PRIORITIES = ("low", "medium", "high")
+
+
+def make_user(rng: random.Random, today: int, years: int, per_day: int) -> UserAnalytics:
+    user = UserAnalytics()
+    focus, tasks = user.focus, user.tasks
+    first = today - 365 * years
+    session_id = task_id = 0
+    for day in range(first, today + 1):
+        if rng.random() < 0.15:
+            continue
+        for _ in range(rng.randint(1, per_day)):
+            session_id += 1
+            focus.ids.append(session_id)
+            focus.day.append(day)
+            focus.minutes.append(rng.choice((15, 25, 25, 50)))
+            focus.completed.append(rng.random() < 0.8)
+        task_id += 1
+        tasks.ids.append(task_id)
+        tasks.created.append(day - rng.randint(0, 5))
+        tasks.done.append(day if rng.random() < 0.7 else analytics.NO_DAY)
+        tasks.category.append(tasks.categories.code(rng.choice(CATEGORIES)))
+        tasks.priority.append(tasks.priorities.code(rng.choice(PRIORITIES)))
+    return user
+
+
+def timed_windows(users: list, today: int, windows: tuple) -> float:
+    start = time.perf_counter()
+    for user in users:
+        for days in windows:
+            user.window(today - days + 1, today)
+    return time.perf_counter() - start
+
+
+def run(users: int, years: int, per_day: int, python: bool):
+    if python:
+        analytics.np = None
+    rng = random.Random(11)
+    today = date.today().toordinal()
+    start = time.perf_counter()
+    population = [make_user(rng, today, years, per_day) for _ in range(users)]
+    sessions = sum(len(u.focus.ids) for u in population)
+    tasks = sum(len(u.tasks.ids) for u in population)
+    print(f"{users} users, {sessions} sessions and {tasks} tasks over {years} years "
+          f"(generated in {time.perf_counter() - start:.1f} s), {'Python' if analytics._numpy() is None else 'NumPy'} reductions")
+
+    windows = (30, 365)
+    cold = timed_windows(population, today, windows)
+    warm = timed_windows(population, today, windows)
+    print(f"{len(windows)} windows per user, computed: {cold:.2f} s ({cold / users / len(windows) * 1e3:.2f} ms per window)")
+    print(f"{len(windows)} windows per user, cached:   {warm * 1e3:.1f} ms")
+
+    session = analytics.FocusSession(id=10 ** 9, duration=25, completed=True, created_at=date.today().isoformat() + "T12:00:00")
+    for user in population:
+        user.focus_written(session)
+    refreshed = timed_windows(population, today, windows)
+    print(f"after one new session per user:    {refreshed:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=6)
+    parser.add_argument("--python", action="store_true", help="use the pure Python reductions")
+    args = parser.parse_args()
+    run(args.users, args.years, args.per_day, args.python)
+
+
+if __name__ == "__main__":
+    main()
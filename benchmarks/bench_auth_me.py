@@ -0,0 +1,71 @@
+"""Requests/sec on GET /api/auth/me with remote vs local token verification.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_auth_me --requests 2000 --rtt-ms 30
+
+"remote" reproduces the old behaviour: every request asks Supabase who the
+token belongs to (simulated with a --rtt-ms delay, no network needed).
+"local" verifies the HS256 signature in-process and then serves repeat
+tokens from the LRU.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from jose import jwt
+
+from backend.main import app
+from backend.utils import token_verifier as tv
+
+SECRET = "bench-secret"
+
+
+def make_token(user: int) -> str:
+    claims = {"sub": f"user-{user}", "email": f"user{user}@example.com", "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+async def run(mode: str, requests: int, users: int, concurrency: int, rtt: float) -> float:
+    verifier = tv.token_verifier
+    if mode == "remote":
+        async def get_user(token):
+            await asyncio.sleep(rtt)
+            claims = jwt.get_unverified_claims(token)
+            return {"user": {"id": claims["sub"], "email": claims["email"], "role": claims["role"]}}
+
+        tv.supabase_client.get_user = get_user
+        verifier.secret, verifier.jwks_url, verifier.cache_size = "", "", 0
+    else:
+        verifier.secret, verifier.cache_size = SECRET, 10000
+    verifier._cache.clear()
+
+    tokens = [make_token(u) for u in range(users)]
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {tokens[i % users]}"})
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for mode in ("remote", "local"):
+        rps = asyncio.run(run(mode, args.requests, args.users, args.concurrency, args.rtt_ms / 1000))
+        print(f"{mode:>8}: {rps:10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
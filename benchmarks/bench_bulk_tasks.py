@@ -0,0 +1,85 @@
+"""Per-item task calls vs POST /api/tasks/bulk and the NDJSON import.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_tasks --tasks 2000
+
+Creates --tasks tasks one POST at a time, in bulk batches and through
+the streaming import, then moves them all to ``done`` with per-item PUTs
+and with bulk set_status operations. Requests go through the ASGI app in
+process, so the numbers measure routing, validation and storage rather
+than the network; over a real network the per-item path also pays one
+round trip per task.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from backend.main import app
+from backend.routes.tasks import BULK_MAX_OPERATIONS
+
+TASK = {"title": "Imported task", "priority": "low", "category": "work", "tags": ["backlog"]}
+
+
+async def timed(fn) -> float:
+    start = time.perf_counter()
+    await fn()
+    return time.perf_counter() - start
+
+
+async def run(tasks: int, batch: int) -> dict:
+    timings = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        ids = []
+
+        async def per_item_create():
+            for _ in range(tasks):
+                response = await client.post("/api/tasks/", json=TASK)
+                ids.append(response.json()["id"])
+
+        async def bulk_create():
+            for start in range(0, tasks, batch):
+                ops = [{"op": "create", "task": TASK} for _ in range(min(batch, tasks - start))]
+                response = await client.post("/api/tasks/bulk", json={"operations": ops})
+                assert response.status_code == 200, response.text
+
+        async def ndjson_import():
+            body = "\n".join(json.dumps(TASK) for _ in range(tasks)).encode()
+            response = await client.post("/api/tasks/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+            assert response.json()["imported"] == tasks, response.text
+
+        async def per_item_update():
+            for task_id in ids:
+                await client.put(f"/api/tasks/{task_id}", json={**TASK, "status": "done"})
+
+        async def bulk_set_status():
+            for start in range(0, len(ids), batch):
+                ops = [{"op": "set_status", "id": i, "status": "done"} for i in ids[start:start + batch]]
+                response = await client.post("/api/tasks/bulk", json={"operations": ops})
+                assert response.status_code == 200, response.text
+
+        timings["per-item create"] = await timed(per_item_create)
+        timings["bulk create"] = await timed(bulk_create)
+        timings["ndjson import"] = await timed(ndjson_import)
+        timings["per-item update"] = await timed(per_item_update)
+        timings["bulk set_status"] = await timed(bulk_set_status)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=BULK_MAX_OPERATIONS)
+    args = parser.parse_args()
+
+    timings = asyncio.run(run(args.tasks, args.batch))
+    print(f"{'mode':>16} {'total ms':>10} {'tasks/s':>10}")
+    for mode, total in timings.items():
+        print(f"{mode:>16} {total * 1000:>10.1f} {args.tasks / total:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
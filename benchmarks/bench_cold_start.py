@@ -0,0 +1,140 @@
+"""Cold start: import profile and time to first response of a fresh process.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cold_start --runs 7
+
+Profile: runs ``python -X importtime -c "import backend.main"`` and lists
+where import time goes, by top-level package (own time of all its
+modules) and by backend module (including what it imports).
+
+First response: for each of --paths, starts --runs fresh interpreters
+that import the app, run its startup handlers and serve one GET over raw
+ASGI, and reports the median import time and wall time from spawning the
+process to the response. --eager sets LAZY_ROUTERS=false so every router
+is imported up front, as before routers were loaded on demand.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_PATHS = ("/health", "/api/tasks/", "/api/focus/stats", "/api/analytics")
+
+
+def import_profile(top: int):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    by_package = defaultdict(int)
+    backend = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(own)
+        if name.startswith("backend"):
+            backend[name] = int(cumulative)
+        if depth == 1:
+            total += int(cumulative)
+
+    print(f"import backend.main: {total / 1000:.0f} ms")
+    print(f"\n{'package':>34} {'own ms':>8}")
+    for name, micros in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:>34} {micros / 1000:8.1f}")
+    print(f"\n{'backend module':>34} {'cumulative ms':>14}")
+    for name, micros in sorted(backend.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:>34} {micros / 1000:14.1f}")
+
+
+async def get(app, path: str) -> int:
+    """Serve one GET through the app's ASGI interface; returns the status"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(scope, receive, send)
+    return statuses[0]
+
+
+def first_response(path: str):
+    """Child: import the app and serve ``path`` once, reporting when"""
+    start = time.perf_counter()
+    from backend.main import app
+    imported = time.perf_counter()
+
+    async def serve():
+        await app.router.startup()
+        status = await get(app, path)
+        served = time.time()
+        await app.router.shutdown()
+        return status, served
+
+    status, served = asyncio.run(serve())
+    print(json.dumps({"import_s": imported - start, "served_at": served, "status": status}))
+
+
+def spawn(path: str, eager: bool) -> dict:
+    env = dict(os.environ, LAZY_ROUTERS="false" if eager else "true")
+    started = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", path],
+        check=True, capture_output=True, text=True, env=env,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    result["first_response_s"] = result["served_at"] - started
+    return result
+
+
+def time_first_responses(paths, runs: int, eager: bool):
+    print(f"\n{'eager' if eager else 'lazy'} routers, median of {runs} cold processes")
+    print(f"{'path':>20} {'status':>6} {'import ms':>10} {'first response ms':>18}")
+    spawn(paths[0], eager)  # compile bytecode so every timed run starts alike
+    for path in paths:
+        results = [spawn(path, eager) for _ in range(runs)]
+        imported = statistics.median(r["import_s"] for r in results)
+        first = statistics.median(r["first_response_s"] for r in results)
+        print(f"{path:>20} {results[0]['status']:>6} {imported * 1e3:10.0f} {first * 1e3:18.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--paths", nargs="+", default=list(DEFAULT_PATHS))
+    parser.add_argument("--top", type=int, default=15, help="rows in each profile table")
+    parser.add_argument("--eager", action="store_true", help="import every router at startup")
+    parser.add_argument("--no-profile", action="store_true", help="skip the import profile")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        first_response(args.child)
+        return
+
+    if not args.no_profile:
+        import_profile(args.top)
+    time_first_responses(args.paths, args.runs, args.eager)
+
+
+if __name__ == "__main__":
+    main()
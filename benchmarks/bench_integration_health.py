@@ -0,0 +1,140 @@
+"""Integration health checks: one by one vs POST /api/integrations/test-all.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_integration_health --integrations 40 --delay 0.2
+
+Starts a fake upstream on localhost that answers the Grafana, Jira, Slack
+and generic webhook probes after --delay seconds, plus one that never
+answers in time. --integrations enabled integrations of all four types
+point at it. Times probing them one after another, then through the
+concurrent test-all endpoint (per-probe timeout, shared pool, per-host
+limit), and reads the cached GET /api/integrations/health, which makes no
+outbound calls. Prints the DNS cache and connection reuse along the way.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from backend.main import app
+from backend.storage import ANONYMOUS, integration_store
+from backend.utils import http_client
+from backend.utils.health_checks import health_monitor, probe
+
+
+class FakeUpstream:
+    """Answers every probe type after a delay; /hang answers after a minute"""
+
+    def __init__(self, delay: float):
+        self.connections = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                fake.connections += 1
+
+            def do_GET(self):
+                self.respond(200, {"displayName": "Bench", "name": "Main Org."})
+
+            def do_HEAD(self):
+                self.respond(200, None)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.respond(400, "no_text")
+
+            def respond(self, status, body):
+                time.sleep(60 if self.path.startswith("/hang") else delay)
+                data = b"" if body is None else (body.encode() if isinstance(body, str) else json.dumps(body).encode())
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.server.server_port}"
+
+
+def config_for(kind: str, url: str) -> dict:
+    return {
+        "grafana": {"url": url, "api_key": "bench"},
+        "jira": {"url": url, "email": "bench@example.com", "api_token": "bench"},
+        "slack": {"webhook_url": f"{url}/services/bench"},
+        "webhook": {"url": f"{url}/hook"},
+    }[kind]
+
+
+async def run(count: int, delay: float, timeout: float):
+    fake = FakeUpstream(delay)
+    health_monitor.timeout = timeout
+    # The fake upstream listens on localhost, which probes refuse by default
+    http_client.ALLOW_PRIVATE_TARGETS = True
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        store = integration_store.tenant(ANONYMOUS)
+        for integration in await store.all():
+            await store.delete(integration.id)
+        kinds = ("grafana", "jira", "slack", "webhook")
+        for n in range(count):
+            kind = kinds[n % len(kinds)]
+            await client.post("/api/integrations/", json={"name": f"{kind}-{n}", "type": kind, "config": config_for(kind, fake.url)})
+        await client.post("/api/integrations/", json={"name": "unreachable", "type": "webhook", "config": {"url": f"{fake.url}/hang"}})
+        await measure(client, fake, delay, timeout)
+
+
+async def measure(client: httpx.AsyncClient, fake: FakeUpstream, delay: float, timeout: float):
+    integrations = await integration_store.tenant(ANONYMOUS).all()
+    print(f"{len(integrations)} integrations, {delay * 1000:.0f} ms upstream delay, {timeout:g}s probe timeout")
+
+    start = time.perf_counter()
+    for integration in integrations:
+        await probe(integration, timeout)
+    print(f"{'one by one':>22}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    for attempt in ("test-all", "test-all again"):
+        start = time.perf_counter()
+        response = await client.post("/api/integrations/test-all")
+        data = response.json()
+        statuses = {}
+        for result in data["results"]:
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        latencies = sorted(r["latency_ms"] for r in data["results"] if r["status"] == "ok")
+        print(f"{attempt:>22}: {(time.perf_counter() - start) * 1000:8.1f} ms  {statuses}, "
+              f"probe p50 {latencies[len(latencies) // 2]:.0f} ms, max {latencies[-1]:.0f} ms")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        response = await client.get("/api/integrations/health")
+    print(f"{'cached /health':>22}: {(time.perf_counter() - start) * 10:8.2f} ms per request, {len(response.json()['results'])} results")
+
+    resolver = http_client.resolver
+    print(f"DNS lookups: {resolver.misses}, served from cache: {resolver.hits}; upstream connections opened: {fake.connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--integrations", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.integrations, args.delay, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
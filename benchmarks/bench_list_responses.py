@@ -0,0 +1,78 @@
+"""Cost of serving the task, focus session and integration lists.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_list_responses --tasks 50000
+
+Loads --tasks tasks and --sessions focus sessions into the in-memory
+stores, then times GET /api/tasks/, /api/focus/sessions and
+/api/integrations/ through the app: the first request after a write
+(serialized from the store) and repeat requests (served from the response
+cache). Also reports the response size and, for comparison, a bare copy of
+the body bytes.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+
+from backend.main import app
+from backend.storage import ANONYMOUS, focus_store, task_store
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, rounds: int) -> tuple:
+    """Median seconds over ``rounds`` GETs, and the last response"""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = await client.get(url)
+        times.append(time.perf_counter() - start)
+        response.raise_for_status()
+    times.sort()
+    return times[len(times) // 2], response
+
+
+async def run(tasks: int, sessions: int, rounds: int):
+    now = datetime.now().isoformat()
+    await task_store.tenant(ANONYMOUS).bulk_write([
+        ("create", {
+            "title": f"Benchmark task {n}", "description": "Synthetic task for the list benchmark",
+            "status": ("todo", "in_progress", "done")[n % 3], "priority": ("low", "medium", "high")[n % 3],
+            "category": "work", "tags": ["bench", f"tag{n % 10}"], "created_at": now, "updated_at": now,
+        })
+        for n in range(tasks)
+    ])
+    for n in range(sessions):
+        await focus_store.tenant(ANONYMOUS).create({"duration": 25, "task_id": n % 100 + 1, "completed": True, "notes": None, "created_at": now})
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for url in ("/api/tasks/", "/api/focus/sessions", "/api/integrations/"):
+            if url == "/api/tasks/":
+                # A write changes the version, so the next list is rendered afresh
+                created = (await client.post("/api/tasks/", json={"title": "bump"})).json()
+                await client.delete(f"/api/tasks/{created['id']}")
+            start = time.perf_counter()
+            response = await client.get(url)
+            first = time.perf_counter() - start
+            repeat, response = await timed_get(client, url, rounds)
+            body = response.content
+            start = time.perf_counter()
+            bytes(bytearray(body))
+            copy = time.perf_counter() - start
+            print(f"{url:>22}: {len(body) / 1e6:7.2f} MB  first {first * 1000:8.1f} ms  "
+                  f"repeat {repeat * 1000:8.2f} ms  (memcpy {copy * 1000:.2f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.sessions, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Event-loop lag under concurrent logins.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_login_loop_lag --logins 200 --rtt-ms 20
+
+A fake supabase-py client blocks for --rtt-ms per call, standing in for
+the network round-trip. "inline" calls it straight from the coroutine as
+the old SupabaseClient did; "offloaded" goes through SupabaseClient.run.
+A ticker coroutine measures how late the loop wakes it up meanwhile.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from backend.utils.supabase_client import SupabaseClient
+
+TICK = 0.005
+
+
+class FakeBlockingClient:
+    """Just enough of supabase-py for SupabaseClient._login"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.auth = self
+
+    def sign_in_with_password(self, credentials: dict):
+        time.sleep(self.rtt)
+        user = SimpleNamespace(id="user-1", email=credentials["email"], user_metadata={"name": "Bench"})
+        session = SimpleNamespace(access_token="token", token_type="bearer")
+        return SimpleNamespace(user=user, session=session)
+
+
+async def measure(mode: str, logins: int, rtt: float) -> dict:
+    supabase = SupabaseClient()
+    supabase._client = FakeBlockingClient(rtt)
+    supabase._session_client = lambda: supabase._client
+    supabase.enabled = True
+
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    async def login(i: int):
+        if mode == "inline":
+            supabase._login(f"user{i}@example.com", "pw")
+        else:
+            await supabase.login(f"user{i}@example.com", "pw")
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    for mode in ("inline", "offloaded"):
+        result = asyncio.run(measure(mode, args.logins, args.rtt_ms / 1000))
+        print(
+            f"{mode:>10}: {result['elapsed_s']:.2f}s total, "
+            f"loop lag p50 {result['lag_p50_ms']:.1f} ms, max {result['lag_max_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
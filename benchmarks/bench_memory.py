@@ -0,0 +1,121 @@
+"""Resident memory per million tasks and focus sessions held in memory.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory --records 1000000
+
+Each variant runs in a fresh interpreter, which fills it with --records
+synthetic records and reports how much its resident set grew, scaled to
+a million records:
+
+- task_models / focus_models: a dict of Pydantic models, one per record,
+  which is how the in-memory stores used to hold them
+- task_store / focus_store: the column-oriented in-memory repositories,
+  task_store including its status, priority, category and tag indexes
+"""
+import argparse
+import asyncio
+import gc
+import os
+import resource
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+VARIANTS = ("task_models", "task_store", "focus_models", "focus_store")
+
+STATUSES = ("todo", "in_progress", "done")
+PRIORITIES = ("low", "medium", "high")
+CATEGORIES = ("work", "personal", "focus", None)
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def task_data(n: int, start: datetime) -> dict:
+    created = start + timedelta(seconds=n, microseconds=n % 997)
+    return {
+        "title": f"Task {n}",
+        "description": "Follow up with the team" if n % 4 == 0 else None,
+        "status": STATUSES[n % 3],
+        "priority": PRIORITIES[n % 3],
+        "category": CATEGORIES[n % 4],
+        "tags": ["work", f"sprint-{n % 20}"][: n % 3],
+        "created_at": created.isoformat(),
+        "updated_at": (created + timedelta(minutes=n % 90, microseconds=n % 13)).isoformat(),
+    }
+
+
+def focus_data(n: int, start: datetime) -> dict:
+    return {
+        "duration": 25,
+        "task_id": n % 500 + 1 if n % 2 else None,
+        "completed": n % 5 != 0,
+        "notes": "Deep work" if n % 50 == 0 else None,
+        "created_at": (start + timedelta(seconds=n * 30, microseconds=n % 991)).isoformat(),
+    }
+
+
+async def fill(variant: str, records: int):
+    from backend.models.focus_model import FocusSession
+    from backend.models.task_model import Task
+    from backend.storage.focus_store import InMemoryFocusRepository
+    from backend.storage.task_store import InMemoryTaskRepository
+
+    start = datetime(2026, 1, 1)
+    if variant == "task_models":
+        return {n: Task(id=n, version=n, **task_data(n, start)) for n in range(1, records + 1)}
+    if variant == "focus_models":
+        return {n: FocusSession(id=n, **focus_data(n, start)) for n in range(1, records + 1)}
+    if variant == "task_store":
+        store = InMemoryTaskRepository()
+        for n in range(1, records + 1):
+            await store.create(task_data(n, start))
+        return store
+    store = InMemoryFocusRepository()
+    for n in range(1, records + 1):
+        await store.create(focus_data(n, start))
+    return store
+
+
+def measure(variant: str, records: int) -> int:
+    """Resident bytes added by holding ``records`` records of a variant"""
+    import backend.storage  # noqa: F401 - load the code before the baseline
+    gc.collect()
+    before = rss_bytes()
+    held = asyncio.run(fill(variant, records))
+    gc.collect()
+    grown = rss_bytes() - before
+    del held
+    return grown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(measure(args.child, args.records))
+        return
+
+    print(f"{'variant':>14} {'MB per million':>15} {'bytes per record':>17}")
+    for variant in args.variants:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_memory", "--child", variant, "--records", str(args.records)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        grown = int(output.split()[-1])
+        print(f"{variant:>14} {grown / args.records * 1e6 / 1e6:15.0f} {grown / args.records:17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Per-request cost of MetricsMiddleware and of rendering /metrics.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics_middleware --requests 20000
+
+Drives the same one-route FastAPI app through raw ASGI calls with and
+without MetricsMiddleware and reports the time per request of each and the
+difference, i.e. what instrumentation adds to every request. Also times a
+bare histogram observation and a scrape of a registry holding --routes
+routes' worth of series.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from backend.utils.metrics import MetricsMiddleware, Registry
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id, "name": "item"}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app, count: int) -> float:
+    """Seconds per request for ``count`` sequential GETs"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scopes = [{
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": f"/items/{n % 100}", "raw_path": f"/items/{n % 100}".encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    } for n in range(count)]
+    start = time.perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / count
+
+
+async def run(requests: int, routes: int, rounds: int):
+    plain, instrumented = make_app(False), make_app(True)
+    await drive(plain, 1000)
+    await drive(instrumented, 1000)
+    # Interleave rounds so drift in machine load hits both alike
+    plain_times, instrumented_times = [], []
+    for _ in range(rounds):
+        plain_times.append(await drive(plain, requests))
+        instrumented_times.append(await drive(instrumented, requests))
+    base, with_metrics = min(plain_times), min(instrumented_times)
+    print(f"{'without middleware':>22}: {base * 1e6:7.1f} us/request")
+    print(f"{'with middleware':>22}: {with_metrics * 1e6:7.1f} us/request")
+    print(f"{'overhead':>22}: {(with_metrics - base) * 1e6:7.1f} us/request ({(with_metrics / base - 1) * 100:.1f}%)")
+
+    registry = Registry()
+    histogram = registry.histogram("bench_seconds", "bench", ("method", "route"))
+    counter = registry.counter("bench_total", "bench", ("method", "route", "status"))
+    start = time.perf_counter()
+    for n in range(requests):
+        histogram.observe(0.003, "GET", "/items/{item_id}")
+    print(f"{'histogram observe':>22}: {(time.perf_counter() - start) / requests * 1e9:7.0f} ns")
+
+    for n in range(routes):
+        for method in ("GET", "POST"):
+            histogram.observe(0.01, method, f"/api/route{n}")
+            counter.inc(method, f"/api/route{n}", "200")
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"{'scrape':>22}: {(time.perf_counter() - start) * 1000:7.2f} ms for {text.count(chr(10))} lines")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.routes, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
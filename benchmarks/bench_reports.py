@@ -0,0 +1,85 @@
+"""Scheduled end of day reports for many users in one tick.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_reports --users 5000 --delay 0.05
+
+Gives --users users a few tasks, a focus session and a Slack integration
+whose report is due, all pointing at a local Slack stub that answers after
+--delay seconds; one user's webhook hangs for --slow seconds instead. Then
+runs one scheduler tick and reports how long building and queueing the
+reports took and when the last fast webhook got its message, which should
+not wait for the slow one. Every webhook is on one host, as they are on
+hooks.slack.com, so HTTP_MAX_PER_HOST bounds how many are sent at once.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from benchmarks.stubs import StubServer
+from backend.storage import focus_store, integration_store, task_store
+from backend.utils import http_client
+from backend.utils.reports import report_scheduler
+from backend.utils.slack_notify import slack_dispatcher
+
+
+async def run(users: int, delay: float, slow: float, rate: float):
+    received = []
+
+    def slack(method, path, query, headers, body):
+        if path == "/slow":
+            time.sleep(slow)
+        received.append((path, time.perf_counter()))
+        return 200, b"ok", {}
+
+    stub = StubServer(slack, delay)
+    # The stub listens on localhost, which users' webhooks may not point at by default
+    http_client.ALLOW_PRIVATE_TARGETS = True
+    slack_dispatcher.rate_per_second = rate
+    slack_dispatcher.max_in_flight = 200
+    now = datetime.now().isoformat()
+    for n in range(users):
+        user_id = f"user-{n}"
+        await task_store.tenant(user_id).bulk_write([
+            ("create", {
+                "title": f"Task {i}", "description": None, "status": ("done", "todo")[i % 2], "priority": "medium",
+                "category": None, "tags": [], "created_at": now, "updated_at": now,
+            })
+            for i in range(4)
+        ])
+        await focus_store.tenant(user_id).create({"duration": 25, "task_id": None, "completed": True, "notes": None, "created_at": now})
+        integration = await integration_store.tenant(user_id).create({
+            "name": "Slack", "type": "slack", "enabled": True,
+            "config": {"webhook_url": f"{stub.url}/{'slow' if n == 0 else n}", "report_time": "00:00", "timezone": "UTC"},
+            "created_at": now, "updated_at": now,
+        })
+        report_scheduler.schedule(integration, after=datetime(2000, 1, 1, tzinfo=timezone.utc))
+
+    limit = f"{rate:g} sends/s" if rate else "no send rate limit"
+    print(f"{users} reports due, {delay * 1000:.0f} ms webhook latency, one webhook hanging {slow:g}s, {limit}")
+    start = time.perf_counter()
+    queued = await report_scheduler.run_due()
+    built = time.perf_counter() - start
+    print(f"built and queued {queued} reports in {built * 1000:.1f} ms")
+    while sum(path != "/slow" for path, _ in received) < users - 1:
+        await asyncio.sleep(0.05)
+    fast = max(t for path, t in received if path != "/slow") - start
+    waiting = not any(path == "/slow" for path, _ in received)
+    print(f"{users - 1} fast webhooks delivered after {fast:.2f} s, slow one {'still hanging' if waiting else 'done'}")
+    await slack_dispatcher.stop()
+    stub.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--slow", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, default=0.0, help="sends per second; 0 for no limit")
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.delay, args.slow, args.rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Dashboard alerts through a Grafana outage, with and without circuit breaking.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_resilience --users 20 --phase 4
+
+Points the app at a local Grafana stub wrapped in fault injection and has
+--users virtual users load GET /api/alerts/grafana back to back for
+--phase seconds in each of these phases:
+
+  healthy   Grafana answers after --latency seconds
+  hanging   Grafana takes --hang seconds, well past any timeout
+  failing   Grafana answers 503 at once
+  recovered Grafana is healthy again
+
+The alerts cache is turned off so every load calls Grafana (concurrent
+loads still share one call). For each phase it prints the status codes,
+p50/p99/max latency and the grafana upstream's breaker state, timeout,
+refusals and fallbacks. --baseline keeps the breaker from ever opening
+and fixes the timeout at HTTP_TIMEOUT_SECONDS, as calls were made before
+the resilience layer; the last-known-good fallback still applies.
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+
+import httpx
+
+PHASES = ("healthy", "hanging", "failing", "recovered")
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def load(client: httpx.AsyncClient, users: int, seconds: float):
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + seconds
+
+    async def user():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get("/api/alerts/grafana")
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    return latencies, statuses
+
+
+async def run(users: int, phase: float, latency: float, hang: float):
+    # Imported only now so every module reads the environment main() set
+    from backend.main import app
+    from backend.routes.alerts import grafana
+    from benchmarks.stubs import Faults, GrafanaStub, StubServer
+
+    faults = Faults(GrafanaStub(200))
+    stub = StubServer(faults)
+    grafana.base_url = stub.url
+    grafana.api_key = "stub"
+    upstream = grafana.upstream
+
+    print(f"{'phase':>10} {'requests':>8} {'statuses':>18} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'circuit':>9} {'timeout s':>9} {'refused':>7} {'timeouts':>8} {'fallbacks':>9}")
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+        for name in PHASES:
+            faults.heal()
+            faults.delay = latency
+            if name == "hanging":
+                faults.delay = hang
+            elif name == "failing":
+                faults.status = 503
+            elif name == "recovered":
+                # Give the circuit time to let a trial call through
+                await asyncio.sleep(max(0.0, upstream.breaker.retry_after()))
+            latencies, statuses = await load(client, users, phase)
+            status = upstream.status()
+            codes = " ".join(f"{code}:{count}" for code, count in sorted(statuses.items()))
+            print(f"{name:>10} {len(latencies):8} {codes:>18} {percentile(latencies, 0.5) * 1e3:8.1f} "
+                  f"{percentile(latencies, 0.99) * 1e3:8.1f} {max(latencies) * 1e3:8.1f} {status['state']:>9} "
+                  f"{status['timeout']:9.2f} {status['rejected']['circuit_open']:7} {status['rejected']['timeout']:8} "
+                  f"{status['fallbacks']:9}")
+    faults.heal()
+    stub.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--phase", type=float, default=4.0, help="seconds per phase")
+    parser.add_argument("--latency", type=float, default=0.02, help="Grafana's normal answer time, in seconds")
+    parser.add_argument("--hang", type=float, default=30.0, help="how long Grafana takes while hanging")
+    parser.add_argument("--reset", type=float, default=2.0, help="seconds an open circuit waits before a trial call")
+    parser.add_argument("--baseline", action="store_true", help="no circuit breaking and a fixed timeout")
+    args = parser.parse_args()
+
+    # Read when the app is imported
+    os.environ.update(GRAFANA_CACHE_TTL="0", GRAFANA_CACHE_STALE_TTL="0", CIRCUIT_RESET_SECONDS=str(args.reset))
+    if args.baseline:
+        os.environ.update(
+            CIRCUIT_FAILURE_THRESHOLD=str(10 ** 9),
+            OUTBOUND_TIMEOUT_FLOOR_SECONDS=os.getenv("HTTP_TIMEOUT_SECONDS", "10"),
+        )
+    asyncio.run(run(args.users, args.phase, args.latency, args.hang))
+
+
+if __name__ == "__main__":
+    main()
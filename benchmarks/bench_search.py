@@ -0,0 +1,110 @@
+"""Type-ahead latency and memory of the task search index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search --tasks 1000000
+
+Indexes --tasks synthetic tasks whose words follow a Zipf-like
+distribution over a --vocab word vocabulary, then times type-ahead
+queries (one to three words, the last one partial) from rare to very
+common prefixes, with and without a tag filter, and the cost of keeping
+the index current on update and delete. Reports the index's own memory
+estimate next to what tracemalloc measured while building it.
+"""
+import argparse
+import itertools
+import random
+import time
+import tracemalloc
+
+from backend.models.task_model import Task
+from backend.storage.search_index import TaskSearchIndex
+
+TAGS = ["work", "personal", "health", "urgent", "later", "ops", "review", "bug"]
+
+
+def make_words(vocab: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < vocab:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words, key=lambda w: rng.random())
+
+
+def make_tasks(count: int, words: list, rng: random.Random):
+    # Zipf-like: word n is picked about 1/n as often as the first
+    weights = list(itertools.accumulate(1 / (n + 1) for n in range(len(words))))
+    for n in range(count):
+        title = rng.choices(words, cum_weights=weights, k=rng.randint(2, 6))
+        description = rng.choices(words, cum_weights=weights, k=rng.randint(0, 12))
+        yield Task.model_construct(
+            id=n + 1, title=" ".join(title), description=" ".join(description) or None,
+            status="todo", priority="medium", category=None, tags=rng.sample(TAGS, rng.randint(0, 2)),
+            user_id=None, created_at="", updated_at="", version=n + 1,
+        )
+
+
+def timed(index: TaskSearchIndex, query: str, rounds: int, **options) -> tuple:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = index.search(query, **options)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], times[-1], result
+
+
+def run(tasks: int, vocab: int, rounds: int, trace: bool):
+    rng = random.Random(7)
+    words = make_words(vocab, rng)
+    index = TaskSearchIndex()
+    print(f"indexing {tasks} tasks over a {vocab} word vocabulary")
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    index.rebuild(make_tasks(tasks, words, rng), tasks)
+    built = time.perf_counter() - start
+    traced = tracemalloc.get_traced_memory()[0] if trace else None
+    tracemalloc.stop()
+    stats = index.stats()
+    print(f"built in {built:.1f} s: {stats['terms']} terms, {stats['postings']} postings")
+    measured = f", tracemalloc {traced / 1e6:.0f} MB" if traced is not None else ""
+    print(f"memory estimate {stats['memory_bytes'] / 1e6:.0f} MB{measured}")
+
+    queries = [
+        words[0][:1], words[0][:2], words[3][:3], words[50][:4], words[500][:3], words[vocab // 2],
+        words[vocab - 1][:5], f"{words[0]} {words[1][:2]}", f"{words[10]} {words[200][:3]}",
+        f"{words[1]} {words[2]} {words[3][:1]}", f"{words[vocab // 3]} ",
+    ]
+    print(f"{'query':>28} {'median ms':>10} {'max ms':>8} {'matches':>8}  exhaustive")
+    for query in queries:
+        for tags in (None, ["urgent"]):
+            median, worst, result = timed(index, query, rounds, limit=10, tags=tags)
+            label = query + (" [urgent]" if tags else "")
+            print(f"{label:>28} {median * 1000:10.2f} {worst * 1000:8.2f} {result['total']:8}  {result['exhaustive']}")
+
+    sample = list(make_tasks(1000, words, rng))
+    start = time.perf_counter()
+    for task in sample:
+        task.id = rng.randint(1, tasks)
+        index.apply("replace", task)
+    updated = time.perf_counter() - start
+    start = time.perf_counter()
+    for task in sample:
+        index.apply("delete", task)
+    deleted = time.perf_counter() - start
+    print(f"update {updated * 1000:.2f} µs, delete {deleted * 1000:.2f} µs per task")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--trace", action="store_true", help="measure build memory with tracemalloc (slower)")
+    args = parser.parse_args()
+    run(args.tasks, args.vocab, args.rounds, args.trace)
+
+
+if __name__ == "__main__":
+    main()
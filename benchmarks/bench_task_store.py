@@ -0,0 +1,83 @@
+"""Per-request latency of the in-memory task store as the board grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_task_store --sizes 1000 10000 100000 1000000
+
+For each board size the store is filled, then a batch of random
+get / replace / delete+add operations is timed. With the indexed store
+the per-operation cost stays flat as the size grows.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from backend.storage.task_store import InMemoryTaskRepository
+
+STATUSES = ("todo", "in_progress", "done")
+PRIORITIES = ("low", "medium", "high")
+CATEGORIES = ("work", "personal", "focus")
+
+
+def make_task_data(n: int) -> dict:
+    now = datetime.now().isoformat()
+    category = CATEGORIES[n % 3]
+    return {
+        "title": f"Task {n}",
+        "status": STATUSES[n % 3],
+        "priority": PRIORITIES[n % 3],
+        "category": category,
+        "tags": [category],
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def fill(size: int) -> InMemoryTaskRepository:
+    store = InMemoryTaskRepository()
+    for n in range(size):
+        await store.create(make_task_data(n))
+    return store
+
+
+async def run(size: int, ops: int) -> dict:
+    store = await fill(size)
+    ids = random.sample(range(1, size + 1), min(ops, size))
+    timings = {}
+
+    start = time.perf_counter()
+    for task_id in ids:
+        await store.get(task_id)
+    timings["get"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        task = await store.get(task_id)
+        await store.replace(task.model_copy(update={"status": "done"}))
+    timings["update"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        await store.delete(task_id)
+        await store.create(make_task_data(task_id))
+    timings["delete"] = time.perf_counter() - start
+
+    return {name: total / len(ids) * 1e6 for name, total in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10} {'get us':>10} {'update us':>10} {'delete us':>10}")
+    for size in args.sizes:
+        result = asyncio.run(run(size, args.ops))
+        print(f"{size:>10} {result['get']:>10.2f} {result['update']:>10.2f} {result['delete']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
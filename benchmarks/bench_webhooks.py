@@ -0,0 +1,140 @@
+"""Webhook receiver latency and load shedding under a burst of pushes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_webhooks --rate 10000 --seconds 3
+
+Enables the Webhook integration with a secret, then sends signed
+Alertmanager notifications to POST /api/integrations/{id}/webhook at
+--rate requests per second for --seconds, calling the ASGI app in process.
+Reports how many were accepted (202) or shed (429), the time until each
+response started, the deepest the queue got and the process's peak RSS,
+so a burst past what the worker can apply shows up as 429s rather than
+memory.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import resource
+import time
+from collections import Counter
+
+from backend.main import app
+from backend.routes import integrations as integrations_route
+from backend.storage import ANONYMOUS, alert_store, integration_store
+
+SECRET = "bench-secret"
+
+
+def make_body(n: int, alerts: int) -> bytes:
+    return json.dumps({
+        "version": "4",
+        "status": "firing",
+        "receiver": "dailyops",
+        "alerts": [
+            {
+                "status": "firing" if n % 5 else "resolved",
+                "labels": {"alertname": f"Alert{(n + i) % 50}", "severity": "warning", "instance": f"host-{n % 1000}"},
+                "annotations": {"summary": f"Synthetic alert {n}"},
+                "fingerprint": f"{(n * alerts + i) % 20000:016x}",
+                "startsAt": "2024-01-01T00:00:00Z",
+            }
+            for i in range(alerts)
+        ],
+    }).encode()
+
+
+class Request:
+    """One webhook POST driven straight through the ASGI app"""
+
+    def __init__(self, path: str, body: bytes):
+        signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+            "headers": [
+                (b"host", b"bench"), (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()), (b"x-hub-signature-256", signature.encode()),
+            ],
+            "client": ("127.0.0.1", 0), "server": ("bench", 80),
+        }
+        self.body = body
+        self.status = None
+        self.latency = None
+
+    async def run(self):
+        start = time.perf_counter()
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                await asyncio.sleep(3600)
+            sent = True
+            return {"type": "http.request", "body": self.body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.status = message["status"]
+                self.latency = time.perf_counter() - start
+
+        await app(self.scope, receive, send)
+
+
+async def run(rate: int, seconds: float, alerts: int):
+    store = integration_store.tenant(ANONYMOUS)
+    await store.seed_defaults()
+    integration = next(i for i in await store.all() if i.type == "webhook")
+    await store.replace(integration.model_copy(update={"enabled": True, "config": {"webhook_secret": SECRET}}))
+    # The anonymous workspace's integrations only receive webhooks when allowed
+    integrations_route.WEBHOOK_ADMIN_USERS.add("anonymous")
+    path = f"/api/integrations/{integration.id}/webhook"
+    queue = integrations_route.webhook_queue
+    bodies = [make_body(n, alerts) for n in range(1000)]
+    print(f"{rate} requests/s for {seconds:g}s, {alerts} alerts and ~{len(bodies[0])} bytes per body")
+
+    requests, tasks = [], []
+    peak_queued = peak_bytes = 0
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+        # Offer load on schedule even when the app falls behind
+        while len(requests) < int(elapsed * rate):
+            request = Request(path, bodies[len(requests) % len(bodies)])
+            requests.append(request)
+            tasks.append(asyncio.ensure_future(request.run()))
+        peak_queued = max(peak_queued, queue.pending())
+        peak_bytes = max(peak_bytes, queue.queued_bytes)
+        await asyncio.sleep(0.005)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    while queue.pending():
+        await asyncio.sleep(0.01)
+
+    statuses = Counter(r.status for r in requests)
+    latencies = sorted(r.latency for r in requests)
+    print(f"sent {len(requests)} in {elapsed:.2f}s ({len(requests) / elapsed:.0f}/s): " +
+          ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    print(f"response start: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.1f} ms")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"queue peak: {peak_queued} bodies, {peak_bytes / 1e6:.1f} MB; process peak RSS {rss:.0f} MB")
+    print(f"worker: {queue.stats()}; {len(alert_store)} alerts stored")
+    await queue.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--alerts", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rate, args.seconds, args.alerts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""Scenario load tests for the API, saved as JSON and compared across commits.
+
+Run from the repository root:
+
+    python -m benchmarks.harness run --out before.json
+    git checkout <other commit>
+    python -m benchmarks.harness run --out after.json
+    python -m benchmarks.harness compare before.json after.json --threshold 0.25
+
+``run`` starts local stubs for Grafana, Jira, Slack and Supabase (see
+benchmarks/stubs.py), points the app at them and drives it with --users
+concurrent virtual users per scenario for --duration seconds, after a
+--warmup that is not recorded, --repeat times over; each metric is the
+median of the repeats. The app runs in process through ASGI by
+default, or under uvicorn on a local port with --uvicorn. Without network
+access nothing changes: every upstream is a stub.
+
+Scenarios:
+  dashboard     the requests the dashboard makes on load
+  task_churn    create, update, list and delete tasks
+  focus         log focus sessions and read the stats
+  login_storm   log in and call /api/auth/me with the new token
+
+For each scenario the JSON has request count, errors, throughput and
+p50/p95/p99 latency (overall and per step) and the app's RSS. ``compare``
+prints both runs side by side and exits with status 1 when a latency or
+RSS grew, or throughput fell, by more than --threshold (as a fraction) and
+by more than the --min-delta-ms / --min-delta-mb noise floors. Two runs of
+the same commit on a shared machine can differ by up to about 20%, hence
+the default threshold of 0.25; compare runs made on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.stubs import StubServices
+
+SCENARIOS: Dict[str, Callable[["Session"], Awaitable[None]]] = {}
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(latencies: List[float]) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+class Recorder:
+    """Latencies per step for one scenario; recording can be paused for warmup"""
+
+    def __init__(self):
+        self.recording = False
+        self.steps: Dict[str, List[float]] = {}
+        self.errors = 0
+
+    def add(self, step: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        self.steps.setdefault(step, []).append(seconds)
+        if not ok:
+            self.errors += 1
+
+
+class Session:
+    """One virtual user: an HTTP client plus the state its scenario keeps"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, user: int):
+        self.client = client
+        self.recorder = recorder
+        self.user = user
+        self.random = random.Random(user)
+        self.state: dict = {}
+
+    async def request(self, step: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(step, time.perf_counter() - start, False)
+            return None
+        self.recorder.add(step, time.perf_counter() - start, response.status_code < 400)
+        return response
+
+
+@scenario
+async def dashboard(session: Session):
+    """What index.html fetches when it opens, all at once like the browser"""
+    await asyncio.gather(
+        session.request("tasks", "GET", "/api/tasks/"),
+        session.request("alerts", "GET", "/api/alerts/grafana?limit=50"),
+        session.request("jira", "GET", "/api/tasks/jira"),
+        session.request("focus_stats", "GET", "/api/focus/stats?window=today"),
+        session.request("integrations", "GET", "/api/integrations/"),
+    )
+
+
+@scenario
+async def task_churn(session: Session):
+    response = await session.request("create", "POST", "/api/tasks/", json={
+        "title": f"Load test task {session.user}-{session.random.randrange(1_000_000)}",
+        "priority": session.random.choice(["low", "medium", "high"]),
+        "category": "work",
+    })
+    if response is None or response.status_code >= 400:
+        return
+    task_id = response.json()["id"]
+    await session.request("update", "PUT", f"/api/tasks/{task_id}", json={"title": response.json()["title"], "status": "in_progress"})
+    await session.request("list", "GET", "/api/tasks/")
+    await session.request("delete", "DELETE", f"/api/tasks/{task_id}")
+
+
+@scenario
+async def focus(session: Session):
+    await session.request("log", "POST", "/api/focus/sessions", json={
+        "duration": session.random.choice([15, 25, 50]),
+        "completed": True,
+        "notes": "load test",
+    })
+    await session.request("stats", "GET", "/api/focus/stats?window=7d")
+    await session.request("hourly", "GET", "/api/focus/stats/hourly")
+
+
+@scenario
+async def login_storm(session: Session):
+    email = f"user{session.user}-{session.random.randrange(1_000_000)}@example.com"
+    response = await session.request("login", "POST", "/api/auth/login", json={"email": email, "password": "load-test"})
+    if response is None or response.status_code >= 400:
+        return
+    token = response.json()["access_token"]
+    await session.request("me", "GET", "/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """Current resident set size of a process (this one by default)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak rather than current outside Linux; kilobytes there, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def drive(name: str, client: httpx.AsyncClient, users: int, duration: float, warmup: float, app_pid: Optional[int]) -> dict:
+    recorder = Recorder()
+    run_scenario = SCENARIOS[name]
+    sessions = [Session(client, recorder, user) for user in range(users)]
+    deadline = time.perf_counter() + warmup + duration
+    iterations = 0
+
+    async def user_loop(session: Session):
+        nonlocal iterations
+        while time.perf_counter() < deadline:
+            await run_scenario(session)
+            # In-process requests that never touch a socket do not yield on their own
+            await asyncio.sleep(0)
+            if recorder.recording:
+                iterations += 1
+
+    loops = [asyncio.ensure_future(user_loop(s)) for s in sessions]
+    await asyncio.sleep(warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*loops)
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds for step in recorder.steps.values() for seconds in step]
+    return {
+        **summarize(latencies),
+        "iterations": iterations,
+        "errors": recorder.errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "rss_mb": round(rss_mb(app_pid), 1),
+        "steps": {step: summarize(values) for step, values in recorder.steps.items()},
+    }
+
+
+def median_of(runs: List[dict]) -> dict:
+    """Per-metric median of repeated runs; steps come from the median-throughput run"""
+    ordered = sorted(runs, key=lambda r: r["throughput_rps"])
+    result = dict(ordered[len(ordered) // 2])
+    for key, value in result.items():
+        if isinstance(value, (int, float)):
+            values = sorted(r[key] for r in runs)
+            result[key] = values[len(values) // 2]
+    result["throughput_runs"] = [r["throughput_rps"] for r in runs]
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit("uvicorn did not start in time")
+
+
+async def run(args) -> dict:
+    try:
+        import supabase  # noqa: F401
+        has_supabase = True
+    except ImportError:
+        has_supabase = False
+    stubs = StubServices(delay=args.stub_latency_ms / 1000, supabase=has_supabase)
+    env = stubs.env()
+    os.environ.update(env)
+    results = {}
+    process = None
+    try:
+        if args.uvicorn:
+            port = _free_port()
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+                env={**os.environ, **env},
+            )
+            client = httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=30,
+                limits=httpx.Limits(max_connections=args.users * 5, max_keepalive_connections=args.users * 5),
+            )
+            await _wait_until_up(client, process)
+            app_pid = process.pid
+        else:
+            # Imported only now so every module reads the stub environment
+            from backend.main import app
+            await app.router.startup()
+            client = httpx.AsyncClient(app=app, base_url="http://harness", timeout=30)
+            app_pid = None
+
+        async with client:
+            for name in args.scenarios:
+                runs = [
+                    await drive(name, client, args.users, args.duration, args.warmup, app_pid)
+                    for _ in range(args.repeat)
+                ]
+                results[name] = result = median_of(runs)
+                print(f"{name:>12}: {result['throughput_rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f}  "
+                      f"p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} ms  "
+                      f"{result['errors']} errors  RSS {result['rss_mb']:.0f} MB")
+        if not args.uvicorn:
+            await app.router.shutdown()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        stubs.close()
+
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "started_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": "uvicorn" if args.uvicorn else "asgi",
+            "supabase": "stub" if has_supabase else "demo mode",
+            "users": args.users,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "repeat": args.repeat,
+            "stub_latency_ms": args.stub_latency_ms,
+            "stub_requests": stubs.requests(),
+        },
+        "scenarios": results,
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# (metric, higher is worse, noise floor option)
+COMPARED = (
+    ("p50_ms", True, "min_delta_ms"),
+    ("p95_ms", True, "min_delta_ms"),
+    ("p99_ms", True, "min_delta_ms"),
+    ("throughput_rps", False, None),
+    ("rss_mb", True, "min_delta_mb"),
+)
+
+
+def compare(args) -> int:
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    print(f"base {base['meta'].get('commit') or '?'}  vs  head {head['meta'].get('commit') or '?'}")
+    for key in ("mode", "users", "duration_s", "repeat", "stub_latency_ms"):
+        if base["meta"].get(key) != head["meta"].get(key):
+            print(f"  note: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)}); results may not be comparable")
+
+    regressions = []
+    for name, old in base["scenarios"].items():
+        new = head["scenarios"].get(name)
+        if new is None:
+            print(f"{name}: missing from head")
+            continue
+        print(f"{name}:")
+        for metric, higher_is_worse, floor_option in COMPARED:
+            before, after = old[metric], new[metric]
+            change = (after - before) / before if before else 0.0
+            worse = change > args.threshold if higher_is_worse else -change > args.threshold
+            floor = getattr(args, floor_option) if floor_option else 0.0
+            if worse and abs(after - before) >= floor:
+                regressions.append(f"{name} {metric}")
+                flag = "  REGRESSION"
+            else:
+                flag = ""
+            print(f"  {metric:>15}: {before:10.2f} -> {after:10.2f}  ({change * 100:+6.1f}%){flag}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"{name} errors")
+            print(f"  {'errors':>15}: {old['errors']:10d} -> {new['errors']:10d}  REGRESSION")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+    print(f"no regressions over {args.threshold * 100:.0f}%")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__.split("\n\n", 1)[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scenarios and save results as JSON")
+    run_parser.add_argument("--out", help="write results to this JSON file")
+    run_parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    run_parser.add_argument("--users", type=int, default=20)
+    run_parser.add_argument("--duration", type=float, default=5.0)
+    run_parser.add_argument("--warmup", type=float, default=2.0)
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median is reported")
+    run_parser.add_argument("--stub-latency-ms", type=float, default=5.0)
+    run_parser.add_argument("--uvicorn", action="store_true", help="serve the app with uvicorn instead of in-process ASGI")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+    compare_parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    compare_parser.add_argument("--min-delta-mb", type=float, default=10.0)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args))
+    results = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
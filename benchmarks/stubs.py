@@ -0,0 +1,245 @@
+"""Local stand-ins for Supabase, Grafana, Jira and Slack used by benchmarks.
+
+Each stub is a threaded HTTP server on 127.0.0.1 that answers the few
+endpoints the app calls, after an optional delay standing in for network
+latency. ``StubServices.env()`` gives the environment variables that point
+the app at them, so benchmarks never need network access. ``Faults`` wraps
+a stub's handler to inject latency and errors while it runs.
+"""
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from jose import jwt
+
+from backend.utils.grafana_api import ALERTS_PATH
+
+JWT_SECRET = "stub-jwt-secret"
+
+# (status, body, extra headers); body is JSON-encoded unless it is bytes
+Reply = Tuple[int, object, Dict[str, str]]
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response are expected when a run stops
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Serves ``handler(method, path, query, headers, body) -> Reply`` after ``delay`` seconds"""
+
+    def __init__(self, handler: Callable[..., Reply], delay: float = 0.0):
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_any(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+                stub.requests += 1
+                if delay:
+                    time.sleep(delay)
+                status, payload, headers = handler(self.command, url.path, parse_qs(url.query), self.headers, body)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = handle_any
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _QuietServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Faults:
+    """Wraps a stub handler with latency and errors that can be changed while its server runs.
+
+    Every request waits ``delay`` extra seconds (set it past the client's
+    timeout to make the upstream hang), and while ``status`` is set an
+    ``error_rate`` share of requests get that status instead of an answer.
+    """
+
+    def __init__(self, handler: Callable[..., Reply]):
+        self.handler = handler
+        self.delay = 0.0
+        self.status: Optional[int] = None
+        self.error_rate = 1.0
+
+    def heal(self):
+        self.delay = 0.0
+        self.status = None
+
+    def __call__(self, method, path, query, headers, body) -> Reply:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.status is not None and random.random() < self.error_rate:
+            return self.status, {"message": "injected failure"}, {}
+        return self.handler(method, path, query, headers, body)
+
+
+def _user(email: str) -> dict:
+    return {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_DNS, email)),
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": email,
+        "app_metadata": {"provider": "email"},
+        "user_metadata": {"name": email.split("@")[0]},
+        "created_at": "2024-01-01T00:00:00Z",
+    }
+
+
+def supabase_handler(method, path, query, headers, body) -> Reply:
+    """The GoTrue auth endpoints used by login, register and /me"""
+    if path == "/auth/v1/token" or path == "/auth/v1/signup":
+        email = json.loads(body or b"{}").get("email", "user@example.com")
+        user = _user(email)
+        token = jwt.encode(
+            {"sub": user["id"], "email": email, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600},
+            JWT_SECRET,
+            algorithm="HS256",
+        )
+        return 200, {
+            "access_token": token, "token_type": "bearer", "expires_in": 3600,
+            "expires_at": int(time.time()) + 3600, "refresh_token": uuid.uuid4().hex, "user": user,
+        }, {}
+    if path == "/auth/v1/user":
+        token = headers.get("Authorization", "")[7:]
+        claims = jwt.get_unverified_claims(token)
+        return 200, _user(claims["email"]), {}
+    if path.startswith("/rest/v1/"):
+        return 200, [], {}
+    return 404, {"message": "not found"}, {}
+
+
+class GrafanaStub:
+    """Alertmanager v2 alerts with ETag support"""
+
+    def __init__(self, alerts: int):
+        now = datetime.now(timezone.utc).isoformat()
+        feed = [
+            {
+                "labels": {"alertname": f"Alert{n % 20}", "severity": ("critical", "warning", "info")[n % 3], "instance": f"host-{n}"},
+                "annotations": {"summary": f"Stub alert {n}"},
+                "fingerprint": f"{n:016x}",
+                "startsAt": now,
+                "status": {"state": "active", "silencedBy": [], "inhibitedBy": []},
+            }
+            for n in range(alerts)
+        ]
+        self.body = json.dumps(feed).encode()
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+
+    def __call__(self, method, path, query, headers, body) -> Reply:
+        if path == ALERTS_PATH:
+            if headers.get("If-None-Match") == self.etag:
+                return 304, b"", {"ETag": self.etag}
+            return 200, self.body, {"ETag": self.etag}
+        if path in ("/api/health", "/api/org"):
+            return 200, {"name": "Main Org."}, {}
+        return 404, {"message": "not found"}, {}
+
+
+class JiraStub:
+    """Paged /rest/api/3/search over a fixed set of issues"""
+
+    def __init__(self, issues: int):
+        self.issues = [
+            {
+                "id": str(10000 + n),
+                "key": f"OPS-{n + 1}",
+                "fields": {
+                    "summary": f"Stub issue {n + 1}",
+                    "status": {"name": ("To Do", "In Progress", "Done")[n % 3], "statusCategory": {"key": ("new", "indeterminate", "done")[n % 3]}},
+                    "priority": {"name": ("High", "Medium", "Low")[n % 3]},
+                    "labels": [],
+                    "created": "2024-01-01T00:00:00.000+0000",
+                    "updated": "2024-01-02T00:00:00.000+0000",
+                },
+            }
+            for n in range(issues)
+        ]
+
+    def __call__(self, method, path, query, headers, body) -> Reply:
+        if path == "/rest/api/3/search":
+            start = int(query.get("startAt", ["0"])[0])
+            size = int(query.get("maxResults", ["100"])[0])
+            jql = query.get("jql", [""])[0]
+            # Delta syncs ask for recently updated issues; the stub has none
+            issues = [] if re.search(r"updated >=", jql) else self.issues
+            return 200, {"startAt": start, "maxResults": size, "total": len(issues), "issues": issues[start:start + size]}, {}
+        if path == "/rest/api/3/myself":
+            return 200, {"displayName": "Stub User"}, {}
+        return 404, {"errorMessages": ["not found"]}, {}
+
+
+def slack_handler(method, path, query, headers, body) -> Reply:
+    if method == "POST" and not json.loads(body or b"{}"):
+        return 400, b"no_text", {}
+    return 200, b"ok", {}
+
+
+class StubServices:
+    """All four stubs, started together"""
+
+    def __init__(self, delay: float = 0.0, alerts: int = 200, issues: int = 300, supabase: bool = True):
+        self.grafana = StubServer(GrafanaStub(alerts), delay)
+        self.jira = StubServer(JiraStub(issues), delay)
+        self.slack = StubServer(slack_handler, delay)
+        self.supabase: Optional[StubServer] = StubServer(supabase_handler, delay) if supabase else None
+
+    def env(self) -> Dict[str, str]:
+        env = {
+            "GRAFANA_BASE_URL": self.grafana.url,
+            "GRAFANA_API_KEY": "stub",
+            "JIRA_BASE_URL": self.jira.url,
+            "JIRA_EMAIL": "stub@example.com",
+            "JIRA_API_TOKEN": "stub",
+            "SLACK_WEBHOOK_URL": f"{self.slack.url}/services/stub",
+            # Without supabase-py the app runs in demo mode, which takes no key
+            "SUPABASE_URL": "",
+            "SUPABASE_ANON_KEY": "",
+            "SUPABASE_JWT_SECRET": "",
+        }
+        if self.supabase is not None:
+            env.update(SUPABASE_URL=self.supabase.url, SUPABASE_ANON_KEY="stub-anon-key", SUPABASE_JWT_SECRET=JWT_SECRET)
+        return env
+
+    def requests(self) -> Dict[str, int]:
+        stubs = {"grafana": self.grafana, "jira": self.jira, "slack": self.slack, "supabase": self.supabase}
+        return {name: stub.requests for name, stub in stubs.items() if stub is not None}
+
+    def close(self):
+        for stub in (self.grafana, self.jira, self.slack, self.supabase):
+            if stub is not None:
+                stub.close()
@@ -6,3 +6,16 @@ const API_BASE_URL = window.location.hostname === 'localhost'
 
 console.log('API Base URL:', API_BASE_URL);
 
+
+// The dashboard stores the login token as auth_token, the settings page as authToken
+function getAuthToken() {
+    return localStorage.getItem('auth_token') || localStorage.getItem('authToken');
+}
+
+// fetch() for API calls; sends the login token so the server returns the user's own data
+function apiFetch(url, options = {}) {
+    const token = getAuthToken();
+    if (!token) return fetch(url, options);
+    const headers = { ...(options.headers || {}), 'Authorization': `Bearer ${token}` };
+    return fetch(url, { ...options, headers });
+}
@@ -70,7 +70,7 @@ async function completeSession() {
     
     const minutes = 25; // or calculate from timeRemaining
     try {
-        const response = await fetch(`${API_BASE_URL}/focus/sessions`, {
+        const response = await apiFetch(`${API_BASE_URL}/focus/sessions`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -93,7 +93,7 @@ async function completeSession() {
 // Load sessions
 async function loadSessions() {
     try {
-        const response = await fetch(`${API_BASE_URL}/focus/sessions`);
+        const response = await apiFetch(`${API_BASE_URL}/focus/sessions`);
         sessions = await response.json();
         renderSessions();
         updateStats();
@@ -123,17 +123,15 @@ function renderSessions() {
 }
 
 // Update stats
-function updateStats() {
-    const todayMinutes = sessions
-        .filter(s => new Date(s.created_at).toDateString() === new Date().toDateString())
-        .reduce((sum, s) => sum + s.duration, 0);
-    
-    const completedToday = sessions.filter(s => 
-        new Date(s.created_at).toDateString() === new Date().toDateString() && s.completed
-    ).length;
-    
-    document.getElementById('todayFocus').textContent = `${todayMinutes}m`;
-    document.getElementById('sessionsCompleted').textContent = completedToday;
+async function updateStats() {
+    try {
+        const response = await apiFetch(`${API_BASE_URL}/focus/stats?window=today`);
+        const today = await response.json();
+        document.getElementById('todayFocus').textContent = `${today.total_minutes}m`;
+        document.getElementById('sessionsCompleted').textContent = today.completed_sessions;
+    } catch (error) {
+        console.error('Error loading focus stats:', error);
+    }
     document.getElementById('weeklyStreak').textContent = calculateStreak();
 }
 
@@ -4,15 +4,56 @@
 // DOM Elements
 let tasks = [];
 let alerts = [];
+let alertsTotal = 0;
+let alertCounts = {};
+let streamConnected = false;
+
+// Alerts listed on the dashboard; the rest are summarized by count
+const ALERTS_SHOWN = 50;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     loadTasks();
     loadAlerts();
+    subscribeToChanges();
     setupEventListeners();
     updateAuthButton();
 });
 
+// Apply task and alert changes pushed by the server instead of re-fetching
+function subscribeToChanges() {
+    if (!window.EventSource) return;
+    // EventSource cannot send headers, so the token goes in the query string
+    const token = getAuthToken();
+    const auth = token ? `&access_token=${encodeURIComponent(token)}` : '';
+    const source = new EventSource(`${API_BASE_URL}/stream?topics=task&topics=alert${auth}`);
+    source.onopen = () => { streamConnected = true; };
+    source.onerror = () => { streamConnected = false; };
+
+    const applyTask = (event) => {
+        const task = JSON.parse(event.data).data;
+        const index = tasks.findIndex(t => t.id === task.id);
+        if (event.type === 'task.deleted') {
+            if (index !== -1) tasks.splice(index, 1);
+        } else if (index !== -1) {
+            tasks[index] = task;
+        } else {
+            tasks.push(task);
+        }
+        renderTasks();
+        updateStats();
+    };
+    source.addEventListener('task.created', applyTask);
+    source.addEventListener('task.updated', applyTask);
+    source.addEventListener('task.deleted', applyTask);
+    source.addEventListener('alert.changed', () => loadAlerts());
+    // Too far behind to catch up from deltas
+    source.addEventListener('resync', () => {
+        loadTasks();
+        loadAlerts();
+    });
+}
+
 // Setup event listeners
 function setupEventListeners() {
     // Task modal
@@ -85,7 +126,7 @@ function setupEventListeners() {
 // Load tasks
 async function loadTasks() {
     try {
-        const response = await fetch(`${API_BASE_URL}/tasks/`);
+        const response = await apiFetch(`${API_BASE_URL}/tasks/`);
         tasks = await response.json();
         renderTasks();
         updateStats();
@@ -128,7 +169,7 @@ async function createTask() {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/tasks/`, {
+        const response = await apiFetch(`${API_BASE_URL}/tasks/`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ 
@@ -146,7 +187,7 @@ async function createTask() {
             document.getElementById('taskDescription').value = '';
             document.getElementById('taskType').value = 'work';
             document.getElementById('taskPriority').value = 'medium';
-            loadTasks();
+            if (!streamConnected) loadTasks();
         } else {
             alert('Failed to create task. Please try again.');
         }
@@ -160,12 +201,12 @@ async function createTask() {
 async function updateTaskStatus(taskId, status) {
     const task = tasks.find(t => t.id === taskId);
     try {
-        await fetch(`${API_BASE_URL}/tasks/${taskId}`, {
+        await apiFetch(`${API_BASE_URL}/tasks/${taskId}`, {
             method: 'PUT',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ ...task, status })
         });
-        loadTasks();
+        if (!streamConnected) loadTasks();
     } catch (error) {
         console.error('Error updating task:', error);
     }
@@ -174,10 +215,10 @@ async function updateTaskStatus(taskId, status) {
 // Delete task
 async function deleteTask(taskId) {
     try {
-        await fetch(`${API_BASE_URL}/tasks/${taskId}`, {
+        await apiFetch(`${API_BASE_URL}/tasks/${taskId}`, {
             method: 'DELETE'
         });
-        loadTasks();
+        if (!streamConnected) loadTasks();
     } catch (error) {
         console.error('Error deleting task:', error);
     }
@@ -186,13 +227,17 @@ async function deleteTask(taskId) {
 // Load alerts
 async function loadAlerts() {
     try {
-        const response = await fetch(`${API_BASE_URL}/alerts/grafana`);
+        const response = await apiFetch(`${API_BASE_URL}/alerts/grafana?limit=${ALERTS_SHOWN}`);
         const data = await response.json();
         alerts = data.alerts || [];
+        alertsTotal = data.total ?? alerts.length;
+        alertCounts = data.counts || {};
         renderAlerts();
+        updateStats();
     } catch (error) {
         console.error('Error loading alerts:', error);
         alerts = [];
+        alertsTotal = 0;
         renderAlerts();
     }
 }
@@ -208,14 +253,16 @@ function renderAlerts() {
                 <h3 class="font-semibold">${alert.name}</h3>
                 <p class="text-sm">Status: ${alert.status} | Severity: ${alert.severity}</p>
             </div>
-        `).join('');
+        `).join('') + (alertsTotal > alerts.length
+            ? `<p class="text-gray-500 text-sm">and ${alertsTotal - alerts.length} more</p>`
+            : '');
     }
 }
 
 // Update stats
 function updateStats() {
     document.getElementById('tasksCount').textContent = tasks.length;
-    document.getElementById('alertsCount').textContent = alerts.length;
+    document.getElementById('alertsCount').textContent = alertsTotal;
 }
 
 // Save notes
@@ -225,21 +272,10 @@ function saveNotes() {
     alert('Notes saved!');
 }
 
-// Generate end of day report
+// Send today's end of day report; the server computes it from stored tasks and focus sessions
 async function generateEndOfDayReport() {
-    const tasksCompleted = tasks.filter(t => t.status === 'done').length;
-    const report = {
-        tasks_completed: tasksCompleted,
-        total_tasks: tasks.length,
-        alerts_resolved: 0
-    };
-
     try {
-        const response = await fetch(`${API_BASE_URL}/alerts/slack/end-of-day`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(report)
-        });
+        const response = await apiFetch(`${API_BASE_URL}/alerts/slack/end-of-day`, { method: 'POST' });
         alert('End of day report sent to Slack!');
     } catch (error) {
         console.error('Error sending report:', error);
@@ -41,6 +41,7 @@ function setupEventListeners() {
 
     document.getElementById('saveIntegrationBtn').addEventListener('click', saveIntegration);
     document.getElementById('testIntegrationBtn').addEventListener('click', testIntegration);
+    document.getElementById('testAllIntegrationsBtn').addEventListener('click', testAllIntegrations);
     
     // Dynamic config fields
     document.getElementById('integrationType').addEventListener('change', renderConfigFields);
@@ -162,11 +163,21 @@ function checkAuth() {
 }
 
 // Integration functions
+let integrationHealth = {};
+
 async function loadIntegrations() {
     try {
-        const response = await fetch(`${API_BASE_URL}/integrations/`);
+        // Health comes from the background monitor's cache, not a live probe
+        const [response, healthResponse] = await Promise.all([
+            apiFetch(`${API_BASE_URL}/integrations/`),
+            apiFetch(`${API_BASE_URL}/integrations/health`)
+        ]);
         const integrations = await response.json();
+        const health = healthResponse.ok ? await healthResponse.json() : { results: [] };
+        integrationHealth = {};
+        health.results.forEach(result => { integrationHealth[result.id] = result; });
         renderIntegrations(integrations);
+        renderUpstreams(health.upstreams || []);
     } catch (error) {
         console.error('Error loading integrations:', error);
     }
@@ -189,6 +200,7 @@ function renderIntegrations(integrations) {
                         </span>
                     </div>
                     <p class="text-sm text-gray-600">Configuration: ${Object.keys(integration.config || {}).length} field(s)</p>
+                    ${renderHealth(integrationHealth[integration.id])}
                 </div>
                 <div class="space-x-2">
                     <button onclick="editIntegration(${integration.id})" class="bg-blue-600 text-white px-3 py-1 rounded hover:bg-blue-700">Edit</button>
@@ -203,6 +215,53 @@ function renderIntegrations(integrations) {
     `).join('');
 }
 
+function renderHealth(result) {
+    if (!result) return '';
+    const colors = {
+        ok: 'text-green-700',
+        unconfigured: 'text-yellow-700',
+        error: 'text-red-700'
+    };
+    const latency = result.latency_ms !== null ? ` (${result.latency_ms} ms)` : '';
+    return `<p class="text-sm ${colors[result.status] || 'text-gray-600'}">
+        Health: ${result.status}${latency} - ${result.message}
+        <span class="text-gray-500">checked ${new Date(result.checked_at).toLocaleTimeString()}</span>
+    </p>`;
+}
+
+function renderUpstreams(upstreams) {
+    const container = document.getElementById('upstreamStatus');
+    if (!upstreams.length) {
+        container.innerHTML = '';
+        return;
+    }
+    const colors = {
+        closed: 'bg-green-100 text-green-800',
+        half_open: 'bg-yellow-100 text-yellow-800',
+        open: 'bg-red-100 text-red-800'
+    };
+    container.innerHTML = `
+        <h4 class="text-lg font-bold mb-2">Service Connections</h4>
+        <div class="space-y-2">
+            ${upstreams.map(upstream => `
+                <div class="flex items-center text-sm">
+                    <span class="w-24 font-medium">${upstream.name}</span>
+                    <span class="px-2 py-1 text-xs rounded ${colors[upstream.state] || 'bg-gray-100 text-gray-800'}">
+                        ${upstream.state.replace('_', ' ').toUpperCase()}
+                    </span>
+                    <span class="ml-2 text-gray-600">
+                        timeout ${upstream.timeout}s${upstream.p99_ms !== null ? `, p99 ${upstream.p99_ms} ms` : ''},
+                        ${upstream.in_flight}/${upstream.max_concurrency} in flight
+                    </span>
+                    ${upstream.state !== 'closed' ? `
+                        <span class="ml-2 text-red-700">retry in ${Math.ceil(upstream.retry_after)}s - ${upstream.last_error}</span>
+                    ` : ''}
+                </div>
+            `).join('')}
+        </div>
+    `;
+}
+
 function getIntegrationTypeColor(type) {
     const colors = {
         grafana: 'bg-purple-100 text-purple-800',
@@ -229,7 +288,9 @@ function renderConfigFields() {
         ],
         slack: [
             { name: 'webhook_url', label: 'Webhook URL', type: 'url', placeholder: 'https://hooks.slack.com/services/...' },
-            { name: 'channel', label: 'Channel', type: 'text', placeholder: '#alerts' }
+            { name: 'channel', label: 'Channel', type: 'text', placeholder: '#alerts' },
+            { name: 'report_time', label: 'Daily Report Time (optional)', type: 'time', placeholder: '18:00' },
+            { name: 'timezone', label: 'Report Timezone', type: 'text', placeholder: 'Europe/Berlin' }
         ],
         webhook: [
             { name: 'url', label: 'Webhook URL', type: 'url', placeholder: 'https://your-webhook-url.com/endpoint' },
@@ -297,7 +358,7 @@ async function saveIntegration() {
             method = 'PUT';
         }
 
-        const response = await fetch(url, {
+        const response = await apiFetch(url, {
             method,
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ name, type, enabled, config })
@@ -328,26 +389,42 @@ async function testIntegration() {
 
 async function testIntegrationConnection(id) {
     try {
-        const response = await fetch(`${API_BASE_URL}/integrations/${id}/test`, {
+        const response = await apiFetch(`${API_BASE_URL}/integrations/${id}/test`, {
             method: 'POST'
         });
 
         const data = await response.json();
-        if (response.ok) {
-            alert('Connection test successful!');
+        if (response.ok && data.status === 'ok') {
+            alert(`Connection test successful! ${data.message} (${data.latency_ms} ms)`);
         } else {
-            alert('Connection test failed: ' + (data.detail || 'Unknown error'));
+            alert('Connection test failed: ' + (data.detail || data.message || 'Unknown error'));
         }
+        loadIntegrations();
     } catch (error) {
         console.error('Error testing integration:', error);
         alert('Connection test failed. Check console for details.');
     }
 }
 
+async function testAllIntegrations() {
+    try {
+        const response = await apiFetch(`${API_BASE_URL}/integrations/test-all`, {
+            method: 'POST'
+        });
+        const data = await response.json();
+        const failed = data.results.filter(result => result.status !== 'ok');
+        alert(`Tested ${data.results.length} integration(s) in ${data.elapsed_ms} ms, ${failed.length} not healthy`);
+        loadIntegrations();
+    } catch (error) {
+        console.error('Error testing integrations:', error);
+        alert('Testing integrations failed. Check console for details.');
+    }
+}
+
 async function editIntegration(id) {
     currentIntegrationId = id;
     try {
-        const response = await fetch(`${API_BASE_URL}/integrations/${id}`);
+        const response = await apiFetch(`${API_BASE_URL}/integrations/${id}`);
         if (!response.ok) throw new Error('Failed to fetch integration');
         
         const integration = await response.json();
@@ -375,7 +452,7 @@ async function editIntegration(id) {
 }
 
 function toggleIntegration(id, enabled) {
-    fetch(`${API_BASE_URL}/integrations/${id}`, {
+    apiFetch(`${API_BASE_URL}/integrations/${id}`, {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ enabled })
@@ -385,7 +462,7 @@ function toggleIntegration(id, enabled) {
 
 function deleteIntegration(id) {
     if (confirm('Are you sure you want to delete this integration?')) {
-        fetch(`${API_BASE_URL}/integrations/${id}`, {
+        apiFetch(`${API_BASE_URL}/integrations/${id}`, {
         method: 'DELETE'
         })
         .then(() => loadIntegrations());
@@ -0,0 +1,46 @@
+"""AsyncTTLCache stays bounded whatever keys callers make up."""
+import asyncio
+
+from backend.utils.cache import AsyncTTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def load(value):
+    async def loader():
+        return value
+    return loader
+
+
+def test_unknown_keys_are_not_cached():
+    cache = AsyncTTLCache(ttl=5, max_entries=10)
+
+    async def main():
+        for key in range(1000):
+            assert await cache.get_or_load(str(key), load(None)) is None
+
+    asyncio.run(main())
+    assert cache.stats()["keys"] == 0
+
+
+def test_least_recently_used_and_expired_keys_are_dropped():
+    clock = Clock()
+    cache = AsyncTTLCache(ttl=5, max_entries=3, clock=clock)
+
+    async def main():
+        for key in "abc":
+            await cache.get_or_load(key, load(key))
+        await cache.get_or_load("a", load("reloaded"))  # a hit makes "a" recently used
+        await cache.get_or_load("d", load("d"))
+        assert cache.peek("b") is None and cache.peek("a") == "a"
+        clock.now = 10
+        await cache.get_or_load("e", load("e"))
+
+    asyncio.run(main())
+    assert cache.stats()["keys"] == 1 and cache.peek("e") == "e"
@@ -0,0 +1,36 @@
+"""List ETags are per tenant: one tenant's tag never gets a 304 for another's list."""
+import asyncio
+import time
+
+import httpx
+import pytest
+from jose import jwt
+
+from backend.main import app
+from backend.utils import token_verifier as tv
+
+SECRET = "test-secret"
+
+
+def bearer(user_id: str) -> dict:
+    claims = {"sub": user_id, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600}
+    return {"Authorization": f"Bearer {jwt.encode(claims, SECRET, algorithm='HS256')}"}
+
+
+@pytest.mark.parametrize("path", ["/api/tasks/", "/api/focus/sessions", "/api/integrations/"])
+def test_another_tenants_etag_does_not_match(monkeypatch, path):
+    monkeypatch.setattr(tv, "token_verifier", tv.TokenVerifier(secret=SECRET))
+    alice, bob = bearer(f"etag-alice{path}"), bearer(f"etag-bob{path}")
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            first = await client.get(path, headers=alice)
+            etag = first.headers["ETag"]
+            again = await client.get(path, headers={**alice, "If-None-Match": etag})
+            other = await client.get(path, headers={**bob, "If-None-Match": etag})
+            return first, again, other
+
+    first, again, other = asyncio.run(main())
+    assert first.status_code == 200 and again.status_code == 304
+    assert other.status_code == 200 and other.headers["ETag"] != first.headers["ETag"]
+    assert first.headers["Vary"] == again.headers["Vary"] == other.headers["Vary"] == "Authorization"
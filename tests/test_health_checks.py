@@ -0,0 +1,152 @@
+"""Integration probes turn every bad config into a result, never an exception,
+and never reach private addresses or echo what the upstream answered. Slack
+webhooks are held to the same address rule when saved and when posted to."""
+import asyncio
+
+import httpcore
+import httpx
+import pytest
+
+from backend.main import app
+from backend.models.integration_model import Integration
+from backend.utils import http_client
+from backend.utils.health_checks import HealthMonitor
+from backend.utils.slack_notify import SlackDispatcher, SlackNotifier
+
+
+def integration(n: int, kind: str, config) -> Integration:
+    return Integration(id=n, name=f"{kind}-{n}", type=kind, enabled=True, config=config,
+                       created_at="2024-01-01T00:00:00", updated_at="2024-01-01T00:00:00")
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.startswith("/services"):
+            return httpx.Response(403, text="secret internal page")
+        return httpx.Response(200, json={"displayName": "secret internal name"})
+
+    transport = http_client.PinningTransport(httpx.MockTransport(handler), http_client.CachingResolver())
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=transport))
+    return requests
+
+
+def test_bad_configs_do_not_fail_the_sweep(upstream):
+    monitor = HealthMonitor(timeout=1)
+    integrations = [
+        integration(1, "webhook", {"url": "http://a:notaport/"}),
+        integration(2, "grafana", {"url": 123}),
+        integration(3, "jira", {"url": "https://1.1.1.1", "email": ["x"], "api_token": "t"}),
+        integration(4, "grafana", {"url": "https://1.1.1.1"}),
+    ]
+
+    results = {r["id"]: r for r in asyncio.run(monitor.check_all(integrations))}
+    assert results[1]["status"] == "error"
+    assert results[2] == {**results[2], "status": "unconfigured", "message": "Expected text for url"}
+    assert results[3]["status"] == "unconfigured"
+    assert results[4]["status"] == "ok"
+    assert set(monitor.results) == {1, 2, 3, 4}
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/",
+    "http://localhost/",
+    "http://10.0.0.5/",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/",
+    "http://[::ffff:192.168.0.1]/",
+])
+def test_private_targets_are_refused(upstream, url):
+    result = asyncio.run(HealthMonitor(timeout=1).check(integration(1, "webhook", {"url": url})))
+    assert result["status"] == "error"
+    assert "private, loopback or link-local" in result["message"]
+    assert upstream == []
+
+
+def test_results_do_not_echo_the_upstream(upstream):
+    monitor = HealthMonitor(timeout=1)
+    jira = integration(1, "jira", {"url": "https://1.1.1.1", "email": "bot@example.com", "api_token": "t"})
+    slack = integration(2, "slack", {"webhook_url": "https://1.1.1.1/services/x"})
+
+    results = asyncio.run(monitor.check_all([jira, slack]))
+    assert [r["status"] for r in results] == ["ok", "error"]
+    assert results[1]["message"] == "Slack answered HTTP 403"
+    assert not any("secret" in r["message"] for r in results)
+
+
+def test_private_slack_webhooks_are_not_saved():
+    slack = {"name": "Slack", "type": "slack", "config": {"webhook_url": "http://169.254.169.254/latest/"}}
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            refused = await client.post("/api/integrations/", json=slack)
+            created = await client.post("/api/integrations/", json={**slack, "config": {"webhook_url": "https://1.1.1.1/services/x"}})
+            moved = await client.put(f"/api/integrations/{created.json()['id']}", json={"config": {"webhook_url": "http://10.0.0.5/"}})
+            await client.delete(f"/api/integrations/{created.json()['id']}")
+            return refused, created, moved
+
+    refused, created, moved = asyncio.run(main())
+    assert refused.status_code == 400 and "private, loopback or link-local" in refused.json()["detail"]
+    assert created.status_code == 200
+    assert moved.status_code == 400
+
+
+def deliver(url: str) -> dict:
+    async def main():
+        dispatcher = SlackDispatcher(SlackNotifier(), max_attempts=3, backoff_base=0)
+        delivery_id = dispatcher.submit({"text": "report"}, url)
+        while dispatcher.get(delivery_id)["status"] not in ("sent", "failed"):
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return dispatcher.get(delivery_id)
+
+    return asyncio.run(main())
+
+
+def test_private_slack_webhooks_are_not_posted_to(upstream):
+    delivery = deliver("http://127.0.0.1:8000/services/x")
+    assert delivery["status"] == "failed" and delivery["attempts"] == 1
+    assert "private, loopback or link-local" in delivery["last_error"]
+    assert upstream == []
+
+
+def test_private_targets_can_be_allowed(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, "ALLOW_PRIVATE_TARGETS", True)
+    assert deliver("http://127.0.0.1:8000/hooks/x")["status"] == "sent"
+    assert len(upstream) == 1
+
+
+class RebindingResolver(http_client.CachingResolver):
+    """Answers with a public address once, then with loopback"""
+
+    def __init__(self):
+        super().__init__(ttl=0)
+        self.answers = [["1.1.1.1"], ["127.0.0.1"]]
+
+    async def resolve(self, host):
+        return self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+
+
+class RecordingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self):
+        self.dialled = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.dialled.append(host)
+        raise httpcore.ConnectError("not dialling out from tests")
+
+
+def test_connections_dial_the_checked_address():
+    resolver, backend = RebindingResolver(), RecordingBackend()
+    pool = http_client.PoolTransport(httpx.Limits(), http_client.PinnedBackend(resolver, backend))
+
+    async def main():
+        async with httpx.AsyncClient(transport=http_client.PinningTransport(pool, resolver)) as client:
+            await client.get("http://rebind.example/", extensions=http_client.PUBLIC_ONLY)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(main())
+    assert backend.dialled == ["1.1.1.1"]
@@ -0,0 +1,103 @@
+"""Jira delta sync against a fake Jira served through httpx.MockTransport."""
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import httpx
+import pytest
+
+from backend.storage.ticket_store import TicketStore
+from backend.utils import http_client
+from backend.utils.jira_api import JiraClient
+from backend.utils.jira_sync import JiraSyncEngine
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# JQL dates are read in this zone, not in UTC like the timestamps below
+USER_ZONE = ZoneInfo("America/New_York")
+
+
+class FakeJira:
+    """Answers /myself and /search, filtering on ``updated >= "..."`` the way Jira does"""
+
+    def __init__(self, issues: int):
+        self.issues = {}
+        self.requests = []
+        for n in range(1, issues + 1):
+            self.update(n, START + timedelta(minutes=n))
+
+    def update(self, n: int, when: datetime):
+        self.issues[n] = {
+            "id": str(10000 + n),
+            "key": f"OPS-{n}",
+            "fields": {
+                "summary": f"Issue {n}",
+                "status": {"name": "To Do", "statusCategory": {"key": "new"}},
+                "priority": {"name": "Medium"},
+                "labels": [],
+                "created": START.isoformat(timespec="milliseconds"),
+                "updated": when.strftime("%Y-%m-%dT%H:%M:%S.000%z"),
+            },
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/rest/api/3/myself":
+            return httpx.Response(200, json={"accountId": "me", "timeZone": str(USER_ZONE)})
+        params = request.url.params
+        matching = [self.issues[n] for n in sorted(self.issues)]
+        since = re.search(r'updated >= "([^"]+)"', params["jql"])
+        if since:
+            floor = datetime.strptime(since.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=USER_ZONE)
+            matching = [i for i in matching if datetime.fromisoformat(i["fields"]["updated"]) >= floor]
+        start, size = int(params["startAt"]), int(params["maxResults"])
+        return httpx.Response(200, json={"total": len(matching), "issues": matching[start:start + size]})
+
+    def searches(self):
+        return [r.url.params["jql"] for r in self.requests if r.url.path == "/rest/api/3/search"]
+
+
+@pytest.fixture
+def jira(monkeypatch):
+    fake = FakeJira(issues=250)
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)))
+    monkeypatch.setenv("JIRA_BASE_URL", "https://jira.test")
+    monkeypatch.setenv("JIRA_EMAIL", "bot@example.com")
+    monkeypatch.setenv("JIRA_API_TOKEN", "token")
+    return fake
+
+
+def poll(engine: JiraSyncEngine, fake: FakeJira):
+    fake.requests.clear()
+    result = asyncio.run(engine.sync_once())
+    assert result["requests"] == len(fake.requests)
+    return result
+
+
+def test_full_then_delta_then_full_sync(jira):
+    store = TicketStore()
+    engine = JiraSyncEngine(JiraClient(), store, jql="project = OPS", page_size=100, full_sync_every=2)
+
+    first = poll(engine, jira)
+    assert first["full"] and first["fetched"] == 250 and first["requests"] == 3
+    assert len(store) == 250
+    assert jira.searches()[0] == "project = OPS ORDER BY key ASC"
+
+    jira.update(5, START + timedelta(hours=12, minutes=30))
+    jira.update(251, START + timedelta(hours=12, minutes=31))
+    delta = poll(engine, jira)
+    # Newest update seen was 04:10 UTC; one minute earlier is 23:09 the day before in New York
+    assert jira.searches() == ['(project = OPS) AND updated >= "2023/12/31 23:09" ORDER BY key ASC']
+    assert not delta["full"] and delta["requests"] == 2  # /myself once, then one page
+    assert delta["fetched"] == 4  # OPS-249 and OPS-250 again from the overlap, OPS-5 and OPS-251
+    assert store.get("OPS-5")["updated"].startswith("2024-01-01T12:30")
+    assert len(store) == 251
+
+    quiet = poll(engine, jira)
+    assert jira.searches() == ['(project = OPS) AND updated >= "2024/01/01 07:30" ORDER BY key ASC']
+    assert not quiet["full"] and quiet["requests"] == 1 and quiet["fetched"] == 2
+
+    del jira.issues[7]
+    full = poll(engine, jira)
+    assert full["full"] and full["requests"] == 3 and full["fetched"] == 250
+    assert store.get("OPS-7") is None and len(store) == 250
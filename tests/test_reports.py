@@ -0,0 +1,119 @@
+"""Scheduled reports run by several workers sharing one integration store,
+and cover the user's own calendar day."""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from backend.storage import focus_store, integration_store, task_store
+from backend.storage.sqlite_store import SQLiteDatabase, SQLiteIntegrationIndex
+from backend.utils.reports import ReportScheduler, build_report
+
+DUE = datetime(2024, 3, 1, 18, 0, tzinfo=timezone.utc)
+
+
+class Notifier:
+    def build_end_of_day_payload(self, report: dict) -> dict:
+        return report
+
+
+class Dispatcher:
+    """Stands in for SlackDispatcher, recording what would be sent where"""
+
+    notifier = Notifier()
+
+    def __init__(self, sent: list):
+        self.sent = sent
+
+    async def enqueue(self, payload: dict, webhook_url: str):
+        self.sent.append((webhook_url, payload["date"]))
+
+
+async def create_integration(user_id: str, report_time: str):
+    return await integration_store.tenant(user_id).create({
+        "name": "Slack", "type": "slack", "enabled": True,
+        "config": {"webhook_url": f"https://hooks.example/{user_id}", "report_time": report_time, "timezone": "UTC"},
+        "created_at": DUE.isoformat(), "updated_at": DUE.isoformat(),
+    })
+
+
+def test_each_report_is_sent_by_one_worker():
+    sent = []
+    workers = [ReportScheduler(Dispatcher(sent)) for _ in range(4)]
+
+    async def main():
+        integration = await create_integration("reports-shared", "18:00")
+        for worker in workers:
+            worker.schedule(integration, after=datetime(2024, 3, 1, tzinfo=timezone.utc))
+        queued = await asyncio.gather(*(worker.run_due(now=DUE.timestamp()) for worker in workers))
+        return sum(queued)
+
+    assert asyncio.run(main()) == 1
+    assert sent == [("https://hooks.example/reports-shared", "2024-03-01")]
+    assert sum(worker.claimed_elsewhere for worker in workers) == 3
+
+
+def test_changes_made_on_another_worker_are_read_before_sending():
+    sent = []
+    worker = ReportScheduler(Dispatcher(sent))
+
+    async def main():
+        moved = await create_integration("reports-moved", "18:00")
+        disabled = await create_integration("reports-disabled", "18:00")
+        for integration in (moved, disabled):
+            worker.schedule(integration, after=datetime(2024, 3, 1, tzinfo=timezone.utc))
+        # Another worker served these edits, so this one's heap still says 18:00
+        await integration_store.tenant("reports-moved").replace(
+            moved.model_copy(update={"config": {**moved.config, "report_time": "19:30"}})
+        )
+        await integration_store.tenant("reports-disabled").replace(disabled.model_copy(update={"enabled": False}))
+        assert await worker.run_due(now=DUE.timestamp()) == 0
+        assert await worker.run_due(now=DUE.replace(hour=19, minute=30).timestamp()) == 1
+
+    asyncio.run(main())
+    assert sent == [("https://hooks.example/reports-moved", "2024-03-01")]
+    assert worker.stats()["scheduled"] == 1
+
+
+def test_sqlite_claims_each_day_once(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "reports.db"))
+    repository = SQLiteIntegrationIndex(db)
+
+    async def main():
+        return [
+            await repository.claim_report(1, "2024-03-01"),
+            await repository.claim_report(1, "2024-03-01"),
+            await repository.claim_report(2, "2024-03-01"),
+            await repository.claim_report(1, "2024-02-29"),
+            await repository.claim_report(1, "2024-03-02"),
+        ]
+
+    try:
+        assert asyncio.run(main()) == [True, False, True, False, True]
+    finally:
+        db.close()
+
+
+def test_report_covers_the_users_local_day():
+    # UTC+14: most of this day is the previous day in server time
+    zone = ZoneInfo("Pacific/Kiritimati")
+    start = datetime(2024, 3, 1, tzinfo=zone).astimezone().replace(tzinfo=None)
+    # Written in time order, as the API stamps them
+    times = {"before": start - timedelta(hours=1), "inside": start + timedelta(hours=1), "after": start + timedelta(hours=25)}
+
+    async def main():
+        user_id = "reports-kiritimati"
+        await task_store.tenant(user_id).bulk_write([
+            ("create", {
+                "title": name, "description": None, "status": "done", "priority": "medium", "category": None,
+                "tags": [], "created_at": at.isoformat(), "updated_at": at.isoformat(),
+            })
+            for name, at in times.items()
+        ])
+        for minutes, at in zip((20, 10, 40), times.values()):
+            await focus_store.tenant(user_id).create(
+                {"duration": minutes, "task_id": None, "completed": True, "notes": None, "created_at": at.isoformat()}
+            )
+        return await build_report(user_id, date(2024, 3, 1), zone)
+
+    report = asyncio.run(main())
+    assert report == {"date": "2024-03-01", "tasks_completed": 1, "focus_minutes": 10, "focus_sessions": 1}
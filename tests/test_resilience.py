@@ -0,0 +1,170 @@
+"""Circuit breakers, adaptive timeouts and bulkheads for outbound calls.
+
+Latency and failures are injected into a local stub Grafana served over
+real HTTP, the same stub the benchmarks use.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from backend.utils import http_client
+from backend.utils.grafana_api import ALERTS_PATH, GrafanaClient
+from backend.utils.resilience import CLOSED, HALF_OPEN, OPEN, Upstream, UpstreamPool, UpstreamUnavailableError
+from backend.utils.slack_notify import SlackNotifier
+from benchmarks.stubs import Faults, GrafanaStub, StubServer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def grafana():
+    faults = Faults(GrafanaStub(alerts=5))
+    server = StubServer(faults)
+    yield server, faults
+    server.close()
+
+
+def fetch(url: str):
+    async def get(client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get(url + ALERTS_PATH)
+    return get
+
+
+def test_breaker_opens_half_opens_and_closes(grafana):
+    server, faults = grafana
+    clock = Clock()
+    upstream = Upstream("grafana", 2.0, failure_threshold=3, reset_timeout=10, clock=clock)
+    get = fetch(server.url)
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            faults.status = 503
+            for _ in range(3):
+                assert (await upstream.call(get, client)).status_code == 503
+            assert upstream.breaker.state == OPEN
+            served = server.requests
+            with pytest.raises(UpstreamUnavailableError) as refused:
+                await upstream.call(get, client)
+            assert refused.value.retry_after == 10
+            assert server.requests == served  # refused without calling out
+
+            clock.now = 10
+            assert upstream.breaker.state == HALF_OPEN
+            assert (await upstream.call(get, client)).status_code == 503  # the trial fails: open again
+            assert upstream.breaker.state == OPEN
+
+            clock.now = 20
+            faults.heal()
+            assert (await upstream.call(get, client)).status_code == 200
+            assert upstream.breaker.state == CLOSED and upstream.breaker.failures == 0
+
+    asyncio.run(main())
+    assert upstream.breaker.times_opened == 2
+    assert upstream.rejected["circuit_open"] == 1
+
+
+def test_timeout_follows_latency(grafana):
+    server, faults = grafana
+    upstream = Upstream("grafana", 5.0, timeout_floor=0.05, timeout_multiplier=3, failure_threshold=100)
+    get = fetch(server.url)
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            faults.delay = 0.02
+            for _ in range(20):
+                await upstream.call(get, client)
+            learned = upstream.timeout.value
+            assert 0.05 <= learned < 1.0
+
+            faults.delay = 1.5  # hangs well past three times the usual latency
+            with pytest.raises(UpstreamUnavailableError, match="did not answer"):
+                await upstream.call(get, client)
+            return learned
+
+    learned = asyncio.run(main())
+    assert upstream.rejected["timeout"] == 1
+    assert upstream.timeout.value >= learned
+
+
+def test_bulkhead_refuses_calls_past_its_queue(grafana):
+    server, faults = grafana
+    upstream = Upstream("grafana", 5.0, max_concurrency=2, max_waiting=1)
+    get = fetch(server.url)
+    faults.delay = 0.3
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(*(upstream.call(get, client) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert sum(isinstance(r, httpx.Response) and r.status_code == 200 for r in results) == 3
+    refused = [r for r in results if isinstance(r, UpstreamUnavailableError)]
+    assert len(refused) == 2 and upstream.rejected["bulkhead_full"] == 2
+    assert server.requests == 3
+    assert upstream.breaker.state == CLOSED  # turning calls away says nothing about the upstream
+
+
+def test_last_known_good_alerts_are_served_while_grafana_fails(grafana, monkeypatch):
+    server, faults = grafana
+    monkeypatch.setenv("GRAFANA_BASE_URL", server.url)
+    monkeypatch.setenv("GRAFANA_API_KEY", "stub")
+    monkeypatch.setattr(http_client, "_client", None)
+    client = GrafanaClient()
+    client.upstream = Upstream("grafana", 2.0, failure_threshold=2)
+
+    async def main():
+        try:
+            fresh = await client.get_alerts()
+            faults.status = 500
+            during = [await client.get_alerts() for _ in range(3)]
+            return fresh, during
+        finally:
+            await http_client.close_http_client()
+
+    fresh, during = asyncio.run(main())
+    assert len(fresh["alerts"]) == 5
+    assert all(alerts == fresh for alerts in during)
+    assert client.upstream.fallbacks == 3
+    assert client.upstream.breaker.state == OPEN
+
+
+def test_each_slack_webhook_has_its_own_circuit(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500 if request.url.host == "1.1.1.1" else 200)
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    notifier = SlackNotifier()
+    notifier.upstreams = UpstreamPool("slack", 1.0, failure_threshold=3, reset_timeout=60)
+    # Public addresses, so the webhook checks need no DNS
+    broken, healthy = "https://1.1.1.1/hook", "https://8.8.8.8/hook"
+
+    async def main():
+        for _ in range(3):
+            assert (await notifier.post({"text": "hi"}, broken)).status_code == 500
+        with pytest.raises(UpstreamUnavailableError):
+            await notifier.post({"text": "hi"}, broken)
+        assert (await notifier.post({"text": "hi"}, healthy)).status_code == 200
+
+    asyncio.run(main())
+    assert notifier.upstreams.get(broken).breaker.state == OPEN
+    assert notifier.upstreams.get(healthy).breaker.state == CLOSED
+    status = notifier.upstreams.status()
+    assert status["destinations"] == 2 and status["open"] == 1
+    assert "1.1.1.1" not in notifier.upstreams.get(broken).name
+
+
+def test_pool_drops_least_recently_used_idle_destinations():
+    pool = UpstreamPool("slack", 1.0, max_keys=2)
+    pool.get("a")
+    pool.get("b").rejected["timeout"] = 2
+    pool.get("a")
+    pool.get("c")
+    assert {u.name for u in pool.upstreams()} == {pool.get("a").name, pool.get("c").name}
+    assert pool.status()["rejected"]["timeout"] == 2
@@ -0,0 +1,87 @@
+"""Slack deliveries retry what Slack asks them to and always end sent or failed.
+
+Replies are scripted by a local stub Slack served over real HTTP, the same
+stub server the benchmarks use.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend.utils import http_client
+from backend.utils.slack_notify import SlackDispatcher, SlackNotifier
+from benchmarks.stubs import StubServer
+
+
+@pytest.fixture
+def slack(monkeypatch):
+    """A stub webhook answering with the queued replies in turn, then 200; returns (url, replies, request times)"""
+    replies, received = [], []
+
+    def handler(method, path, query, headers, body):
+        received.append(time.monotonic())
+        return replies.pop(0) if replies else (200, b"ok", {})
+
+    server = StubServer(handler)
+    # The stub listens on localhost
+    monkeypatch.setattr(http_client, "ALLOW_PRIVATE_TARGETS", True)
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=http_client._transport(httpx.Limits())))
+    yield f"{server.url}/services/test", replies, received
+    server.close()
+
+
+def deliver(url: str, notifier: SlackNotifier = None) -> dict:
+    async def main():
+        dispatcher = SlackDispatcher(notifier or SlackNotifier(), max_attempts=3, backoff_base=0.01)
+        delivery_id = dispatcher.submit({"text": "report"}, url)
+
+        async def settled():
+            while dispatcher.get(delivery_id)["status"] not in ("sent", "failed"):
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(settled(), 5)
+        finally:
+            await dispatcher.stop()
+        return dispatcher.get(delivery_id)
+
+    return asyncio.run(main())
+
+
+def test_rate_limited_send_waits_for_retry_after(slack):
+    url, replies, received = slack
+    replies.append((429, b"rate_limited", {"Retry-After": "0.3"}))
+    delivery = deliver(url)
+    assert delivery["status"] == "sent" and delivery["attempts"] == 2
+    assert received[1] - received[0] >= 0.3
+
+
+def test_server_errors_are_retried(slack):
+    url, replies, received = slack
+    replies.extend([(500, b"error", {}), (503, b"unavailable", {})])
+    delivery = deliver(url)
+    assert delivery["status"] == "sent" and delivery["attempts"] == 3
+    assert len(received) == 3
+
+
+def test_permanent_failure_is_not_retried(slack):
+    url, replies, received = slack
+    replies.append((404, b"no_service", {}))
+    delivery = deliver(url)
+    assert delivery == {**delivery, "status": "failed", "attempts": 1, "last_error": "HTTP 404"}
+    assert len(received) == 1
+
+
+def test_unexpected_errors_fail_the_delivery(slack):
+    url, _, received = slack
+    notifier = SlackNotifier()
+
+    async def broken(payload: dict, webhook_url: str = None):
+        raise ValueError("Out of range float values are not JSON compliant")
+
+    notifier.post = broken
+    delivery = deliver(url, notifier)
+    assert delivery["status"] == "failed" and delivery["attempts"] == 1
+    assert "JSON compliant" in delivery["last_error"]
+    assert received == []
@@ -0,0 +1,99 @@
+"""SQLite repositories keep their rollups exact under concurrent writes, and
+their change logs complete across migrations and deletes."""
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.storage.sqlite_store import (
+    SQLiteDatabase, SQLiteFocusRepository, SQLiteIntegrationRepository, SQLiteTaskRepository,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "focus.db"))
+    yield db
+    db.close()
+
+
+def test_concurrent_replaces_keep_focus_rollups_exact(db):
+    repository = SQLiteFocusRepository(db, "user-1")
+
+    async def main():
+        session = await repository.create({"duration": 25, "task_id": 7, "completed": False, "created_at": "2024-03-01T09:30:00"})
+        # Both replaces were read from the same old row; each must undo only what is stored when it runs
+        await asyncio.gather(
+            repository.replace(session.model_copy(update={"duration": 40})),
+            repository.replace(session.model_copy(update={"duration": 50, "completed": True})),
+        )
+        return await repository.stats(), await repository.stats(task_id=7), await repository.get(session.id)
+
+    total, by_task, stored = asyncio.run(main())
+    assert (total.total_sessions, total.total_minutes, total.completed_sessions) == (1, stored.duration, int(stored.completed))
+    assert (by_task.total_sessions, by_task.total_minutes) == (1, stored.duration)
+
+
+def test_replacing_a_missing_session_raises(db):
+    repository = SQLiteFocusRepository(db, "user-1")
+
+    async def main():
+        session = await repository.create({"duration": 25, "created_at": "2024-03-01T09:30:00"})
+        await SQLiteFocusRepository(db, "user-2").replace(session)
+
+    with pytest.raises(KeyError):
+        asyncio.run(main())
+
+
+def test_rows_from_before_versions_are_in_the_change_log(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT, status TEXT NOT NULL,
+            priority TEXT NOT NULL, priority_rank INTEGER NOT NULL, category TEXT, tags TEXT NOT NULL DEFAULT '[]',
+            created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+        );
+        CREATE TABLE integrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, type TEXT NOT NULL, enabled INTEGER NOT NULL,
+            config TEXT NOT NULL, user_id TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+        );
+        INSERT INTO tasks (title, status, priority, priority_rank, created_at, updated_at)
+        VALUES ('one', 'todo', 'low', 0, '2024-03-01', '2024-03-01'), ('two', 'todo', 'low', 0, '2024-03-01', '2024-03-01');
+        INSERT INTO integrations (name, type, enabled, config, created_at, updated_at)
+        VALUES ('Slack', 'slack', 0, '{}', '2024-03-01', '2024-03-01');
+    """)
+    old.close()
+
+    db = SQLiteDatabase(path)
+    tasks, integrations = SQLiteTaskRepository(db), SQLiteIntegrationRepository(db)
+
+    async def main():
+        changed, deleted, version = await tasks.changes(0)
+        created = await tasks.create({
+            "title": "three", "status": "todo", "priority": "low", "tags": [], "created_at": "2024-03-02", "updated_at": "2024-03-02",
+        })
+        return changed, version, created, await integrations.all(), await integrations.seed_defaults()
+
+    try:
+        changed, version, created, stored, seeded = asyncio.run(main())
+    finally:
+        db.close()
+    assert [(t.title, t.version) for t in changed] == [("one", 1), ("two", 2)] and version == 2
+    assert created.version == 3
+    assert [i.version for i in stored] == [1] and not seeded
+
+
+def test_integration_deletes_leave_a_tombstone(db):
+    repository = SQLiteIntegrationRepository(db, "user-1")
+
+    async def main():
+        integration = await repository.create({
+            "name": "Slack", "type": "slack", "enabled": True, "config": {}, "created_at": "2024-03-01", "updated_at": "2024-03-01",
+        })
+        await repository.delete(integration.id)
+        tombstones = await db.read("SELECT id, version FROM tombstones WHERE entity = ?", (repository.versions,))
+        return integration, [tuple(row) for row in tombstones], await repository.version()
+
+    integration, tombstones, version = asyncio.run(main())
+    assert tombstones == [(integration.id, version)] and version == integration.version + 1
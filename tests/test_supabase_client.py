@@ -0,0 +1,85 @@
+"""Auth flows must never share a signed-in supabase-py client between users."""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils.supabase_client import SupabaseClient
+
+
+class FakeClient:
+    """Enough of supabase-py to sign in, query profiles as the signed-in user and sign out"""
+
+    def __init__(self, barrier: threading.Barrier = None):
+        self.barrier = barrier
+        self.session_email = None
+        self.revoked = []
+        self.auth = self
+        self.admin = self
+
+    def sign_in_with_password(self, credentials: dict):
+        self.session_email = credentials["email"]
+        if self.barrier is not None:
+            # Every login has signed in before any reads its profile
+            self.barrier.wait(timeout=5)
+        user = SimpleNamespace(id=credentials["email"], email=credentials["email"], user_metadata={})
+        return SimpleNamespace(user=user, session=SimpleNamespace(access_token=f"token-{credentials['email']}", token_type="bearer"))
+
+    def sign_out(self, jwt: str):
+        self.revoked.append(jwt)
+
+    def table(self, name: str):
+        email = self.session_email
+        query = SimpleNamespace()
+        query.select = query.eq = lambda *args: query
+        query.execute = lambda: SimpleNamespace(data=[{"name": f"profile of {email}"}])
+        return query
+
+
+def test_concurrent_logins_each_read_their_own_profile():
+    logins = 8
+    barrier = threading.Barrier(logins)
+    supabase = SupabaseClient()
+    supabase.enabled = True
+    supabase._client = FakeClient()
+    supabase._session_client = lambda: FakeClient(barrier)
+
+    async def main():
+        emails = [f"user{i}@example.com" for i in range(logins)]
+        return emails, await asyncio.gather(*(supabase.login(email, "pw") for email in emails))
+
+    emails, results = asyncio.run(main())
+    assert [r["name"] for r in results] == [f"profile of {email}" for email in emails]
+    assert supabase._client.session_email is None
+
+
+def test_logout_revokes_the_callers_token_with_the_service_role_key():
+    supabase = SupabaseClient()
+    supabase.enabled = True
+    supabase._client = FakeClient()
+    supabase._service_key = "service-role"
+    supabase._new_client = lambda key, **options: FakeClient() if key == "service-role" else None
+    asyncio.run(supabase.logout("token-a"))
+    assert supabase._admin.revoked == ["token-a"]
+    assert supabase._client.revoked == []
+
+
+def test_failed_logout_is_reported():
+    supabase = SupabaseClient()
+    supabase.enabled = True
+    supabase._client = FakeClient()
+    supabase._service_key = ""
+    with pytest.raises(RuntimeError):
+        asyncio.run(supabase.logout("token-a"))
+
+    def refused(jwt: str):
+        # The auth admin API refusing the call
+        raise PermissionError("User not allowed")
+
+    supabase._service_key = "service-role"
+    supabase._admin = FakeClient()
+    supabase._admin.sign_out = refused
+    with pytest.raises(PermissionError):
+        asyncio.run(supabase.logout("token-a"))
+    assert supabase._client.revoked == []
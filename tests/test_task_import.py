@@ -0,0 +1,46 @@
+"""NDJSON import keeps at most one bounded line in memory."""
+import asyncio
+import json
+
+import httpx
+
+from backend.main import app
+from backend.routes.tasks import IMPORT_MAX_LINE_BYTES
+
+
+def post_import(chunks):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.post("/api/tasks/import", content=body(), headers={"Content-Type": "application/x-ndjson"})
+
+    return asyncio.run(main())
+
+
+def line(title: str) -> bytes:
+    return json.dumps({"title": title, "priority": "low"}).encode() + b"\n"
+
+
+def test_newline_free_upload_is_refused_once_past_the_line_limit():
+    sent = []
+
+    def chunks():
+        yield line("before")
+        while True:
+            sent.append(1)
+            yield b"x" * 8192
+
+    response = post_import(chunks())
+    assert response.status_code == 413
+    assert "Line 2" in response.json()["detail"] and "imported 1 tasks" in response.json()["detail"]
+    assert len(sent) * 8192 <= IMPORT_MAX_LINE_BYTES + 8192
+
+
+def test_lines_within_the_limit_are_imported():
+    second = line("two")
+    response = post_import([line("one") + second[:5], second[5:] + line("three")])
+    assert response.status_code == 200
+    assert response.json() == {"imported": 3, "errors": []}
@@ -0,0 +1,60 @@
+"""Only signed-in users' tokens pick a tenant; other validly signed tokens are refused."""
+import asyncio
+import time
+
+import httpx
+import pytest
+from jose import jwt
+
+from backend.main import app
+from backend.utils import token_verifier as tv
+from backend.utils.supabase_client import supabase_client
+
+SECRET = "test-secret"
+
+
+def token(**claims) -> str:
+    return jwt.encode({"exp": int(time.time()) + 3600, **claims}, SECRET, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def verifier(monkeypatch):
+    monkeypatch.setattr(tv, "token_verifier", tv.TokenVerifier(secret=SECRET))
+    monkeypatch.setattr(tv, "ALLOW_ANONYMOUS", False)
+
+
+def test_user_token_resolves_to_its_user():
+    user = token(sub="user-1", aud="authenticated", role="authenticated")
+    assert asyncio.run(tv.resolve_tenant(user)) == "user-1"
+
+
+@pytest.mark.parametrize("claims", [
+    {"role": "anon", "iss": "supabase"},  # the public anon key: no sub and no aud
+    {"role": "service_role"},
+    {"sub": "user-1", "role": "anon"},
+    {"sub": "", "aud": "authenticated", "role": "authenticated"},
+])
+def test_tokens_without_a_user_are_refused(claims):
+    with pytest.raises(tv.InvalidTokenError):
+        asyncio.run(tv.resolve_tenant(token(**claims)))
+
+
+def test_missing_token_is_refused_without_anonymous_access():
+    with pytest.raises(tv.InvalidTokenError):
+        asyncio.run(tv.resolve_tenant(None))
+
+
+def test_mock_login_token_is_accepted(monkeypatch):
+    # No key material and no Supabase: the token is checked against the mock user
+    monkeypatch.setattr(tv, "token_verifier", tv.TokenVerifier())
+    monkeypatch.setattr(supabase_client, "enabled", False)
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            login = await client.post("/api/auth/login", json={"email": "a@example.com", "password": "pw"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            return await client.get("/api/auth/me", headers=headers), await client.get("/api/tasks/", headers=headers)
+
+    me, tasks = asyncio.run(main())
+    assert me.status_code == 200 and me.json()["id"] == "mock-user-123"
+    assert tasks.status_code == 200
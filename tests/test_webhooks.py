@@ -0,0 +1,63 @@
+"""Webhook bodies are read within limits and applied one payload at a time."""
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend.routes.integrations import _prepare_alertmanager, _prepare_jira, _read_body
+from backend.utils.webhooks import WebhookQueue
+
+
+def request(body: bytes, content_length: str) -> Request:
+    chunks = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return chunks.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": [(b"content-length", content_length.encode())]}
+    return Request(scope, receive)
+
+
+@pytest.mark.parametrize("content_length, status", [("abc", 400), ("-", 400), ("2048", 413)])
+def test_bad_or_large_content_length_is_refused(content_length, status):
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(_read_body(request(b"{}", content_length), 1024))
+    assert refused.value.status_code == status
+
+
+def test_body_within_limit_is_read():
+    assert asyncio.run(_read_body(request(b'{"alerts": []}', "14"), 1024)) == b'{"alerts": []}'
+
+
+def issue(n: int, **extra) -> dict:
+    return {"id": str(10000 + n), "key": f"OPS-{n}", "fields": {"summary": f"Issue {n}", "status": {"name": "To Do"}}, **extra}
+
+
+def test_malformed_payloads_are_dropped_one_by_one():
+    applied = {}
+    queue = WebhookQueue({
+        "alertmanager": (_prepare_alertmanager, lambda batch: applied.setdefault("alertmanager", batch)),
+        "jira": (_prepare_jira, lambda batch: applied.setdefault("jira", batch)),
+    })
+    bodies = [
+        (None, json.dumps({"alerts": [{"labels": {"alertname": "Disk"}, "fingerprint": "a1", "status": "firing"}]})),
+        (None, json.dumps([1, 2, 3])),  # not an object
+        ("alertmanager", json.dumps({"alerts": ["oops"]})),
+        ("alertmanager", json.dumps({"alerts": [{"labels": {"alertname": ["x"]}}]})),
+        (None, json.dumps({"webhookEvent": "jira:issue_updated", "issue": issue(1)})),
+        (None, json.dumps({"webhookEvent": "jira:issue_updated", "issue": {"key": "OPS-2", "fields": {}}})),  # no id
+        (None, json.dumps({"webhookEvent": "jira:issue_deleted", "issue": {"key": ["OPS-3"]}})),
+        (None, json.dumps({"webhookEvent": "jira:issue_deleted", "issue": {"key": "OPS-4"}})),
+        (None, b"not json"),
+    ]
+    queue.queued_bytes = sum(len(body) for _, body in bodies)
+
+    queue._apply([(source, body.encode() if isinstance(body, str) else body) for source, body in bodies])
+    assert [a["fingerprint"] for alerts in applied["alertmanager"] for a in alerts] == ["a1"]
+    assert [(kind, value if kind == "deleted" else value["id"]) for kind, value in applied["jira"]] == [
+        ("updated", "OPS-1"), ("deleted", "OPS-4"),
+    ]
+    assert queue.stats()["processed"] == 3 and queue.stats()["failed"] == 6
+    assert queue.queued_bytes == 0